@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bs4 import BeautifulSoup
+
+from host_scheduler import polite_get
+from instrumentation import attach, current_span, increment, span
+from urls import canonical_url
+
+# Optional enrichment: fetch linked article pages, extract the main text and
+# give curation a trimmed body instead of a one-line summary. Bodies are cached
+# on disk keyed by canonical URL, so each article is downloaded once.
+ARTICLE_CACHE_DIR = os.environ.get("ARTICLE_CACHE_DIR", ".cache/articles")
+ARTICLE_CACHE_TTL_DAYS = float(os.environ.get("ARTICLE_CACHE_TTL_DAYS", "30"))
+ARTICLE_BODY_CHARS = int(os.environ.get("ARTICLE_BODY_CHARS", "1500"))
+ARTICLES_PER_RESULT = int(os.environ.get("ARTICLES_PER_RESULT", "3"))
+ARTICLE_WORKERS = 8
+
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'iframe', 'svg', 'button']
+# Blocks whose class or id suggests they are not the article
+BOILERPLATE_PATTERN = re.compile(r"comment|share|social|related|promo|advert|cookie|newsletter|sidebar|menu|breadcrumb|subscribe", re.IGNORECASE)
+
+
+def _cache_path(url):
+    digest = hashlib.sha256(canonical_url(url).encode('utf-8')).hexdigest()
+    return os.path.join(ARTICLE_CACHE_DIR, digest[:2], f"{digest}.json")
+
+
+def _is_fresh(entry):
+    return time.time() - entry.get('fetched_at', 0) < ARTICLE_CACHE_TTL_DAYS * 86400
+
+
+def read_cache(url):
+    """Cached article for a URL, or None if missing or past its TTL"""
+
+    try:
+        with open(_cache_path(url)) as f:
+            entry = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    return entry if _is_fresh(entry) else None
+
+
+def write_cache(url, entry):
+    path = _cache_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def evict_expired():
+    """Delete cache entries past their TTL; returns the number removed"""
+
+    removed = 0
+
+    for root, _, files in os.walk(ARTICLE_CACHE_DIR):
+        for filename in files:
+            path = os.path.join(root, filename)
+            try:
+                with open(path) as f:
+                    expired = not _is_fresh(json.load(f))
+            except (OSError, json.JSONDecodeError):
+                expired = True
+            if expired:
+                os.remove(path)
+                removed += 1
+
+    return removed
+
+
+def extract_main_text(html):
+    """
+    Readability-style main text extraction.
+
+    Strips boilerplate elements, then picks the <article>/<main> element or
+    the block with the most paragraph text (penalized by link density).
+    Returns (title, text).
+    """
+
+    soup = BeautifulSoup(html, 'html.parser')
+
+    title = soup.find('meta', property='og:title')
+    title = title.get('content', '') if title else (soup.title.get_text(strip=True) if soup.title else '')
+
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    for tag in soup.find_all(attrs={'class': BOILERPLATE_PATTERN}) + soup.find_all(attrs={'id': BOILERPLATE_PATTERN}):
+        if tag.name not in ('body', 'html', 'article', 'main'):
+            tag.decompose()
+
+    candidate = soup.find('article') or soup.find('main')
+
+    if candidate is None:
+        best_score = 0
+        for block in soup.find_all(['div', 'section']):
+            paragraphs = block.find_all('p', recursive=False) or block.find_all('p')
+            text_length = sum(len(p.get_text(strip=True)) for p in paragraphs)
+            if not text_length:
+                continue
+            link_length = sum(len(a.get_text(strip=True)) for a in block.find_all('a'))
+            score = text_length * (1 - min(link_length / max(len(block.get_text(strip=True)), 1), 1))
+            if score > best_score:
+                candidate, best_score = block, score
+
+    if candidate is None:
+        candidate = soup.body or soup
+
+    paragraphs = [p.get_text(' ', strip=True) for p in candidate.find_all(['p', 'li', 'h2', 'h3'])]
+    paragraphs = [p for p in paragraphs if len(p) > 30]
+    text = '\n'.join(paragraphs) if paragraphs else candidate.get_text(' ', strip=True)
+
+    return title, re.sub(r"[ \t]+", " ", text).strip()
+
+
+def trim_body(text, limit=None):
+    """Trim text to about limit characters, ending on a sentence boundary where possible"""
+
+    if limit is None:
+        limit = ARTICLE_BODY_CHARS
+
+    if len(text) <= limit:
+        return text
+
+    cut = text[:limit]
+    sentence_end = max(cut.rfind('. '), cut.rfind('.\n'))
+    if sentence_end > limit * 0.6:
+        cut = cut[:sentence_end + 1]
+
+    return cut.rstrip() + ' …'
+
+
+def fetch_article(url, parent_span=None):
+    """Return {"url", "title", "text", "fetched_at"} for an article, from cache when fresh"""
+
+    cached = read_cache(url)
+    if cached is not None:
+        increment("article_cache_total", result="hit")
+        return cached
+
+    increment("article_cache_total", result="miss")
+
+    with attach(parent_span), span("article.fetch", stage="enrichment", url=url) as fetch_span:
+        response = polite_get(url)
+        fetch_span["bytes"] = len(response.content)
+        fetch_span["attributes"]["status_code"] = response.status_code
+
+    if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+        return None
+
+    title, text = extract_main_text(response.content)
+    entry = {"url": canonical_url(url), "title": title, "text": text, "fetched_at": time.time()}
+    write_cache(url, entry)
+
+    return entry
+
+
+def enrich_search_results(all_search_results, per_result=None):
+    """
+    Attach trimmed article bodies to search results, fetching up to
+    per_result cited pages per result concurrently.
+
+    Sets results['articles'] = [{"url", "title", "body"}] on each result.
+    """
+
+    if per_result is None:
+        per_result = ARTICLES_PER_RESULT
+
+    evicted = evict_expired()
+    if evicted:
+        print(f"   🧹 Evicted {evicted} expired cached articles")
+
+    wanted = {}
+    for result in all_search_results:
+        if not isinstance(result.get('results'), dict):
+            continue
+        for url in result['results'].get('citations', [])[:per_result]:
+            if isinstance(url, str) and url.startswith('http'):
+                wanted.setdefault(canonical_url(url), url)
+
+    if not wanted:
+        return all_search_results
+
+    parent_span = current_span()
+
+    def _fetch(url):
+        try:
+            return fetch_article(url, parent_span)
+        except Exception as e:
+            increment("article_fetch_failures_total")
+            print(f"      ✗ {url[:60]}: {str(e)[:50]}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=ARTICLE_WORKERS) as executor:
+        articles = dict(zip(wanted, executor.map(_fetch, wanted.values())))
+
+    fetched = 0
+    for result in all_search_results:
+        if not isinstance(result.get('results'), dict):
+            continue
+        result['results']['articles'] = []
+        seen = set()
+        for url in result['results'].get('citations', [])[:per_result]:
+            key = canonical_url(url) if isinstance(url, str) else None
+            article = articles.get(key)
+            if article and article.get('text') and key not in seen:
+                seen.add(key)
+                result['results']['articles'].append({
+                    "url": url,
+                    "title": article.get('title', ''),
+                    "body": trim_body(article['text'])
+                })
+                fetched += 1
+
+    print(f"   📰 Attached {fetched} article bodies from {len(wanted)} linked pages")
+
+    return all_search_results
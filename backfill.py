@@ -0,0 +1,111 @@
+import anthropic
+import argparse
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from content_discovery_perplexity import CURATION_BATCH_SIZE, build_curation_request, curate_items, curate_with_claude, organize_curated_items
+from curation_batch import curate_with_batches, LocalBatchClient
+from instrumentation import start_run, print_run_summary
+from model_cascade import start_cascade, triage_results, cascade_summary
+from raw_archive import list_manifests, load_run
+
+# Re-curate archived raw results (see raw_archive.py) over a date range, with
+# no new search spend. Useful for testing prompt or model changes against
+# months of real inputs.
+BACKFILL_DIR = os.path.join("reviews", "backfill")
+
+
+def recurate_run(client, manifest, output_dir, use_batches=False, cascade=False):
+    """Curate one archived run and save the result; returns (timestamp, total items)"""
+
+    raw_results = load_run(manifest)
+    if cascade:
+        raw_results = triage_results(client, raw_results)
+
+    if use_batches:
+        items, failed = curate_with_batches(client, raw_results, build_curation_request, CURATION_BATCH_SIZE)
+        if failed:
+            items += curate_items(client, failed)
+        curated = organize_curated_items(items)
+    else:
+        curated = curate_with_claude(client, raw_results)
+
+    filename = os.path.join(output_dir, f"review_{manifest['timestamp']}.json")
+    with open(filename, 'w') as f:
+        json.dump({
+            "generated_at": datetime.now().isoformat(),
+            "date": manifest["date"],
+            "timestamp": manifest["timestamp"],
+            "backfill": True,
+            "curated_content": curated,
+            "statistics": curated.get('stats', {})
+        }, f, indent=2)
+
+    return manifest["timestamp"], curated.get('total_items', 0)
+
+
+def backfill(start_date=None, end_date=None, label=None, workers=3, use_batches=False, local_batches=False, cascade=False):
+    """Re-curate every archived run between start_date and end_date in parallel"""
+
+    manifests = list_manifests(start_date, end_date)
+
+    if not manifests:
+        print(f"○ No archived runs between {start_date or 'the start'} and {end_date or 'today'}")
+        return []
+
+    label = label or datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    output_dir = os.path.join(BACKFILL_DIR, label)
+    os.makedirs(output_dir, exist_ok=True)
+
+    start_run("backfill")
+    start_cascade()
+    client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+    if local_batches:
+        client = LocalBatchClient(client)
+
+    print(f"🔁 Re-curating {len(manifests)} archived runs ({manifests[0]['date']} to {manifests[-1]['date']}) "
+          f"with {workers} workers...\n")
+
+    results = []
+
+    def _recurate(manifest):
+        try:
+            return recurate_run(client, manifest, output_dir, use_batches, cascade)
+        except Exception as e:
+            print(f"   ✗ {manifest['timestamp']}: {str(e)[:100]}")
+            return manifest["timestamp"], None
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for timestamp, total in executor.map(_recurate, manifests):
+            results.append((timestamp, total))
+
+    print("\n" + "="*60)
+    for timestamp, total in results:
+        print(f"   {'✓' if total is not None else '✗'} {timestamp}: {total if total is not None else 'failed'} stories")
+    print(f"💾 Saved to {output_dir}/")
+
+    if cascade:
+        summary = cascade_summary()
+        print(f"🪜 Cascade: {summary['escalated']}/{summary['triaged']} triaged inputs escalated "
+              f"({summary['escalation_rate'] or 0:.0%}), {summary['calls']} triage calls")
+
+    print_run_summary()
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-curate archived raw search results over a date range")
+    parser.add_argument("--from", dest="start_date", metavar="YYYY-MM-DD", help="first run date to include")
+    parser.add_argument("--to", dest="end_date", metavar="YYYY-MM-DD", help="last run date to include")
+    parser.add_argument("--label", help="output folder name under reviews/backfill/ (default: timestamp)")
+    parser.add_argument("--workers", type=int, default=3, help="runs curated in parallel (default 3)")
+    parser.add_argument("--batches", action="store_true", help="curate through the Message Batches API")
+    parser.add_argument("--local-batches", action="store_true", help="run batch mode against the local stand-in endpoint")
+    parser.add_argument("--cascade", action="store_true", help="triage inputs with the small model first (see model_cascade.py)")
+    args = parser.parse_args()
+
+    backfill(args.start_date, args.end_date, args.label, args.workers, args.batches or args.local_batches,
+             args.local_batches, args.cascade or os.environ.get("CURATION_CASCADE") == "1")
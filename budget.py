@@ -0,0 +1,234 @@
+import os
+import threading
+
+from instrumentation import increment, set_gauge
+
+# Per-run cost and token budget. Every paid call is charged from its usage
+# fields; as projected spend approaches the budget the run degrades in order:
+#   1. skip RSS and planning items with a low pre-score
+#   2. shrink curation batches (smaller prompts and outputs per call)
+#   3. stop making paid calls
+RUN_BUDGET_USD = float(os.environ.get("RUN_BUDGET_USD", "0"))         # 0 = no dollar cap
+RUN_TOKEN_BUDGET = int(os.environ.get("RUN_TOKEN_BUDGET", "0"))       # 0 = no token cap
+# Share of the budget (spent plus projected) at which each degradation level starts
+DEGRADE_AT = [float(x) for x in os.environ.get("BUDGET_DEGRADE_AT", "0.7,0.85,1.0").split(",")]
+# Minimum pre-score for RSS and planning items once level 1 is reached
+BUDGET_PRESCORE_THRESHOLD = float(os.environ.get("BUDGET_PRESCORE_THRESHOLD", "5.0"))
+
+LEVEL_NAMES = ["normal", "skip low pre-score items", "shrink batches", "stop"]
+
+# USD per million tokens; batch API calls are half price
+PRICING = {
+    "claude-sonnet-4-20250514": {"input": 3.00, "output": 15.00, "cache_write": 3.75, "cache_read": 0.30},
+    "claude-3-5-haiku-20241022": {"input": 0.80, "output": 4.00, "cache_write": 1.00, "cache_read": 0.08},
+    "claude-haiku-4-5": {"input": 1.00, "output": 5.00, "cache_write": 1.25, "cache_read": 0.10},
+    "sonar-small": {"input": 1.00, "output": 1.00, "cache_write": 0, "cache_read": 0},
+    "sonar": {"input": 1.00, "output": 1.00, "cache_write": 0, "cache_read": 0}
+}
+DEFAULT_PRICING = PRICING["claude-sonnet-4-20250514"]
+BATCH_DISCOUNT = 0.5
+# Per-request fees on top of tokens
+WEB_SEARCH_FEE = 10.00 / 1000
+PERPLEXITY_REQUEST_FEE = 5.00 / 1000
+
+_lock = threading.Lock()
+_budget = {}
+
+
+def start_budget(usd=None, tokens=None):
+    """Reset spend tracking for a new run"""
+
+    global _budget
+
+    with _lock:
+        _budget = {
+            "usd_limit": RUN_BUDGET_USD if usd is None else usd,
+            "token_limit": RUN_TOKEN_BUDGET if tokens is None else tokens,
+            "usd": 0.0,
+            "tokens": 0,
+            "calls": {},
+            "level": 0,
+            "stopped": False
+        }
+
+    return _budget
+
+
+def _current_budget():
+    if not _budget:
+        start_budget()
+    return _budget
+
+
+def spend_snapshot():
+    """Spend so far (usd, tokens and per-kind calls), for saving with a run checkpoint"""
+
+    budget = _current_budget()
+
+    with _lock:
+        return {
+            "usd": budget["usd"],
+            "tokens": budget["tokens"],
+            "calls": {kind: dict(calls) for kind, calls in budget["calls"].items()}
+        }
+
+
+def restore_spend(snapshot):
+    """Add the spend of an interrupted attempt (see spend_snapshot) to the current run"""
+
+    budget = _current_budget()
+
+    with _lock:
+        budget["usd"] += snapshot.get("usd", 0.0)
+        budget["tokens"] += snapshot.get("tokens", 0)
+        for kind, saved in snapshot.get("calls", {}).items():
+            calls = budget["calls"].setdefault(kind, {"count": 0, "usd": 0.0, "tokens": 0})
+            for field in ("count", "usd", "tokens"):
+                calls[field] += saved.get(field, 0)
+
+    set_gauge("budget_spent_usd", round(budget["usd"], 4))
+
+
+def _usage_value(usage, key):
+    if usage is None:
+        return 0
+    if isinstance(usage, dict):
+        return usage.get(key) or 0
+    return getattr(usage, key, 0) or 0
+
+
+def call_cost(model, usage, batch=False):
+    """Dollar cost and total tokens of one call from its usage payload"""
+
+    prices = PRICING.get(model, DEFAULT_PRICING)
+
+    input_tokens = _usage_value(usage, "input_tokens") or _usage_value(usage, "prompt_tokens")
+    output_tokens = _usage_value(usage, "output_tokens") or _usage_value(usage, "completion_tokens")
+    cache_read = _usage_value(usage, "cache_read_input_tokens")
+    cache_write = _usage_value(usage, "cache_creation_input_tokens")
+
+    cost = (input_tokens * prices["input"] + output_tokens * prices["output"]
+            + cache_read * prices["cache_read"] + cache_write * prices["cache_write"]) / 1_000_000
+
+    if batch:
+        cost *= BATCH_DISCOUNT
+
+    server_tools = _usage_value(usage, "server_tool_use")
+    cost += _usage_value(server_tools, "web_search_requests") * WEB_SEARCH_FEE
+    if model.startswith("sonar"):
+        cost += PERPLEXITY_REQUEST_FEE
+
+    return cost, input_tokens + output_tokens + cache_read + cache_write
+
+
+def charge(kind, model, usage, batch=False, record=None):
+    """
+    Charge one call against the run budget.
+
+    kind groups calls for projections ("search", "curation", ...). If a span
+    record is given, the cost is added to its attributes.
+    """
+
+    cost, tokens = call_cost(model, usage, batch)
+    budget = _current_budget()
+
+    with _lock:
+        budget["usd"] += cost
+        budget["tokens"] += tokens
+        calls = budget["calls"].setdefault(kind, {"count": 0, "usd": 0.0, "tokens": 0})
+        calls["count"] += 1
+        calls["usd"] += cost
+        calls["tokens"] += tokens
+
+    if record is not None:
+        record["attributes"]["cost_usd"] = round(record["attributes"].get("cost_usd", 0) + cost, 5)
+
+    set_gauge("budget_spent_usd", round(budget["usd"], 4))
+
+    return cost
+
+
+def average_call(kind):
+    """(usd, tokens) of an average call of this kind so far, or None"""
+
+    calls = _current_budget()["calls"].get(kind)
+    if not calls or not calls["count"]:
+        return None
+    return calls["usd"] / calls["count"], calls["tokens"] / calls["count"]
+
+
+def estimate_call(model, input_chars, output_tokens=1500):
+    """Rough (usd, tokens) of a call before any have been made (about 4 characters per token)"""
+
+    input_tokens = input_chars / 4
+    return call_cost(model, {"input_tokens": input_tokens, "output_tokens": output_tokens})
+
+
+def projected_share(remaining_usd=0.0, remaining_tokens=0):
+    """Share of the budget that will be used once the remaining projected calls are made"""
+
+    budget = _current_budget()
+    shares = [0.0]
+
+    if budget["usd_limit"]:
+        shares.append((budget["usd"] + remaining_usd) / budget["usd_limit"])
+    if budget["token_limit"]:
+        shares.append((budget["tokens"] + remaining_tokens) / budget["token_limit"])
+
+    return max(shares)
+
+
+def degradation_level(remaining_usd=0.0, remaining_tokens=0, next_usd=0.0, next_tokens=0):
+    """
+    0 normal, 1 skip low pre-score items, 2 shrink batches, 3 stop.
+
+    Levels 1 and 2 come from the projected cost of all remaining work;
+    stopping only happens when the spend so far plus the next call
+    (next_usd/next_tokens) would reach the budget, so skipping one
+    expensive call (e.g. a search) still leaves room for cheaper ones
+    (curating what was found). Levels 1 and 2 never go back down within a
+    run, so the run does not oscillate between modes as projections change.
+    """
+
+    budget = _current_budget()
+    share = projected_share(remaining_usd, remaining_tokens)
+    level = sum(1 for threshold in DEGRADE_AT[:2] if share >= threshold)
+    next_share = projected_share(next_usd, next_tokens)
+
+    with _lock:
+        if level > budget["level"]:
+            budget["level"] = level
+            increment("budget_degradations_total", level=LEVEL_NAMES[level])
+            print(f"   💸 Budget {share:.0%} used or projected: {LEVEL_NAMES[level]}")
+        level = budget["level"]
+
+        if next_share >= DEGRADE_AT[2]:
+            if not budget["stopped"]:
+                budget["stopped"] = True
+                increment("budget_degradations_total", level=LEVEL_NAMES[3])
+                print(f"   💸 Budget {next_share:.0%} used with the next call: {LEVEL_NAMES[3]}")
+            level = 3
+
+    set_gauge("budget_level", level)
+
+    return level
+
+
+def budget_summary():
+    budget = _current_budget()
+    return {
+        "usd": round(budget["usd"], 4),
+        "tokens": budget["tokens"],
+        "usd_limit": budget["usd_limit"] or None,
+        "token_limit": budget["token_limit"] or None,
+        "level": LEVEL_NAMES[3 if budget["stopped"] else budget["level"]],
+        "calls": {kind: {**calls, "usd": round(calls["usd"], 4)} for kind, calls in budget["calls"].items()}
+    }
+
+
+def print_budget_summary():
+    summary = budget_summary()
+    limit = f" of ${summary['usd_limit']:.2f}" if summary["usd_limit"] else ""
+    print(f"\n💰 Spend: ${summary['usd']:.4f}{limit}, {summary['tokens']:,} tokens ({summary['level']})")
+    for kind, calls in summary["calls"].items():
+        print(f"   {kind}: {calls['count']} calls, ${calls['usd']:.4f}")
@@ -4,6 +4,8 @@ import os
 import time
 from datetime import datetime
 
+from curation_output import CURATION_CATEGORIES, CURATION_TOOL, CURATION_TOOL_CHOICE, extract_curated_items
+
 def discover_content():
     """Search for Old Oak Common content using Claude"""
     
@@ -65,6 +67,8 @@ def curate_results(client, raw_results):
     response = client.messages.create(
         model="claude-sonnet-4-20250514",
         max_tokens=4000,
+        tools=[CURATION_TOOL],
+        tool_choice=CURATION_TOOL_CHOICE,
         messages=[{
             "role": "user",
             "content": f"""Curate content for Old Oak Town news platform.
@@ -73,30 +77,16 @@ Search results summary (first 2 queries only):
 Query 1: {simplified_results[0]['query']}
 Query 2: {simplified_results[1]['query'] if len(simplified_results) > 1 else 'N/A'}
 
-Extract top 5 news items total. Return as JSON:
-{{
-  "categories": {{
-    "development_news": [],
-    "business_spotlights": [],
-    "community_stories": []
-  }},
-  "week_summary": "Brief summary here",
-  "top_stories": []
-}}
-
-Keep response concise."""
+Extract top 5 news items total, each with title, url, source, summary,
+category (ONE of [{', '.join(CURATION_CATEGORIES)}]), relevance and a
+1-10 score. Record them with the record_curated_items tool."""
         }]
     )
 
-    content_text = response.content[0].text
+    # Tool input, or complete items recovered from a malformed text answer
+    items, method = extract_curated_items(response)
 
-    # Extract JSON
-    try:
-        start = content_text.find('{')
-        end = content_text.rfind('}') + 1
-        json_content = content_text[start:end]
-        return json.loads(json_content)
-    except:
+    if not items:
         return {
             "categories": {
                 "development_news": [{"title": "Error parsing results", "summary": "Check logs"}]
@@ -104,6 +94,23 @@ Keep response concise."""
             "week_summary": "Content discovery ran but results need manual review"
         }
 
+    categories = {category: [] for category in CURATION_CATEGORIES}
+    for item in items:
+        categories.get(item.get('category'), categories['community_stories']).append(item)
+
+    for category_items in categories.values():
+        category_items.sort(key=lambda x: x.get('score', 0), reverse=True)
+
+    week_summary = f"This week's content review found {len(items)} stories."
+    if method == "recovered":
+        week_summary = "Content discovery recovered partial results - review before publishing"
+
+    return {
+        "categories": categories,
+        "week_summary": week_summary,
+        "top_stories": [item['title'] for item in sorted(items, key=lambda x: x.get('score', 0), reverse=True)[:3]]
+    }
+
 def save_results(curated_content):
     """Save results as JSON and HTML"""
     
@@ -4,6 +4,8 @@ import os
 import time
 from datetime import datetime
 
+from curation_output import CURATION_TOOL, CURATION_TOOL_CHOICE, extract_curated_items
+
 def discover_content():
     """Search for Old Oak Common content using Claude - IMPROVED VERSION"""
 
@@ -126,6 +128,8 @@ def curate_results_smart(client, all_search_results):
             response = client.messages.create(
                 model="claude-sonnet-4-20250514",
                 max_tokens=4000,
+                tools=[CURATION_TOOL],
+                tool_choice=CURATION_TOOL_CHOICE,
                 messages=[{
                     "role": "user",
                     "content": f"""You are curating content for Old Oak Town, a hyperlocal news platform covering Old Oak Common, Park Royal, and the HS2 development area.
@@ -143,36 +147,15 @@ Extract the TOP 3-5 most newsworthy stories. For EACH story provide:
 - relevance: Why this matters to Old Oak Town readers (1 sentence)
 - score: Quality score 1-10 based on local relevance, timeliness, and impact
 
-Return ONLY valid JSON in this exact format:
-{{
-  "items": [
-    {{
-      "title": "Exact title",
-      "url": "https://...",
-      "source": "Source name",
-      "summary": "Brief summary",
-      "category": "development_news",
-      "relevance": "Why it matters",
-      "score": 8
-    }}
-  ]
-}}"""
+Record the stories with the record_curated_items tool."""
                 }]
             )
 
-            # Parse the response
-            content_text = response.content[0].text
-
-            try:
-                # Extract JSON
-                start = content_text.find('{')
-                end = content_text.rfind('}') + 1
-                if start >= 0 and end > start:
-                    json_content = content_text[start:end]
-                    batch_data = json.loads(json_content)
-                    all_curated_items.extend(batch_data.get('items', []))
-            except json.JSONDecodeError:
-                print(f"   ⚠️  Could not parse JSON from batch {i//batch_size + 1}")
+            # Parse the response (tool input, or complete items recovered from text)
+            items, method = extract_curated_items(response)
+            all_curated_items.extend(items)
+            if method == "none":
+                print(f"   ⚠️  Could not parse items from batch {i//batch_size + 1}")
 
         except Exception as e:
             print(f"   ✗ Error curating batch: {str(e)}")
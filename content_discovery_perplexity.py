@@ -1,10 +1,29 @@
 import anthropic
+import argparse
+import hashlib
 import json
+import math
 import os
 import time
 from datetime import datetime
 import requests
 
+from instrumentation import span, record_usage, start_run, save_run_metrics, print_run_summary, increment, set_gauge
+from metrics_exporter import start_from_env as start_metrics_endpoint, export_from_env as export_metrics
+from search_providers import register_provider, search as search_providers_for, provider_stats
+from curation_output import CURATION_TOOL, CURATION_TOOL_CHOICE, extract_curated_items, stream_curated_items
+from curation_batch import curate_with_batches, LocalBatchClient
+from run_checkpoints import new_run_id, load_checkpoint, save_checkpoint, completed_stages, load_run_state, update_run_state
+from raw_archive import archive_results
+from model_cascade import start_cascade, triage_results, cascade_summary
+from link_validator import validate_links, is_flagged
+from query_stats import schedule_queries, record_query_yields
+from search_citations import extract_candidates, collect_candidates, drop_cited_duplicates, format_sources, is_complete, select_sources
+from budget import (
+    start_budget, charge, average_call, estimate_call, degradation_level,
+    budget_summary, print_budget_summary, restore_spend, BUDGET_PRESCORE_THRESHOLD
+)
+
 # Import additional content sources
 try:
     from rss_monitor import fetch_rss_feeds, categorize_rss_items, format_rss_for_curation
@@ -18,56 +37,113 @@ try:
 except ImportError:
     PLANNING_AVAILABLE = False
 
-def discover_content():
-    """Search for Old Oak Common content using Perplexity + Claude curation"""
+try:
+    from prescoring import filter_items as prescore_filter, prescore_items, PRESCORE_THRESHOLD
+    PRESCORING_AVAILABLE = True
+except ImportError:
+    PRESCORING_AVAILABLE = False
+
+try:
+    from semantic_index import filter_relevant, rank_items as rank_semantically, SEMANTIC_MIN_SCORE
+    SEMANTIC_AVAILABLE = True
+except ImportError:
+    SEMANTIC_AVAILABLE = False
+
+try:
+    from article_fetcher import enrich_search_results
+    ARTICLES_AVAILABLE = True
+except ImportError:
+    ARTICLES_AVAILABLE = False
+
+# Rate limit protection between calls (Perplexity free tier: 20 requests/min)
+SEARCH_WAIT_SECONDS = 20
+PERPLEXITY_WAIT_SECONDS = 15
+CURATION_WAIT_SECONDS = 10
+BATCH_PAUSE_SECONDS = 3
+
+# Targeted queries focusing on specific local sources
+SEARCH_QUERIES = [
+    {
+        "query": "site:ealingtimes.co.uk OR site:getwestlondon.co.uk Old Oak Common Park Royal 2025",
+        "category": "development_news",
+        "focus": "HS2, OPDC, construction updates from local newspapers"
+    },
+    {
+        "query": "site:opdc.london.gov.uk OR site:ealing.gov.uk news updates Old Oak Park Royal",
+        "category": "planning_policy",
+        "focus": "Official OPDC and council announcements, planning applications"
+    },
+    {
+        "query": "\"Old Oak\" OR \"Park Royal\" new business opening shop restaurant cafe 2024 2025 London",
+        "category": "business_spotlights",
+        "focus": "New business openings, local shops, restaurants, cafes"
+    },
+    {
+        "query": "site:parkroyalbusiness.com OR \"Park Royal Business Group\" news events",
+        "category": "business_spotlights",
+        "focus": "Business community news, Park Royal businesses"
+    },
+    {
+        "query": "\"Old Oak Common\" OR \"Old Oak station\" HS2 site:hs2.org.uk OR site:networkrail.co.uk",
+        "category": "development_news",
+        "focus": "Official HS2 and Network Rail updates"
+    },
+    {
+        "query": "Old Oak Common community events residents forum 2025",
+        "category": "community_stories",
+        "focus": "Community events, resident groups, local initiatives"
+    }
+]
+
+
+def discover_content(run_id=None):
+    """
+    Search for Old Oak Common content using Perplexity + Claude curation
+
+    Stage outputs are checkpointed under runs/<run_id>/. Passing the id of an
+    earlier run resumes it, skipping every stage that already has a checkpoint.
+    """
+
+    start_run("content_discovery_perplexity")
+    start_budget()
+    start_cascade()
+
+    run_state = load_run_state(run_id) if run_id else {}
+    if run_id and completed_stages(run_id):
+        print(f"♻️  Resuming run {run_id} ({len(completed_stages(run_id))} checkpoints found)\n")
+    if run_state.get("spend"):
+        # Checkpointed stages are not paid for again, but their cost still counts
+        restore_spend(run_state["spend"])
+        print(f"   💸 ${run_state['spend']['usd']:.2f} already spent by the interrupted run\n")
+    run_id = run_id or new_run_id()
+    print(f"🗂️  Run id: {run_id}")
+    start_metrics_endpoint()
 
     anthropic_client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
     perplexity_api_key = os.environ.get("PERPLEXITY_API_KEY")
 
-    if not perplexity_api_key:
-        print("⚠️  PERPLEXITY_API_KEY not found, using Claude web search")
-        use_perplexity = False
+    # Register search providers. SEARCH_PROVIDERS sets the order to try them in
+    # (e.g. "perplexity,claude") and SEARCH_MODE picks fallback, race or merge.
+    register_provider("claude", lambda query, focus: search_with_claude(anthropic_client, query, focus))
+
+    if perplexity_api_key:
+        register_provider("perplexity", lambda query, focus: search_with_perplexity(perplexity_api_key, query, focus))
     else:
-        # Temporarily disable Perplexity due to model name issues
-        print("⚠️  Perplexity temporarily disabled (model name issues)")
-        print("    Using Claude web search instead")
-        use_perplexity = False
-        # TODO: Re-enable once correct model name is confirmed
-        # use_perplexity = True
-
-    # Targeted queries focusing on specific local sources
-    search_queries = [
-        {
-            "query": "site:ealingtimes.co.uk OR site:getwestlondon.co.uk Old Oak Common Park Royal 2025",
-            "category": "development_news",
-            "focus": "HS2, OPDC, construction updates from local newspapers"
-        },
-        {
-            "query": "site:opdc.london.gov.uk OR site:ealing.gov.uk news updates Old Oak Park Royal",
-            "category": "planning_policy",
-            "focus": "Official OPDC and council announcements, planning applications"
-        },
-        {
-            "query": "\"Old Oak\" OR \"Park Royal\" new business opening shop restaurant cafe 2024 2025 London",
-            "category": "business_spotlights",
-            "focus": "New business openings, local shops, restaurants, cafes"
-        },
-        {
-            "query": "site:parkroyalbusiness.com OR \"Park Royal Business Group\" news events",
-            "category": "business_spotlights",
-            "focus": "Business community news, Park Royal businesses"
-        },
-        {
-            "query": "\"Old Oak Common\" OR \"Old Oak station\" HS2 site:hs2.org.uk OR site:networkrail.co.uk",
-            "category": "development_news",
-            "focus": "Official HS2 and Network Rail updates"
-        },
-        {
-            "query": "Old Oak Common community events residents forum 2025",
-            "category": "community_stories",
-            "focus": "Community events, resident groups, local initiatives"
-        }
-    ]
+        print("⚠️  PERPLEXITY_API_KEY not found, using Claude web search")
+
+    # Perplexity stays opt-in until its model name is confirmed
+    search_order = [p.strip() for p in os.environ.get("SEARCH_PROVIDERS", "claude").split(",") if p.strip()]
+    search_mode = os.environ.get("SEARCH_MODE", "fallback")
+    search_deadline = float(os.environ.get("SEARCH_DEADLINE", "90"))
+    use_perplexity = bool(perplexity_api_key) and search_order[:1] == ["perplexity"]
+
+    print(f"🔌 Search providers: {', '.join(search_order)} (mode: {search_mode})")
+
+    # High-yield queries first; low-yield ones run less often, dead ones are retired
+    search_queries, skipped_queries = schedule_queries(SEARCH_QUERIES)
+    for query, reason in skipped_queries:
+        print(f"   ⏭️  Skipping query ({reason}): {query['query'][:60]}")
+        increment("search_queries_skipped_total", category=query["category"])
 
     all_search_results = []
 
@@ -79,33 +155,56 @@ def discover_content():
         query = search_item["query"]
         print(f"📡 Search {i+1}/{len(search_queries)}: {query[:60]}...")
 
+        # Keyed by the query text, so a re-ordered schedule restores the right results
+        search_stage = f"search_{hashlib.sha256(query.encode('utf-8')).hexdigest()[:10]}"
+        checkpoint = load_checkpoint(run_id, search_stage)
+        if checkpoint is not None:
+            all_search_results.append(checkpoint)
+            print(f"   ♻️  Loaded from checkpoint\n")
+            continue
+
+        # Project the remaining searches plus curating their results; stop only
+        # when this search and curating what is already found would not fit
+        remaining = len(search_queries) - i
+        search_usd, search_tokens = average_call("search") or estimate_call(SEARCH_MODEL, 40000, 1500)
+        curation_usd, curation_tokens = projected_curation_cost(all_search_results, remaining)
+        next_usd, next_tokens = projected_curation_cost(all_search_results, 1)
+        if degradation_level(search_usd * remaining + curation_usd, search_tokens * remaining + curation_tokens,
+                             search_usd + next_usd, search_tokens + next_tokens) >= 3:
+            print(f"   ⏹️  Budget reached, skipping the remaining {remaining} searches\n")
+            break
+
         try:
-            if use_perplexity:
-                try:
-                    search_results = search_with_perplexity(perplexity_api_key, query, search_item["focus"])
-                    search_source = "Perplexity"
-                except Exception as perplexity_error:
-                    # Fallback to Claude if Perplexity fails
-                    print(f"   ⚠️  Perplexity failed: {str(perplexity_error)[:100]}")
-                    print(f"   🔄 Falling back to Claude web search...")
-                    search_results = search_with_claude(anthropic_client, query, search_item["focus"])
-                    search_source = "Claude (fallback)"
-            else:
-                search_results = search_with_claude(anthropic_client, query, search_item["focus"])
-                search_source = "Claude"
+            started = time.perf_counter()
+            with span("search", stage="search", query=query, category=search_item["category"]) as search_span:
+                search_results, search_source = search_providers_for(
+                    query,
+                    search_item["focus"],
+                    providers=search_order,
+                    mode=search_mode,
+                    deadline=search_deadline
+                )
+                search_span["attributes"]["provider"] = search_source
 
             all_search_results.append({
                 "query": query,
                 "category": search_item["category"],
                 "focus": search_item["focus"],
                 "results": search_results,
-                "result_count": len(search_results) if isinstance(search_results, list) else 1
+                "result_count": len(search_results) if isinstance(search_results, list) else 1,
+                "latency_s": round(time.perf_counter() - started, 2)
             })
 
+            save_checkpoint(run_id, search_stage, all_search_results[-1])
+
+            citations = search_results.get('citations', []) if isinstance(search_results, dict) else []
+            set_gauge("search_citations", len(citations), query=query)
+
             print(f"   ✓ Found content (using {search_source})")
 
         except Exception as e:
             print(f"   ✗ Error: {str(e)}")
+            increment("search_failures_total", query=query)
             all_search_results.append({
                 "query": query,
                 "category": search_item["category"],
@@ -115,19 +214,48 @@ def discover_content():
                 "error": str(e)
             })
 
-        # Rate limit protection - Perplexity free tier: 20 requests/min
+        # Rate limit protection between searches
         if i < len(search_queries) - 1:
-            wait_time = 15 if use_perplexity else 20
+            wait_time = PERPLEXITY_WAIT_SECONDS if use_perplexity else SEARCH_WAIT_SECONDS
             print(f"   ⏳ Waiting {wait_time}s (rate limit protection)...\n")
-            time.sleep(wait_time)
+            with span("rate_limit_wait", stage="wait", seconds=wait_time):
+                time.sleep(wait_time)
 
     print(f"✅ Search complete!\n")
+    search_results = list(all_search_results)
+
+    # Score search results against the local relevance index (ranking only)
+    if SEMANTIC_AVAILABLE:
+        with span("semantic_rank", stage="semantic", source="search", items=len(all_search_results)):
+            rank_semantically([r for r in all_search_results if isinstance(r['results'], dict)])
+
+    # Sources the searches cited, deduplicated across queries and scored locally
+    candidates = collect_candidates(all_search_results)
+    if candidates:
+        set_gauge("search_candidates", len(candidates))
+        print(f"🔗 {len(candidates)} sources from search citations "
+              f"({sum(1 for c in candidates if c['cited'])} cited, {sum(1 for c in candidates if is_complete(c))} with title, URL and date)")
+        candidates = drop_low_prescore_candidates(all_search_results, candidates)
+
+    for name, stats in provider_stats().items():
+        if stats["calls"]:
+            print(f"   🔌 {name}: {stats['successes']}/{stats['calls']} ok, p50 {stats['latency_p50_s']}s, p95 {stats['latency_p95_s']}s")
+    print()
 
     # Fetch RSS feeds if available
     if RSS_AVAILABLE:
         try:
             print("📡 Fetching RSS feeds from local sources...")
-            rss_items = fetch_rss_feeds()
+            rss_items = load_checkpoint(run_id, "rss")
+            if rss_items is None:
+                with span("rss", stage="rss"):
+                    rss_items = fetch_rss_feeds()
+                save_checkpoint(run_id, "rss", rss_items)
+            else:
+                print(f"   ♻️  Loaded {len(rss_items)} RSS items from checkpoint")
+            rss_items = drop_cited_duplicate_items(rss_items, "RSS", candidates)
+            rss_items = drop_low_prescore_items(rss_items, "RSS", all_search_results)
+            rss_items = drop_semantically_irrelevant_items(rss_items, "RSS")
             if rss_items:
                 rss_formatted = format_rss_for_curation(rss_items)
                 all_search_results.extend(rss_formatted)
@@ -141,7 +269,16 @@ def discover_content():
     if PLANNING_AVAILABLE:
         try:
             print("📋 Checking planning applications...")
-            planning_items = check_business_planning_applications()
+            planning_items = load_checkpoint(run_id, "planning")
+            if planning_items is None:
+                with span("planning", stage="planning"):
+                    planning_items = check_business_planning_applications()
+                save_checkpoint(run_id, "planning", planning_items)
+            else:
+                print(f"   ♻️  Loaded {len(planning_items)} planning items from checkpoint")
+            planning_items = drop_cited_duplicate_items(planning_items, "planning", candidates)
+            planning_items = drop_low_prescore_items(planning_items, "planning", all_search_results)
+            planning_items = drop_semantically_irrelevant_items(planning_items, "planning")
             if planning_items:
                 planning_formatted = format_planning_for_curation(planning_items)
                 all_search_results.extend(planning_formatted)
@@ -151,13 +288,92 @@ def discover_content():
         except Exception as e:
             print(f"   ✗ Planning fetch error: {str(e)[:50]}\n")
 
+    # Cascade: a small model triages the inputs, only promising ones reach full curation.
+    # Dropped inputs are still archived with the rest.
+    curation_inputs = all_search_results
+    if os.environ.get("CURATION_CASCADE") == "1":
+        try:
+            print("🪜 Triaging curation inputs...")
+            with span("cascade", stage="cascade", inputs=len(all_search_results)):
+                curation_inputs = triage_results(anthropic_client, all_search_results, run_id)
+            print()
+        except Exception as e:
+            print(f"   ✗ Triage error, curating everything: {str(e)[:50]}\n")
+
+    # Optionally fetch the linked articles so curation sees more than a summary
+    if ARTICLES_AVAILABLE and os.environ.get("ENRICH_ARTICLES") == "1":
+        try:
+            print("📰 Fetching linked articles...")
+            with span("enrichment", stage="enrichment"):
+                enrich_search_results(curation_inputs)
+            print()
+        except Exception as e:
+            print(f"   ✗ Article enrichment error: {str(e)[:50]}\n")
+
     # Wait a bit to avoid rate limits
-    print("⏳ Waiting 10s before curation (rate limit protection)...")
-    time.sleep(10)
+    print(f"⏳ Waiting {CURATION_WAIT_SECONDS}s before curation (rate limit protection)...")
+    with span("rate_limit_wait", stage="wait", seconds=CURATION_WAIT_SECONDS):
+        time.sleep(CURATION_WAIT_SECONDS)
+
+    # Curate with Claude (CURATION_MODE=batch uses the cheaper asynchronous batches endpoint)
+    curated = None
+
+    if os.environ.get("CURATION_MODE") == "batch" and degradation_level(*projected_curation_cost(curation_inputs)) >= 2:
+        print("💸 Near the run budget, curating interactively so batches can shrink or stop")
+    elif os.environ.get("CURATION_MODE") == "batch":
+        print("🎯 Curating content with the Claude Message Batches API...")
+        # CURATION_BATCH_LOCAL=1 runs the batch flow against a local stand-in endpoint
+        batch_client = LocalBatchClient(anthropic_client) if os.environ.get("CURATION_BATCH_LOCAL") == "1" else anthropic_client
+        try:
+            with span("curation", stage="curation", inputs=len(curation_inputs), mode="batch"):
+                batch_stage = f"curation_batch_{hashlib.sha256(json.dumps(curation_inputs, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:10]}"
+                # Only the batch's own results are checkpointed; failed inputs are
+                # re-curated interactively (with per-call checkpoints) on every resume
+                checkpoint = load_checkpoint(run_id, batch_stage)
+                if checkpoint is None:
+                    curated_items, failed = curate_with_batches(batch_client, curation_inputs, build_curation_request, CURATION_BATCH_SIZE)
+                    save_checkpoint(run_id, batch_stage, {"items": curated_items, "failed": failed})
+                else:
+                    curated_items, failed = checkpoint["items"], checkpoint["failed"]
+                    print(f"   ♻️  Loaded {len(curated_items)} batch-curated stories from checkpoint")
+                if failed:
+                    print(f"   🔄 Re-curating {len(failed)} results from failed batch requests interactively...")
+                    curated_items = curated_items + curate_items(anthropic_client, failed, run_id)
+                uncurated = {result['query'] for result in failed if not result.get('curated')}
+                _mark_curated([result for result in curation_inputs if result['query'] not in uncurated])
+                curated = organize_curated_items(curated_items)
+        except Exception as e:
+            print(f"   ✗ Batch curation failed: {str(e)[:100]}")
+            print(f"   🔄 Falling back to interactive curation...")
+
+    if curated is None:
+        print("🎯 Curating content with Claude AI...")
+        with span("curation", stage="curation", inputs=len(curation_inputs)):
+            curated = curate_with_claude(anthropic_client, curation_inputs, run_id)
+
+    # Per-query yield history for the adaptive scheduler (once per run, even if resumed)
+    if run_state.get("yields_recorded"):
+        print("♻️  Query yields already recorded for this run")
+    else:
+        try:
+            record_query_yields(search_results, [item for items in curated['categories'].values() for item in items],
+                                {result['query'] for result in curation_inputs if result.get('curated')})
+            update_run_state(run_id, yields_recorded=True)
+        except Exception as e:
+            print(f"⚠️  Query stats not updated: {str(e)[:100]}")
 
-    # Curate with Claude
-    print("🎯 Curating content with Claude AI...")
-    curated = curate_with_claude(anthropic_client, all_search_results)
+    # Resolve redirects and flag dead or made-up links before the review is published
+    if os.environ.get("VALIDATE_LINKS", "1") == "1":
+        try:
+            print("\n🔗 Checking curated links...")
+            items = [item for items in curated['categories'].values() for item in items]
+            with span("links", stage="links", items=len(items)):
+                curated['link_check'] = validate_links(items)
+            for item in items:
+                if is_flagged(item):
+                    print(f"   ⚠️  {item['link_status']}: {item.get('title', '')[:50]} ({item.get('url', '')[:60]})")
+        except Exception as e:
+            print(f"   ✗ Link check error: {str(e)[:50]}")
 
     # Save results
     save_results(curated, all_search_results)
@@ -165,6 +381,84 @@ def discover_content():
     return curated
 
 
+def drop_low_prescore_items(items, label, pending_results=None):
+    """
+    Drop items below the local pre-score threshold before they reach LLM curation
+
+    pending_results (the results already queued for curation) lets the
+    budget governor raise the threshold when curating everything would
+    approach the run budget.
+    """
+
+    if not PRESCORING_AVAILABLE or not items:
+        return items
+
+    # Near the budget, only items with a high pre-score are worth a curation call
+    threshold = PRESCORE_THRESHOLD
+    if pending_results is not None and degradation_level(*projected_curation_cost(pending_results, len(items))) >= 1:
+        threshold = max(threshold, BUDGET_PRESCORE_THRESHOLD)
+
+    with span("prescore", stage="prescore", source=label, items=len(items)):
+        kept, dropped = prescore_filter(items, threshold)
+
+    if dropped:
+        increment("prescore_dropped_total", len(dropped), source=label)
+        print(f"   🔻 Pre-score dropped {len(dropped)}/{len(items)} {label} items below {threshold:g}")
+
+    return kept
+
+
+def drop_low_prescore_candidates(all_search_results, candidates):
+    """
+    Pre-score search sources locally and keep those below PRESCORE_THRESHOLD
+    out of the curation prompt; complete ones are listed first (see select_sources)
+    """
+
+    if not PRESCORING_AVAILABLE:
+        return candidates
+
+    with span("prescore", stage="prescore", source="search", items=len(candidates)):
+        prescore_items(candidates)
+        kept, dropped = select_sources(all_search_results, candidates, PRESCORE_THRESHOLD)
+
+    if dropped:
+        increment("prescore_dropped_total", len(dropped), source="search")
+        print(f"   🔻 Pre-score dropped {len(dropped)}/{len(candidates)} search sources below {PRESCORE_THRESHOLD:g}")
+
+    return kept
+
+
+def drop_cited_duplicate_items(items, label, candidates):
+    """Drop feed items whose URL a search answer already cites, so the story is curated once"""
+
+    if not candidates or not items:
+        return items
+
+    kept, duplicates = drop_cited_duplicates(items, candidates)
+
+    if duplicates:
+        increment("cited_duplicates_dropped_total", len(duplicates), source=label)
+        print(f"   🔗 Dropped {len(duplicates)}/{len(items)} {label} items already cited by a search answer")
+
+    return kept
+
+
+def drop_semantically_irrelevant_items(items, label):
+    """Rank items by semantic similarity to past local stories and drop those below SEMANTIC_MIN_SCORE"""
+
+    if not SEMANTIC_AVAILABLE or not items:
+        return items
+
+    with span("semantic_rank", stage="semantic", source=label, items=len(items)):
+        kept, dropped = filter_relevant(items)
+
+    if dropped:
+        increment("semantic_dropped_total", len(dropped), source=label)
+        print(f"   🧭 Semantic index dropped {len(dropped)}/{len(items)} {label} items below {SEMANTIC_MIN_SCORE:g}")
+
+    return kept
+
+
 def search_with_perplexity(api_key, query, focus):
     """Search using Perplexity API - returns structured results"""
 
@@ -206,9 +500,13 @@ Format as a clear list. Prioritize local London news sources and official announ
     }
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=60)
-        response.raise_for_status()
-        data = response.json()
+        with span("perplexity.chat", provider="perplexity") as call_span:
+            response = requests.post(url, json=payload, headers=headers, timeout=60)
+            call_span["bytes"] = len(response.content)
+            response.raise_for_status()
+            data = response.json()
+            record_usage(call_span, data.get('usage'))
+            charge("search", payload["model"], data.get('usage'), record=call_span)
 
         # Extract the response and citations
         content = data['choices'][0]['message']['content']
@@ -233,13 +531,14 @@ Format as a clear list. Prioritize local London news sources and official announ
 def search_with_claude(client, query, focus):
     """Fallback: Search using Claude's web search tool"""
 
-    response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=4000,
-        tools=[{"type": "web_search_20250305", "name": "web_search"}],
-        messages=[{
-            "role": "user",
-            "content": f"""Search for: {query}
+    with span("claude.web_search", provider="claude") as call_span:
+        response = client.messages.create(
+            model=SEARCH_MODEL,
+            max_tokens=4000,
+            tools=[{"type": "web_search_20250305", "name": "web_search"}],
+            messages=[{
+                "role": "user",
+                "content": f"""Search for: {query}
 
 Focus on: {focus}
 
@@ -250,8 +549,10 @@ Find recent news articles and provide:
 - Date
 - Brief summary
 - Local relevance"""
-        }]
-    )
+            }]
+        )
+        record_usage(call_span, response.usage)
+        charge("search", SEARCH_MODEL, response.usage, record=call_span)
 
     # Extract text content
     content = ""
@@ -259,29 +560,153 @@ Find recent news articles and provide:
         if block.type == "text":
             content += block.text
 
+    # Normalized records of every page the web search returned or the answer cited
+    candidates = extract_candidates(response.content)
+
     return {
         "content": content,
-        "citations": [],
+        "citations": [candidate["url"] for candidate in candidates],
+        "candidates": candidates,
         "source": "claude"
     }
 
 
-def curate_with_claude(client, all_search_results):
-    """Use Claude to analyze and curate findings into structured content"""
+SEARCH_MODEL = "claude-sonnet-4-20250514"
+CURATION_MODEL = "claude-sonnet-4-20250514"
+# Search results per curation call, and the smaller size used near the budget
+CURATION_BATCH_SIZE = 2
+REDUCED_BATCH_SIZE = 1
+REDUCED_MAX_TOKENS = 2000
+
+
+def projected_curation_cost(results, extra_results=0):
+    """Projected (usd, tokens) of curating results plus extra_results more single-item results"""
+
+    batches = math.ceil((len(results) + extra_results) / CURATION_BATCH_SIZE)
+    if not batches:
+        return 0.0, 0
+
+    average = average_call("curation")
+    if average:
+        return average[0] * batches, average[1] * batches
+
+    chars = sum(len(json.dumps(r.get('results'), default=str)) for r in results) + extra_results * 600
+    return estimate_call(CURATION_MODEL, chars + batches * len(CURATION_INSTRUCTIONS), output_tokens=1500 * batches)
+
+
+# Fixed few-shot set of past curated stories (review of 2025-12-29), one per
+# score band. Part of the cached system prompt, so it must not change per run.
+CURATION_EXAMPLES = [
+    {
+        "title": "First platforms for Britain's new high speed railway installed at Old Oak Common",
+        "url": "https://mediacentre.hs2.org.uk/news/first-platforms-for-britains-new-high-speed-railway-installed-at-old-oak-common-station",
+        "source": "HS2 Media Centre",
+        "date": "2025-05-29",
+        "summary": "HS2 engineers have begun installing the first platform slabs in the underground station box at Old Oak Common, marking the first tangible passenger infrastructure anywhere on the HS2 network. Six platforms are being built at the super-hub station to serve HS2's fleet of 400-metre trains.",
+        "category": "development_news",
+        "relevance": "This milestone represents a major step toward the station becoming operational, directly impacting future transport connectivity for Old Oak Common residents.",
+        "score": 9
+    },
+    {
+        "title": "OPDC Makes Compulsory Purchase Order for Old Oak Land Assembly",
+        "url": "https://www.london.gov.uk/who-we-are/city-halls-partners/old-oak-and-park-royal-development-corporation-opdc/old-oak-compulsory-purchase-order",
+        "source": "London City Hall",
+        "date": "2025-09-12",
+        "summary": "OPDC issued a Compulsory Purchase Order to acquire approximately 31 hectares of land needed for Old Oak regeneration, with most land owned by public sector stakeholders. This legal step is essential for delivering OPDC's comprehensive regeneration plans.",
+        "category": "planning_policy",
+        "relevance": "This affects local landowners and represents a critical step toward realizing the massive regeneration of Old Oak Common.",
+        "score": 8
+    },
+    {
+        "title": "OPDC partners with Hemiko for innovative waste heat network serving 9,000+ homes",
+        "url": "https://hemiko.com/news/opdc-announces-hemiko-as-development-and-funding-partner-for-innovative-new-heat-network/",
+        "source": "Hemiko",
+        "date": "2025-03-31",
+        "summary": "OPDC announced Hemiko as development partner for the Old Oak and Park Royal Energy Network (OPEN), which will capture waste heat from local data centres to provide low-cost, low-carbon energy. This UK-first project will initially serve over 9,000 new homes and businesses, expanding to 25,000+ homes.",
+        "category": "development_news",
+        "relevance": "This innovative energy solution will provide affordable heating to thousands of Old Oak Common residents while advancing London's environmental goals.",
+        "score": 7
+    },
+    {
+        "title": "OPDC Changes Planning Delegation Rules with Ealing Council",
+        "url": "https://www.london.gov.uk/who-we-are/city-halls-partners/old-oak-and-park-royal-development-corporation-opdc/planning/planning-applications",
+        "source": "London City Hall",
+        "date": "2024-05-20",
+        "summary": "From April 1st 2024, OPDC changed which planning applications are delegated to Ealing Council. Only applications to discharge or vary conditions on existing Ealing-issued permissions will now be delegated.",
+        "category": "planning_policy",
+        "relevance": "This policy change affects how planning applications are processed for residents in the Ealing part of Old Oak Common.",
+        "score": 6
+    },
+    {
+        "title": "Old Oak West Masterplan Community Exhibition Scheduled for May 2025",
+        "url": "https://grandunionalliance.wixsite.com/grandunionalliance/updates",
+        "source": "Grand Union Alliance",
+        "date": "Recent",
+        "summary": "OPDC will hold an online exhibition on May 20th 2025 to display their vision for Old Oak West, showing how community feedback has shaped proposals. The session will explain next steps for delivering the Old Oak regeneration.",
+        "category": "community_stories",
+        "relevance": "This consultation gives residents a direct opportunity to see and influence major planning decisions for their area.",
+        "score": 5
+    }
+]
 
-    # Process in batches to manage token limits
-    batch_size = 2
-    all_curated_items = []
+# Stable curation instructions sent as a cached system prompt ahead of every
+# batch. Together with the tool definition this prefix has to stay above the
+# model's 1024-token minimum, or cache_control is silently ignored.
+CURATION_INSTRUCTIONS = """You are curating content for Old Oak Town, a hyperlocal news platform covering Old Oak Common, Park Royal, and the HS2 development area in West London.
 
-    for i in range(0, len(all_search_results), batch_size):
-        batch = all_search_results[i:i+batch_size]
+You will be given search results. For each distinct news story found, extract:
+- title: Clear, engaging headline
+- url: Source URL (use actual URL from citations/results)
+- source: Publication name (e.g., "Ealing Times", "Construction News", "OPDC Official")
+- date: Publication date if mentioned (format: YYYY-MM-DD or "Recent")
+- summary: 2-3 sentences describing what happened
+- category: ONE of: development_news, business_spotlights, community_stories, planning_policy
+- relevance: One sentence explaining why this matters to Old Oak Town readers
+- score: Quality/importance score 1-10 based on:
+  * Local impact (high = directly affects residents)
+  * Timeliness (high = very recent)
+  * Credibility (high = official sources, known publications)
+  * Uniqueness (high = exclusive or first reporting)
+
+Record every story with the record_curated_items tool.
+
+Only include stories that are genuinely newsworthy and relevant to Old Oak Common/Park Royal area. Minimum score of 5 to include.
+
+COVERAGE AREA
+The Old Oak and Park Royal Development Corporation (OPDC) area: Old Oak Common, Park Royal, North Acton, Willesden Junction, Old Oak Lane, Scrubs Lane, Wormwood Scrubs and the edges of Harlesden, East Acton and College Park. It spans parts of three boroughs: Ealing, Hammersmith & Fulham and Brent. Stories about HS2, the Elizabeth line or the Great Western Main Line only qualify when they concern the Old Oak Common station, its construction sites or its effect on the area. Borough-wide stories qualify only when they name a place inside the area or clearly affect its residents.
+
+CATEGORIES
+- development_news: construction progress, station works, new buildings and masterplans, infrastructure (roads, bridges, energy, utilities), land deals, developer and contractor appointments, funding decisions for physical schemes, and OPDC leadership changes that affect delivery.
+- business_spotlights: businesses opening, closing, moving or expanding in the area; Park Royal industrial estate news; jobs and apprenticeships with named local employers; markets, cafes, pubs and shops; business support schemes aimed at local firms.
+- community_stories: residents, schools, charities, events, consultations and exhibitions, local campaigns, health and safety incidents, crime that affects the area, parks and green space, transport disruption felt by residents, and human-interest features.
+- planning_policy: planning applications and decisions, planning committee meetings, Local Plan and supplementary planning documents, compulsory purchase orders, conditions and delegation rules, government or Mayoral policy that changes what can be built in the area.
+When a story fits two categories, choose the one a resident would look under first: a planning decision on a new tower is planning_policy; the same tower topping out is development_news.
+
+SCORING ANCHORS
+- 9-10: a first or a milestone for the area (a station opening stage, a major approval or refusal, a big employer arriving or leaving) from an official or well-known source, published in the last two weeks.
+- 7-8: concrete, dated local news with a direct effect on residents or businesses, from a credible source.
+- 5-6: useful local context: announcements of upcoming events, consultations, appointments, policy updates, or strong stories that are a few weeks old.
+- Below 5, leave out: national stories that only mention the area in passing, opinion pieces without new facts, directory or listing pages, job adverts, undated evergreen pages, and anything older than three months unless it is newly reported.
 
-        print(f"   Curating batch {i//batch_size + 1}/{(len(all_search_results) + batch_size - 1)//batch_size}...")
+RULES
+- One item per story. When several results cover the same story, keep the most authoritative source and its URL.
+- Use only URLs that appear in the search results, citations or source lists. Never invent or guess a URL; if no URL is given, leave the story out.
+- Write summaries in plain British English from the facts in the results. Do not add figures, names or dates that the results do not contain.
+- Titles are factual headlines, not clickbait. Do not copy a press release headline word for word when it is vague.
+- Keep relevance to one sentence about what changes for people who live or work in the area.
 
-        # Build context from search results
-        search_context = []
-        for result in batch:
-            context = f"""
+EXAMPLES
+Past stories curated for Old Oak Town, one per score band, in the shape the tool expects:
+""" + "\n".join(json.dumps(example, ensure_ascii=False) for example in CURATION_EXAMPLES)
+
+
+def build_curation_request(batch):
+    """Build the messages API arguments for one curation batch"""
+
+    # Build context from search results
+    search_context = []
+    for result in batch:
+        context = f"""
 QUERY: {result['query']}
 CATEGORY: {result['category']}
 FOCUS: {result['focus']}
@@ -290,83 +715,164 @@ FINDINGS:
 {result['results'].get('content', 'No results') if isinstance(result['results'], dict) else str(result['results'])}
 
 CITATIONS: {len(result['results'].get('citations', [])) if isinstance(result['results'], dict) else 0} sources
----
 """
-            search_context.append(context)
+        # Pre-scored sources when available, else everything the search returned (backfills)
+        candidates = result.get('sources', result['results'].get('candidates', []) if isinstance(result['results'], dict) else [])
+        if candidates:
+            context += f"""
+SOURCES (exact titles and URLs):
+{format_sources(candidates)}
+"""
+        articles = result['results'].get('articles', []) if isinstance(result['results'], dict) else []
+        for article in articles:
+            context += f"""
+ARTICLE: {article['title']} ({article['url']})
+{article['body']}
+"""
+        context += "---\n"
+        search_context.append(context)
 
-        try:
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4000,
-                messages=[{
-                    "role": "user",
-                    "content": f"""You are curating content for Old Oak Town, a hyperlocal news platform covering Old Oak Common, Park Royal, and the HS2 development area in West London.
+    # Tools and system instructions form a stable prefix that is cached across
+    # batches; only the search results in the user message change
+    return {
+        "model": CURATION_MODEL,
+        "max_tokens": 4000,
+        "tools": [CURATION_TOOL],
+        "tool_choice": CURATION_TOOL_CHOICE,
+        "system": [{
+            "type": "text",
+            "text": CURATION_INSTRUCTIONS,
+            "cache_control": {"type": "ephemeral"}
+        }],
+        "messages": [{
+            "role": "user",
+            "content": f"""Review these search results and extract newsworthy stories:
 
-Review these search results and extract newsworthy stories:
+{"".join(search_context)}"""
+        }]
+    }
 
-{"".join(search_context)}
 
-For each distinct news story found, extract:
-- title: Clear, engaging headline
-- url: Source URL (use actual URL from citations/results)
-- source: Publication name (e.g., "Ealing Times", "Construction News", "OPDC Official")
-- date: Publication date if mentioned (format: YYYY-MM-DD or "Recent")
-- summary: 2-3 sentences describing what happened
-- category: ONE of: development_news, business_spotlights, community_stories, planning_policy
-- relevance: One sentence explaining why this matters to Old Oak Town readers
-- score: Quality/importance score 1-10 based on:
-  * Local impact (high = directly affects residents)
-  * Timeliness (high = very recent)
-  * Credibility (high = official sources, known publications)
-  * Uniqueness (high = exclusive or first reporting)
+def curate_with_claude(client, all_search_results, run_id=None):
+    """Use Claude to analyze and curate findings into structured content"""
 
-Return ONLY valid JSON (no markdown, no extra text):
-{{
-  "items": [
-    {{
-      "title": "string",
-      "url": "string",
-      "source": "string",
-      "date": "string",
-      "summary": "string",
-      "category": "string",
-      "relevance": "string",
-      "score": number
-    }}
-  ]
-}}
-
-Only include stories that are genuinely newsworthy and relevant to Old Oak Common/Park Royal area. Minimum score of 5 to include."""
-                }]
-            )
-
-            content_text = response.content[0].text
-
-            # Parse JSON from response
-            try:
-                # Clean up any markdown code blocks
-                content_text = content_text.replace('```json', '').replace('```', '')
-                start = content_text.find('{')
-                end = content_text.rfind('}') + 1
-
-                if start >= 0 and end > start:
-                    json_content = content_text[start:end]
-                    batch_data = json.loads(json_content)
-                    items = batch_data.get('items', [])
-                    all_curated_items.extend(items)
-                    print(f"      ✓ Extracted {len(items)} stories")
+    return organize_curated_items(curate_items(client, all_search_results, run_id))
+
+
+def curate_items(client, all_search_results, run_id=None):
+    """Curate search results interactively, batch by batch; returns the curated items"""
+
+    # Process in batches to manage token limits
+    batch_size = CURATION_BATCH_SIZE
+    all_curated_items = []
+
+    # Streaming mode extracts each item as soon as its JSON object closes,
+    # and can stop early once enough high-scoring items have arrived
+    streaming = os.environ.get("CURATION_STREAMING") == "1"
+    stop_after = int(os.environ.get("CURATION_STOP_AFTER", "0"))
+    stop_score = float(os.environ.get("CURATION_STOP_SCORE", "8"))
+
+    def _enough_items():
+        return stop_after > 0 and sum(1 for item in all_curated_items if item.get('score', 0) >= stop_score) >= stop_after
+
+    def _on_item(item):
+        all_curated_items.append(item)
+        print(f"      → [{item.get('score', 0)}/10] {item.get('title', '')[:70]}")
+
+    i = 0
+    batch_number = 0
+    live_calls = 0
+
+    while i < len(all_search_results):
+        # Budget governor: shrink batches near the budget, stop at it
+        next_usd, next_tokens = projected_curation_cost(all_search_results[i:i + batch_size])
+        level = degradation_level(*projected_curation_cost(all_search_results[i:]), next_usd, next_tokens)
+        if level >= 3:
+            print(f"   ⏹️  Budget reached, {len(all_search_results) - i} results left uncurated")
+            increment("budget_uncurated_results_total", len(all_search_results) - i)
+            break
+        if level == 2:
+            batch_size = REDUCED_BATCH_SIZE
+
+        batch = all_search_results[i:i+batch_size]
+        batch_number += 1
+
+        print(f"   Curating batch {batch_number} (results {i + 1}-{i + len(batch)} of {len(all_search_results)})...")
+
+        request = build_curation_request(batch)
+        if level == 2:
+            request["max_tokens"] = REDUCED_MAX_TOKENS
+
+        i += len(batch)
+
+        # Keyed by the batch's inputs, so a batch whose search results changed
+        # on resume (e.g. a failed search that now succeeded) is curated again
+        stage = f"curation_{batch_number:03d}_{hashlib.sha256(json.dumps(request['messages'], sort_keys=True).encode('utf-8')).hexdigest()[:10]}"
+        checkpoint = load_checkpoint(run_id, stage)
+        if checkpoint is not None:
+            all_curated_items.extend(checkpoint)
+            _mark_curated(batch)
+            print(f"      ♻️  Loaded {len(checkpoint)} stories from checkpoint")
+            continue
+
+        try:
+            with span("claude.curation", batch=batch_number, inputs=len(batch), streaming=streaming) as call_span:
+                if streaming:
+                    items, method, usage, first_item_s = stream_curated_items(client, request, on_item=_on_item, should_stop=_enough_items)
+                    call_span["attributes"]["time_to_first_item_s"] = first_item_s
                 else:
-                    print(f"      ⚠️  No valid JSON found in response")
+                    response = client.messages.create(**request)
+                    usage = response.usage
+                    # Tool input first, then tolerant recovery of complete items from any text
+                    items, method = extract_curated_items(response)
+                    all_curated_items.extend(items)
+                record_usage(call_span, usage)
+                charge("curation", CURATION_MODEL, usage, record=call_span)
+
+            # Every call after the first should read the system prefix from the cache
+            live_calls += 1
+            if live_calls > 1 and not call_span["cache_read_tokens"]:
+                increment("prompt_cache_misses_total")
+                print(f"      ⚠️  Prompt cache not read ({call_span['cache_write_tokens']} tokens written)")
+
+            if method == "none":
+                increment("curation_json_parse_failures_total", reason="no_items")
+                print(f"      ⚠️  No curated items found in response")
+            elif method == "recovered":
+                increment("curation_json_parse_failures_total", reason="recovered")
+                print(f"      ✓ Recovered {len(items)} stories from malformed output")
+            else:
+                print(f"      ✓ Extracted {len(items)} stories")
+
+            save_checkpoint(run_id, stage, items)
 
-            except json.JSONDecodeError as e:
-                print(f"      ✗ JSON parse error: {str(e)}")
+            # A stream abandoned early may not have covered every result in the batch
+            if not (streaming and _enough_items()):
+                _mark_curated(batch)
 
         except Exception as e:
             print(f"      ✗ Curation error: {str(e)}")
 
+        if _enough_items():
+            print(f"   ⏹️  {stop_after} stories scoring {stop_score:g}+ found, stopping curation early")
+            break
+
         # Brief pause between batches
-        if i + batch_size < len(all_search_results):
-            time.sleep(3)
+        if i < len(all_search_results):
+            time.sleep(BATCH_PAUSE_SECONDS)
+
+    return all_curated_items
+
+
+def _mark_curated(results):
+    """Mark results whose curation call completed, so only their queries' yields are recorded"""
+
+    for result in results:
+        result['curated'] = True
+
+
+def organize_curated_items(all_curated_items):
+    """Group curated items by category, rank them and build the week summary"""
 
     # Organize by category
     categories = {
@@ -384,6 +890,7 @@ Only include stories that are genuinely newsworthy and relevant to Old Oak Commo
     # Sort each category by score (highest first)
     for category in categories:
         categories[category].sort(key=lambda x: x.get('score', 0), reverse=True)
+        set_gauge("curated_items", len(categories[category]), category=category)
 
     # Generate summary
     total_items = len(all_curated_items)
@@ -422,6 +929,13 @@ def save_results(curated_content, raw_search_results):
     date_only = datetime.now().strftime("%Y-%m-%d")
     os.makedirs("reviews", exist_ok=True)
 
+    # Archive the raw results so this run can be re-curated later (backfill.py)
+    try:
+        raw_archive = archive_results(raw_search_results, timestamp)
+    except Exception as e:
+        print(f"⚠️  Raw results not archived: {str(e)[:100]}")
+        raw_archive = None
+
     # Save comprehensive JSON
     json_filename = f"reviews/review_{timestamp}.json"
 
@@ -436,9 +950,15 @@ def save_results(curated_content, raw_search_results):
                     "query": r['query'],
                     "category": r.get('category', 'unknown'),
                     "source": r['results'].get('source', 'unknown') if isinstance(r['results'], dict) else 'unknown',
-                    "citations_count": len(r['results'].get('citations', [])) if isinstance(r['results'], dict) else 0
+                    "citations_count": len(r['results'].get('citations', [])) if isinstance(r['results'], dict) else 0,
+                    "complete_candidates": sum(1 for c in r['results'].get('candidates', []) if is_complete(c)) if isinstance(r['results'], dict) else 0,
+                    "semantic_score": r.get('semantic_score'),
+                    "triage_score": r.get('triage_score')
                 } for r in raw_search_results
             ],
+            "raw_archive": raw_archive,
+            "spend": budget_summary(),
+            "cascade": cascade_summary() if os.environ.get("CURATION_CASCADE") == "1" else None,
             "statistics": curated_content.get('stats', {})
         }, f, indent=2)
 
@@ -447,6 +967,12 @@ def save_results(curated_content, raw_search_results):
     # Create HTML review (with timestamp in filename)
     create_html_review(curated_content, timestamp)
 
+    # Per-stage timing and token metrics alongside the review
+    print_run_summary()
+    print_budget_summary()
+    save_run_metrics(timestamp)
+    export_metrics()
+
 
 def create_html_review(content, timestamp):
     """Create beautiful HTML review page"""
@@ -677,6 +1203,16 @@ def create_html_review(content, timestamp):
             background: #2D5016;
             color: white;
         }}
+        .item-link.flagged {{
+            background: #fdecea;
+            color: #b00020;
+        }}
+
+        .link-warning {{
+            font-size: 13px;
+            font-weight: 600;
+            color: #b00020;
+        }}
 
         .empty-category {{
             text-align: center;
@@ -731,9 +1267,10 @@ def create_html_review(content, timestamp):
 """
         for story in top_stories_full:
             score = story.get('score', 0)
+            link_warning = f' <span class="link-warning">⚠️ {story["link_status"]} link</span>' if is_flagged(story) else ''
             html += f"""
             <div class="top-story">
-                <div class="top-story-title">{story.get('title', 'No title')}</div>
+                <div class="top-story-title">{story.get('title', 'No title')}{link_warning}</div>
                 <div class="top-story-meta">
                     📰 {story.get('source', 'Unknown')} • 📅 {story.get('date', 'Date unknown')} • ⭐ Score: {score}/10
                 </div>
@@ -768,6 +1305,10 @@ def create_html_review(content, timestamp):
             for item in items:
                 score = item.get('score', 0)
                 score_class = 'high' if score >= 7 else 'medium' if score >= 5 else 'low'
+                if is_flagged(item):
+                    link_class, link_text = 'item-link flagged', f"⚠️ Check link before publishing ({item['link_status']})"
+                else:
+                    link_class, link_text = 'item-link', "Read full article →"
 
                 html += f"""
             <div class="item">
@@ -783,8 +1324,8 @@ def create_html_review(content, timestamp):
                 <div class="item-relevance">
                     <strong>Why it matters:</strong> {item.get('relevance', 'Local relevance to be determined')}
                 </div>
-                <a href="{item.get('url', '#')}" target="_blank" class="item-link">
-                    Read full article →
+                <a href="{item.get('url', '#')}" target="_blank" class="{link_class}">
+                    {link_text}
                 </a>
             </div>
 """
@@ -819,7 +1360,12 @@ if __name__ == "__main__":
     print("Powered by Perplexity Search + Claude Curation")
     print("="*60 + "\n")
 
-    results = discover_content()
+    parser = argparse.ArgumentParser(description="Discover and curate Old Oak Town content")
+    parser.add_argument("--resume", metavar="RUN_ID",
+                        help="resume an earlier run from its checkpoints in runs/<RUN_ID>/")
+    args = parser.parse_args()
+
+    results = discover_content(run_id=args.resume)
 
     print("="*60)
     print("✅ CONTENT DISCOVERY COMPLETE!")
@@ -0,0 +1,275 @@
+import argparse
+import os
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+from curation_output import extract_curated_items
+from budget import charge
+from instrumentation import span, record_usage, increment, get_run_metrics, start_run
+
+# The weekly job is not latency-critical, so curation can go through the
+# Message Batches API: half the price and no per-minute rate limits.
+BATCH_POLL_SECONDS = int(os.environ.get("CURATION_BATCH_POLL", "30"))
+BATCH_TIMEOUT_SECONDS = int(os.environ.get("CURATION_BATCH_TIMEOUT", str(3 * 60 * 60)))
+
+
+class BatchTimeoutError(Exception):
+    """The batch did not end in time and was canceled"""
+
+
+def build_batch_requests(all_search_results, build_request, batch_size):
+    """Turn search results into Message Batches requests, one per curation batch"""
+
+    batch_requests = []
+
+    for i in range(0, len(all_search_results), batch_size):
+        batch = all_search_results[i:i+batch_size]
+        batch_requests.append({
+            "custom_id": f"curation-{i//batch_size + 1:03d}",
+            "params": build_request(batch)
+        })
+
+    return batch_requests
+
+
+def curate_with_batches(client, all_search_results, build_request, batch_size,
+                        poll_seconds=BATCH_POLL_SECONDS, timeout_seconds=BATCH_TIMEOUT_SECONDS):
+    """
+    Submit every curation batch for the run in one Message Batches job,
+    wait for it to finish and return (curated items, failed results).
+
+    batch_size is the number of search results per request, the same
+    CURATION_BATCH_SIZE interactive curation uses. Failed results are the
+    inputs of requests that errored, expired or were canceled, for the
+    caller to curate again.
+
+    Raises BatchTimeoutError if the job does not end within the timeout
+    (the batch is canceled first) so the caller can fall back to
+    interactive curation.
+    """
+
+    batch_requests = build_batch_requests(all_search_results, build_request, batch_size)
+
+    if not batch_requests:
+        return [], []
+
+    with span("claude.batch_submit", requests=len(batch_requests)):
+        message_batch = client.messages.batches.create(requests=batch_requests)
+
+    print(f"   📦 Submitted {len(batch_requests)} curation requests (batch {message_batch.id})")
+
+    with span("claude.batch_wait", batch_id=message_batch.id) as wait_span:
+        message_batch, polls = wait_for_batch(client, message_batch.id, poll_seconds, timeout_seconds)
+        wait_span["attributes"]["polls"] = polls
+
+    items, failed_ids = collect_batch_items(client, message_batch.id)
+    inputs = {request["custom_id"]: all_search_results[i * batch_size:(i + 1) * batch_size]
+              for i, request in enumerate(batch_requests)}
+
+    return items, [result for custom_id in sorted(failed_ids) for result in inputs[custom_id]]
+
+
+def wait_for_batch(client, batch_id, poll_seconds=BATCH_POLL_SECONDS, timeout_seconds=BATCH_TIMEOUT_SECONDS):
+    """
+    Poll a message batch until processing has ended; returns (batch, polls).
+    A batch still running after timeout_seconds is canceled, so it stops
+    being billed, and BatchTimeoutError is raised.
+    """
+
+    started = time.time()
+    polls = 0
+
+    while True:
+        message_batch = client.messages.batches.retrieve(batch_id)
+        polls += 1
+
+        if message_batch.processing_status == "ended":
+            return message_batch, polls
+
+        if time.time() - started > timeout_seconds:
+            try:
+                client.messages.batches.cancel(batch_id)
+                increment("curation_batch_canceled_total")
+            except Exception as e:
+                print(f"   ⚠️  Could not cancel batch {batch_id}: {str(e)[:80]}")
+            raise BatchTimeoutError(f"Batch {batch_id} still {message_batch.processing_status} after {timeout_seconds}s")
+
+        counts = message_batch.request_counts
+        print(f"   ⏳ Batch {message_batch.processing_status}: "
+              f"{getattr(counts, 'succeeded', 0)} done, {getattr(counts, 'processing', 0)} processing...")
+        time.sleep(poll_seconds)
+
+
+def collect_batch_items(client, batch_id):
+    """
+    Read the results of an ended batch and extract curated items from each
+    message; returns (items, custom_ids of requests that did not succeed)
+    """
+
+    all_curated_items = []
+    failed_ids = []
+
+    for result in client.messages.batches.results(batch_id):
+        if result.result.type != "succeeded":
+            increment("curation_batch_failures_total", result=result.result.type)
+            print(f"      ✗ {result.custom_id}: {result.result.type}")
+            failed_ids.append(result.custom_id)
+            continue
+
+        message = result.result.message
+
+        with span("claude.batch_result", custom_id=result.custom_id) as result_span:
+            record_usage(result_span, message.usage)
+            charge("curation", getattr(message, "model", None) or "", message.usage, batch=True, record=result_span)
+
+        items, method = extract_curated_items(message)
+        all_curated_items.extend(items)
+
+        if method == "none":
+            increment("curation_json_parse_failures_total", reason="no_items")
+            print(f"      ⚠️  {result.custom_id}: No curated items found")
+        else:
+            if method == "recovered":
+                increment("curation_json_parse_failures_total", reason="recovered")
+            print(f"      ✓ {result.custom_id}: Extracted {len(items)} stories")
+
+    return all_curated_items, failed_ids
+
+
+class LocalBatchClient:
+    """
+    Local stand-in for the Message Batches endpoint.
+
+    Wraps anything with a messages.create(**params) method (a real client or
+    a recorded/fake one) and exposes messages.batches.create/retrieve/results
+    with the same shapes as the Anthropic SDK, so batch mode can be exercised
+    offline. Requests run synchronously when the batch is created.
+    """
+
+    def __init__(self, client, polls_until_ended=1):
+        self.messages = SimpleNamespace(
+            create=client.messages.create,
+            batches=_LocalBatches(client, polls_until_ended)
+        )
+
+
+class _LocalBatches:
+
+    def __init__(self, client, polls_until_ended):
+        self._client = client
+        self._polls_until_ended = polls_until_ended
+        self._batches = {}
+
+    def create(self, requests):
+        batch_id = f"msgbatch_local_{uuid.uuid4().hex[:12]}"
+        results = []
+
+        for request in requests:
+            try:
+                message = self._client.messages.create(**request["params"])
+                result = SimpleNamespace(type="succeeded", message=message)
+            except Exception as e:
+                result = SimpleNamespace(type="errored", error=str(e))
+            results.append(SimpleNamespace(custom_id=request["custom_id"], result=result))
+
+        self._batches[batch_id] = {"results": results, "polls": 0, "canceled": False, "created_at": datetime.now().isoformat()}
+
+        return self.retrieve(batch_id, count_poll=False)
+
+    def retrieve(self, batch_id, count_poll=True):
+        batch = self._batches[batch_id]
+        if count_poll:
+            batch["polls"] += 1
+
+        ended = batch["polls"] >= self._polls_until_ended or batch["canceled"]
+        succeeded = sum(1 for r in batch["results"] if r.result.type == "succeeded")
+
+        return SimpleNamespace(
+            id=batch_id,
+            processing_status="ended" if ended else "in_progress",
+            created_at=batch["created_at"],
+            request_counts=SimpleNamespace(
+                processing=0 if ended else len(batch["results"]),
+                succeeded=succeeded if ended else 0,
+                errored=len(batch["results"]) - succeeded if ended else 0,
+                canceled=0,
+                expired=0
+            )
+        )
+
+    def cancel(self, batch_id):
+        batch = self._batches[batch_id]
+        batch["canceled"] = True
+        return self.retrieve(batch_id, count_poll=False)
+
+    def results(self, batch_id):
+        return iter(self._batches[batch_id]["results"])
+
+
+def self_check():
+    """
+    Run curate_with_batches end to end on LocalBatchClient with a fake
+    messages client: one request fails, one answers in text only, the rest
+    call the curation tool; then a batch that never ends is canceled.
+    Raises AssertionError on any mismatch.
+    """
+
+    from curation_output import CURATION_TOOL
+
+    class _FakeMessages:
+
+        def create(self, **params):
+            query = params["messages"][0]["content"]
+            if "q2" in query:
+                raise Exception("overloaded_error")
+            usage = SimpleNamespace(input_tokens=100, output_tokens=20, cache_read_input_tokens=0, cache_creation_input_tokens=0)
+            if "q4" in query:
+                text = '{"items": [{"title": "Recovered story", "category": "community_stories", "score": 6}, {"title": "Cut'
+                return SimpleNamespace(model="fake", usage=usage, content=[SimpleNamespace(type="text", text=text)])
+            item = {"title": f"Story for {query}", "category": "development_news", "score": 7}
+            block = SimpleNamespace(type="tool_use", name=CURATION_TOOL["name"], input={"items": [item]})
+            return SimpleNamespace(model="fake", usage=usage, content=[block])
+
+    def _build_request(batch):
+        return {"messages": [{"role": "user", "content": " ".join(result["query"] for result in batch)}]}
+
+    start_run()
+    results = [{"query": f"q{number}"} for number in range(1, 6)]
+    client = LocalBatchClient(SimpleNamespace(messages=_FakeMessages()), polls_until_ended=2)
+
+    requests = build_batch_requests(results, _build_request, batch_size=1)
+    assert [r["custom_id"] for r in requests] == [f"curation-{n:03d}" for n in range(1, 6)], requests
+    assert len(build_batch_requests(results, _build_request, batch_size=2)) == 3
+
+    items, failed = curate_with_batches(client, results, _build_request, batch_size=1, poll_seconds=0)
+
+    titles = sorted(item["title"] for item in items)
+    assert titles == ["Recovered story", "Story for q1", "Story for q3", "Story for q5"], titles
+    assert failed == [{"query": "q2"}], failed
+    assert curate_with_batches(client, results, _build_request, batch_size=2, poll_seconds=0)[1] == results[:2]
+    counters = get_run_metrics()["counters"]
+    assert counters.get('curation_batch_failures_total{result="errored"}') == 2, counters
+    assert counters.get('curation_json_parse_failures_total{reason="recovered"}') == 2, counters
+    print(f"✓ Batch curation on LocalBatchClient: {len(items)} stories, 1 failed request returned for retry")
+
+    stuck = LocalBatchClient(SimpleNamespace(messages=_FakeMessages()), polls_until_ended=100)
+    try:
+        curate_with_batches(stuck, results, _build_request, batch_size=1, poll_seconds=0, timeout_seconds=-1)
+        raise AssertionError("expected BatchTimeoutError")
+    except BatchTimeoutError:
+        pass
+    assert get_run_metrics()["counters"].get("curation_batch_canceled_total") == 1
+    print("✓ Timed-out batch canceled before falling back")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the batch curation flow offline")
+    parser.add_argument("--self-check", action="store_true", help="run curate_with_batches on LocalBatchClient with a fake client")
+    args = parser.parse_args()
+
+    if args.self_check:
+        self_check()
+    else:
+        parser.print_help()
@@ -0,0 +1,260 @@
+import json
+import time
+
+# Structured output for curation: Claude is forced to call this tool, so the
+# items arrive as schema-checked JSON instead of prose with JSON somewhere inside.
+CURATION_CATEGORIES = ["development_news", "business_spotlights", "community_stories", "planning_policy"]
+
+CURATION_TOOL = {
+    "name": "record_curated_items",
+    "description": "Record every newsworthy story extracted from the search results.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "items": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "title": {"type": "string", "description": "Clear, engaging headline"},
+                        "url": {"type": "string", "description": "Source URL from the citations/results"},
+                        "source": {"type": "string", "description": "Publication name"},
+                        "date": {"type": "string", "description": "YYYY-MM-DD or \"Recent\""},
+                        "summary": {"type": "string", "description": "2-3 sentences describing what happened"},
+                        "category": {"type": "string", "enum": CURATION_CATEGORIES},
+                        "relevance": {"type": "string", "description": "Why this matters to Old Oak Town readers"},
+                        "score": {"type": "number", "minimum": 1, "maximum": 10}
+                    },
+                    "required": ["title", "url", "source", "summary", "category", "score"]
+                }
+            }
+        },
+        "required": ["items"]
+    }
+}
+
+CURATION_TOOL_CHOICE = {"type": "tool", "name": CURATION_TOOL["name"]}
+
+
+def extract_curated_items(response):
+    """
+    Pull curated items out of a messages response.
+
+    Returns (items, method) where method is "tool", "json", "recovered" or "none".
+    Tool input is used when present; otherwise text blocks are parsed
+    tolerantly so a truncated or partly malformed answer still yields
+    every complete item.
+    """
+
+    text = ""
+
+    for block in response.content:
+        if block.type == "tool_use" and block.name == CURATION_TOOL["name"]:
+            items = block.input.get("items", []) if isinstance(block.input, dict) else []
+            return _normalize_items(items), "tool"
+        if block.type == "text":
+            text += block.text
+
+    if not text.strip():
+        return [], "none"
+
+    data = parse_json_object(text)
+    if isinstance(data, dict) and isinstance(data.get("items"), list):
+        return _normalize_items(data["items"]), "json"
+
+    items = recover_items(text)
+    return items, "recovered" if items else "none"
+
+
+class IncrementalItemParser:
+    """Feed streamed JSON in chunks and get back each item as soon as its object closes"""
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = None
+
+    def feed(self, chunk):
+        self.buffer += chunk
+
+        if self.position is None:
+            # Wait until the opening of the items array has streamed in
+            start = _items_array_start(self.buffer)
+            if start == 0:
+                return []
+            self.position = start
+
+        items = []
+
+        while True:
+            start = self.buffer.find('{', self.position)
+            if start < 0:
+                break
+
+            end = find_object_end(self.buffer, start)
+            if end < 0:
+                # Object still being generated
+                break
+
+            try:
+                items.append(json.loads(self.buffer[start:end]))
+            except json.JSONDecodeError:
+                pass
+
+            self.position = end
+
+        return _normalize_items(items)
+
+
+def stream_curated_items(client, request, on_item=None, should_stop=None):
+    """
+    Run one curation request through the streaming messages API.
+
+    Each item is passed to on_item as soon as its JSON object closes, and
+    the stream is abandoned as soon as should_stop() returns True.
+    Returns (items, method, usage, time_to_first_item_s).
+    """
+
+    parser = IncrementalItemParser()
+    items = []
+    started = time.perf_counter()
+    first_item_s = None
+
+    with client.messages.stream(**request) as stream:
+        for event in stream:
+            if event.type != "content_block_delta":
+                continue
+
+            chunk = getattr(event.delta, "partial_json", None) or getattr(event.delta, "text", None) or ""
+
+            for item in parser.feed(chunk):
+                if first_item_s is None:
+                    first_item_s = round(time.perf_counter() - started, 3)
+                items.append(item)
+                if on_item:
+                    on_item(item)
+
+            if should_stop and should_stop():
+                break
+
+        usage = getattr(stream.current_message_snapshot, "usage", None)
+
+    return items, "stream" if items else "none", usage, first_item_s
+
+
+def parse_json_object(text):
+    """Parse the outermost JSON object in text, ignoring markdown fences and prose"""
+
+    text = text.replace('```json', '').replace('```', '')
+    start = text.find('{')
+    end = text.rfind('}') + 1
+
+    if start < 0 or end <= start:
+        return None
+
+    try:
+        return json.loads(text[start:end])
+    except json.JSONDecodeError:
+        return None
+
+
+def recover_items(text):
+    """
+    Recover every complete item object from a truncated or malformed response.
+
+    Scans the "items" array (or the whole text if there is none) object by
+    object; objects that fail to parse are skipped, and objects cut off
+    mid-generation are searched for complete stories nested inside them.
+    """
+
+    text = text.replace('```json', '').replace('```', '')
+    position = _items_array_start(text)
+    decoder = json.JSONDecoder()
+    items = []
+
+    while position < len(text):
+        start = text.find('{', position)
+        if start < 0:
+            break
+
+        end = find_object_end(text, start)
+        if end < 0:
+            # Truncated mid-object: look for complete objects nested inside it
+            position = start + 1
+            continue
+
+        try:
+            item, _ = decoder.raw_decode(text[start:end])
+        except json.JSONDecodeError:
+            item = None
+
+        if isinstance(item, dict) and isinstance(item.get("items"), list):
+            # A whole well-formed wrapper object
+            items.extend(item["items"])
+        elif isinstance(item, dict) and not item.get("title"):
+            # A container (e.g. a categories map) rather than a story
+            position = start + 1
+            continue
+        elif isinstance(item, dict):
+            items.append(item)
+
+        position = end
+
+    return _normalize_items(items)
+
+
+def _items_array_start(text):
+    key = text.find('"items"')
+    if key < 0:
+        return 0
+    bracket = text.find('[', key)
+    return bracket + 1 if bracket >= 0 else 0
+
+
+def find_object_end(text, start):
+    """Return the index just past the object opening at start, or -1 if it never closes"""
+
+    depth = 0
+    in_string = False
+    escaped = False
+
+    for index in range(start, len(text)):
+        char = text[index]
+
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return index + 1
+
+    return -1
+
+
+def _normalize_items(items):
+    normalized = []
+
+    for item in items:
+        if not isinstance(item, dict) or not item.get('title'):
+            continue
+
+        try:
+            item['score'] = float(item.get('score', 0))
+            if item['score'].is_integer():
+                item['score'] = int(item['score'])
+        except (TypeError, ValueError):
+            item['score'] = 0
+
+        normalized.append(item)
+
+    return normalized
@@ -0,0 +1,347 @@
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import time
+from datetime import datetime
+
+import content_discovery_perplexity as discovery
+from budget import call_cost
+from host_scheduler import set_fixtures_mode
+from instrumentation import get_run_metrics, span, start_run
+from model_cascade import CASCADE_BATCH_SIZE, CASCADE_MODEL, CASCADE_SOURCES, CASCADE_WORKERS, build_triage_request, input_source
+from query_stats import schedule_queries
+from raw_archive import list_manifests, load_run
+
+# Dry run: run every local stage for real (RSS and planning fetches, from
+# recorded fixtures if available, pre-scoring, semantic filtering, batching)
+# and report the LLM calls a real run would make, with token, dollar and
+# wall-time estimates, without sending any of them.
+FIXTURES_DIR = os.environ.get("DRY_RUN_FIXTURES", "fixtures")
+
+# Used when there are no past run metrics to calibrate from
+DEFAULT_SEARCH_INPUT_TOKENS = 15000    # web search results are fed back as input
+DEFAULT_SEARCH_OUTPUT_TOKENS = 1200
+DEFAULT_SEARCH_SECONDS = 25
+DEFAULT_CURATION_OUTPUT_TOKENS = 1500
+DEFAULT_CURATION_SECONDS = 40
+DEFAULT_WEB_SEARCHES_PER_CALL = 3
+DEFAULT_TRIAGE_SECONDS = 4
+# Shortest prefix the curation model caches; below it cache_control is ignored
+CACHE_MIN_TOKENS = 1024
+
+TOKEN_PATTERN = re.compile(r"[A-Za-z]+|[0-9]+|[^\sA-Za-z0-9]")
+
+
+def count_tokens(text):
+    """
+    Approximate token count without calling the API.
+
+    Words cost one token plus one per 7 further letters, digit runs one per
+    3 digits and each punctuation mark one. Checked against the
+    messages.count_tokens endpoint: past curated stories came within 0-9%
+    (+1% over 977 tokens of them), the curation instructions +6%, but
+    JSON such as tool schemas is overcounted by about 40%.
+    """
+
+    tokens = 0
+    for piece in TOKEN_PATTERN.findall(text or ''):
+        if piece.isalpha():
+            tokens += 1 + (len(piece) - 1) // 7
+        elif piece.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+def request_tokens(request):
+    """
+    Input tokens of a messages API request as (prefix, messages).
+
+    The prefix is the tool definitions plus the system prompt, the part a
+    cache_control breakpoint on the system prompt caches.
+    """
+
+    system = request.get("system", "")
+    system_text = system if isinstance(system, str) else " ".join(block.get("text", "") for block in system)
+    tools = json.dumps(request.get("tools", []))
+    messages = " ".join(
+        message["content"] if isinstance(message["content"], str) else json.dumps(message["content"])
+        for message in request.get("messages", [])
+    )
+
+    return count_tokens(tools) + count_tokens(system_text), count_tokens(messages)
+
+
+def is_cached(request, prefix_tokens):
+    """True when the request marks its system prompt for caching and the prefix is long enough to be cached"""
+
+    system = request.get("system", "")
+    marked = not isinstance(system, str) and any(block.get("cache_control") for block in system)
+    return marked and prefix_tokens >= CACHE_MIN_TOKENS
+
+
+def calibration(review_dir="reviews"):
+    """Average tokens and latency per call type from past run metrics, where available"""
+
+    samples = {"claude.web_search": [], "perplexity.chat": [], "claude.curation": [], "claude.triage": []}
+
+    for filename in glob.glob(os.path.join(review_dir, "review_*_metrics.json")):
+        try:
+            with open(filename) as f:
+                metrics = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        for record in metrics.get("spans", []):
+            if record["name"] in samples and record.get("status", "ok") == "ok":
+                samples[record["name"]].append(record)
+
+    averages = {}
+    for name, records in samples.items():
+        if records:
+            averages[name] = {
+                "input_tokens": sum(r["input_tokens"] for r in records) / len(records),
+                "output_tokens": sum(r["output_tokens"] for r in records) / len(records),
+                "seconds": sum(r["wall_time_s"] for r in records) / len(records),
+                "samples": len(records)
+            }
+
+    return averages
+
+
+def recorded_search_results(archive_timestamp=None):
+    """Search results from an archived run (raw_archive.py), to stand in for live searches"""
+
+    manifests = list_manifests()
+    if archive_timestamp:
+        manifests = [m for m in manifests if m["timestamp"] == archive_timestamp]
+    if not manifests:
+        return {}
+
+    queries = {item["query"] for item in discovery.SEARCH_QUERIES}
+    return {result["query"]: result for result in load_run(manifests[-1]) if result.get("query") in queries}
+
+
+def plan_run(archive_timestamp=None, with_rss=True, with_planning=True):
+    """Run the local stages and return the planned LLM calls with estimates"""
+
+    start_run("dry_run")
+    history = calibration()
+    recorded = recorded_search_results(archive_timestamp)
+
+    search_provider = "perplexity" if os.environ.get("SEARCH_PROVIDERS", "claude").split(",")[0].strip() == "perplexity" else "claude"
+    search_history = history.get("perplexity.chat" if search_provider == "perplexity" else "claude.web_search", {})
+    search_model = "sonar-small" if search_provider == "perplexity" else discovery.SEARCH_MODEL
+
+    planned = []
+    all_search_results = []
+
+    # Searches: the queries the adaptive scheduler would run, sized from
+    # calibration; results come from the archive (or a placeholder)
+    search_queries, skipped_queries = schedule_queries(discovery.SEARCH_QUERIES)
+    for query, reason in skipped_queries:
+        print(f"   ⏭️  Skipping query ({reason}): {query['query'][:60]}")
+
+    for item in search_queries:
+        prompt_tokens = count_tokens(f"{item['query']} {item['focus']}") + 60
+        input_tokens = round(search_history.get("input_tokens", DEFAULT_SEARCH_INPUT_TOKENS + prompt_tokens))
+        output_tokens = round(search_history.get("output_tokens", DEFAULT_SEARCH_OUTPUT_TOKENS))
+        usage = {"input_tokens": input_tokens, "output_tokens": output_tokens}
+        if search_provider == "claude":
+            usage["server_tool_use"] = {"web_search_requests": DEFAULT_WEB_SEARCHES_PER_CALL}
+        cost, _ = call_cost(search_model, usage)
+
+        planned.append({
+            "kind": "search",
+            "model": search_model,
+            "label": item["query"][:60],
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "usd": cost,
+            "seconds": search_history.get("seconds", DEFAULT_SEARCH_SECONDS)
+        })
+
+        all_search_results.append(recorded.get(item["query"]) or {
+            "query": item["query"],
+            "category": item["category"],
+            "focus": item["focus"],
+            "results": {"content": "news " * output_tokens, "citations": [], "source": "dry_run"},
+            "result_count": 1
+        })
+
+    if discovery.SEMANTIC_AVAILABLE:
+        with span("semantic_rank", stage="semantic", source="search", items=len(all_search_results)):
+            discovery.rank_semantically([r for r in all_search_results if isinstance(r['results'], dict)])
+
+    # Local stages run for real
+    if with_rss and discovery.RSS_AVAILABLE:
+        with span("rss", stage="rss"):
+            rss_items = discovery.fetch_rss_feeds(save_state=False)
+        rss_items = discovery.drop_low_prescore_items(rss_items, "RSS", all_search_results)
+        rss_items = discovery.drop_semantically_irrelevant_items(rss_items, "RSS")
+        all_search_results.extend(discovery.format_rss_for_curation(rss_items))
+
+    if with_planning and discovery.PLANNING_AVAILABLE:
+        with span("planning", stage="planning"):
+            planning_items = discovery.check_business_planning_applications(save_state=False)
+        planning_items = discovery.drop_low_prescore_items(planning_items, "planning", all_search_results)
+        planning_items = discovery.drop_semantically_irrelevant_items(planning_items, "planning")
+        all_search_results.extend(discovery.format_planning_for_curation(planning_items))
+
+    if discovery.ARTICLES_AVAILABLE and os.environ.get("ENRICH_ARTICLES") == "1":
+        with span("enrichment", stage="enrichment"):
+            discovery.enrich_search_results(all_search_results)
+
+    # Cascade triage: which inputs escalate is only known after the calls, so
+    # curation below is planned for every input (an upper bound)
+    if os.environ.get("CURATION_CASCADE") == "1":
+        triage_history = history.get("claude.triage", {})
+        to_triage = [r for r in all_search_results if input_source(r) in CASCADE_SOURCES]
+        for number, i in enumerate(range(0, len(to_triage), CASCADE_BATCH_SIZE), 1):
+            request = build_triage_request(to_triage[i:i + CASCADE_BATCH_SIZE])
+            prefix_tokens, message_tokens = request_tokens(request)
+            output_tokens = round(min(request["max_tokens"], triage_history.get("output_tokens", request["max_tokens"])))
+            cost, _ = call_cost(CASCADE_MODEL, {"input_tokens": prefix_tokens + message_tokens, "output_tokens": output_tokens})
+
+            planned.append({
+                "kind": "triage",
+                "model": CASCADE_MODEL,
+                "label": f"triage {number}: {len(to_triage[i:i + CASCADE_BATCH_SIZE])} inputs",
+                "input_tokens": prefix_tokens + message_tokens,
+                "output_tokens": output_tokens,
+                "usd": cost,
+                "seconds": triage_history.get("seconds", DEFAULT_TRIAGE_SECONDS)
+            })
+
+    # Curation: build the real requests and count their tokens
+    curation_history = history.get("claude.curation", {})
+    batch_mode = os.environ.get("CURATION_MODE") == "batch"
+    batch_size = discovery.CURATION_BATCH_SIZE
+
+    for number, i in enumerate(range(0, len(all_search_results), batch_size), 1):
+        request = discovery.build_curation_request(all_search_results[i:i + batch_size])
+        prefix_tokens, message_tokens = request_tokens(request)
+        output_tokens = round(min(request["max_tokens"], curation_history.get("output_tokens", DEFAULT_CURATION_OUTPUT_TOKENS)))
+
+        # The prefix is written to the prompt cache once and read after that
+        cached = is_cached(request, prefix_tokens)
+        usage = {
+            "input_tokens": message_tokens + (0 if cached else prefix_tokens),
+            "output_tokens": output_tokens,
+            "cache_creation_input_tokens": prefix_tokens if cached and number == 1 else 0,
+            "cache_read_input_tokens": prefix_tokens if cached and number > 1 else 0
+        }
+        cost, _ = call_cost(discovery.CURATION_MODEL, usage, batch=batch_mode)
+
+        planned.append({
+            "kind": "curation",
+            "model": discovery.CURATION_MODEL,
+            "label": f"batch {number}: " + ", ".join(r["query"][:30] for r in all_search_results[i:i + batch_size]),
+            "input_tokens": message_tokens + prefix_tokens,
+            "output_tokens": output_tokens,
+            "usd": cost,
+            "seconds": curation_history.get("seconds", DEFAULT_CURATION_SECONDS)
+        })
+
+    return planned, all_search_results, history
+
+
+def estimate_wall_time(planned, local_seconds):
+    """Wall time of a real run: sequential calls plus the configured rate-limit waits"""
+
+    searches = [call for call in planned if call["kind"] == "search"]
+    triages = [call for call in planned if call["kind"] == "triage"]
+    curations = [call for call in planned if call["kind"] == "curation"]
+    wait = discovery.PERPLEXITY_WAIT_SECONDS if searches and searches[0]["model"].startswith("sonar") else discovery.SEARCH_WAIT_SECONDS
+
+    search_seconds = sum(call["seconds"] for call in searches) + wait * max(len(searches) - 1, 0)
+    if os.environ.get("CURATION_MODE") == "batch":
+        # Batches run server-side in parallel; allow a few polls
+        curation_seconds = max((call["seconds"] for call in curations), default=0) + 3 * int(os.environ.get("CURATION_BATCH_POLL", "30"))
+    else:
+        curation_seconds = sum(call["seconds"] for call in curations) + discovery.BATCH_PAUSE_SECONDS * max(len(curations) - 1, 0)
+
+    # Triage calls run CASCADE_WORKERS at a time
+    triage_seconds = max((call["seconds"] for call in triages), default=0) * math.ceil(len(triages) / CASCADE_WORKERS)
+
+    return {
+        "search_s": round(search_seconds, 1),
+        "local_s": round(local_seconds, 1),
+        "wait_s": discovery.CURATION_WAIT_SECONDS,
+        "triage_s": round(triage_seconds, 1),
+        "curation_s": round(curation_seconds, 1),
+        "total_s": round(search_seconds + local_seconds + triage_seconds + discovery.CURATION_WAIT_SECONDS + curation_seconds, 1)
+    }
+
+
+def dry_run(archive_timestamp=None, fixtures_mode="replay", with_rss=True, with_planning=True):
+    """Plan a run and print the estimate; returns the report dict"""
+
+    print("="*60)
+    print("DRY RUN - no LLM calls will be made")
+    print("="*60 + "\n")
+
+    set_fixtures_mode(fixtures_mode, os.path.join(FIXTURES_DIR, "http"))
+
+    started = time.perf_counter()
+    planned, all_search_results, history = plan_run(archive_timestamp, with_rss, with_planning)
+    local_seconds = time.perf_counter() - started
+
+    wall_time = estimate_wall_time(planned, local_seconds)
+    totals = {
+        "calls": len(planned),
+        "input_tokens": sum(call["input_tokens"] for call in planned),
+        "output_tokens": sum(call["output_tokens"] for call in planned),
+        "usd": round(sum(call["usd"] for call in planned), 4)
+    }
+
+    print("\n📋 Planned LLM calls:")
+    for call in planned:
+        print(f"   {call['kind']:<9} {call['input_tokens']:>7,} in {call['output_tokens']:>6,} out  "
+              f"${call['usd']:.4f}  ~{call['seconds']:.0f}s  {call['label']}")
+
+    print(f"\n💰 Estimated: {totals['calls']} calls, {totals['input_tokens']:,} input + "
+          f"{totals['output_tokens']:,} output tokens, ${totals['usd']:.4f}")
+    print(f"⏱️  Estimated wall time: {wall_time['total_s'] / 60:.1f} min "
+          f"(searches {wall_time['search_s']:.0f}s, local stages {wall_time['local_s']:.0f}s, "
+          f"curation {wall_time['curation_s']:.0f}s)")
+    if not history:
+        print("   ℹ️  No past run metrics found; search and output sizes use defaults")
+    if any(call["kind"] == "triage" for call in planned):
+        print("   ℹ️  Cascade on: curation is planned for every input, as if all were escalated")
+
+    metrics = get_run_metrics()
+    fixture_hits = {key: value for key, value in metrics["counters"].items() if key.startswith("http_fixture_total")}
+    if fixture_hits:
+        print(f"   📼 HTTP fixtures: {fixture_hits}")
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "planned_calls": planned,
+        "totals": totals,
+        "wall_time": wall_time,
+        "calibration": history,
+        "curation_inputs": len(all_search_results)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estimate the cost and duration of a discovery run without calling any LLM")
+    parser.add_argument("--archive", metavar="TIMESTAMP", help="use search results from this archived run (default: latest)")
+    parser.add_argument("--record", action="store_true", help="fetch feeds and planning pages live and save them as fixtures")
+    parser.add_argument("--offline", action="store_true", help="use recorded fixtures only, never the network")
+    parser.add_argument("--no-rss", action="store_true", help="skip RSS feeds")
+    parser.add_argument("--no-planning", action="store_true", help="skip planning portals")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    mode = "record" if args.record else "offline" if args.offline else "replay"
+    report = dry_run(args.archive, mode, not args.no_rss, not args.no_planning)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Saved: {args.json}")
@@ -0,0 +1,162 @@
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+# Per-feed health, committed with the other run state: error counts, latency
+# and last success for every RSS feed. Failing feeds back off exponentially
+# and feeds that keep failing are disabled until re-enabled by hand.
+STATE_DIR = os.environ.get("FEED_STATE_DIR", "state")
+FEED_HEALTH_FILE = os.path.join(STATE_DIR, "feed_health.json")
+
+# Wait after the first failure, doubled for each further consecutive failure
+FEED_BACKOFF_BASE_HOURS = float(os.environ.get("FEED_BACKOFF_BASE_HOURS", "24"))
+FEED_BACKOFF_MAX_DAYS = float(os.environ.get("FEED_BACKOFF_MAX_DAYS", "28"))
+# Consecutive failures after which a feed is disabled (0 = never)
+FEED_DISABLE_AFTER = int(os.environ.get("FEED_DISABLE_AFTER", "6"))
+
+
+def load_feed_health(path=FEED_HEALTH_FILE):
+    """Load feed health keyed by feed URL"""
+
+    try:
+        with open(path) as f:
+            return json.load(f).get('feeds', {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"   ⚠️  Could not read feed health {path}: {str(e)[:80]}")
+        return {}
+
+
+def save_feed_health(health, path=FEED_HEALTH_FILE):
+    """Atomically write feed health"""
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "updated_at": datetime.now().isoformat(),
+            "feeds": dict(sorted(health.items()))
+        }, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def _new_record(feed_config):
+    return {
+        "name": feed_config["name"],
+        "successes": 0,
+        "failures": 0,
+        "consecutive_failures": 0,
+        "last_success": None,
+        "last_failure": None,
+        "last_error": None,
+        "latency_s": None,
+        "retry_after": None,
+        "disabled": False,
+        "disabled_at": None
+    }
+
+
+def should_fetch(feed_config, health, now=None):
+    """(fetch, reason): False with a reason for disabled feeds and feeds in backoff"""
+
+    record = health.get(feed_config["url"])
+    if not record:
+        return True, None
+
+    if record.get("disabled"):
+        return False, f"disabled since {record['disabled_at'][:10]} after {record['consecutive_failures']} failures"
+
+    retry_after = record.get("retry_after")
+    if retry_after and (now or datetime.now()).isoformat() < retry_after:
+        return False, f"backing off until {retry_after[:16].replace('T', ' ')} ({record['consecutive_failures']} failures)"
+
+    return True, None
+
+
+def backoff(consecutive_failures):
+    """Wait before the next attempt after this many consecutive failures"""
+
+    hours = FEED_BACKOFF_BASE_HOURS * 2 ** (consecutive_failures - 1)
+    return timedelta(hours=min(hours, FEED_BACKOFF_MAX_DAYS * 24))
+
+
+def record_fetch(feed_config, health, ok, latency_s=None, error=None, now=None):
+    """
+    Update a feed's health after a fetch attempt.
+
+    Returns "disabled" when this failure disabled the feed, "recovered" when
+    a feed that had been failing succeeded, otherwise None.
+    """
+
+    now = now or datetime.now()
+    record = health.setdefault(feed_config["url"], _new_record(feed_config))
+    record["name"] = feed_config["name"]
+    if latency_s is not None:
+        # Smoothed, so one slow run does not dominate
+        record["latency_s"] = round(latency_s if record["latency_s"] is None else 0.7 * record["latency_s"] + 0.3 * latency_s, 2)
+
+    if ok:
+        recovered = record["consecutive_failures"] > 0
+        record.update(successes=record["successes"] + 1, consecutive_failures=0,
+                      last_success=now.isoformat(), retry_after=None)
+        return "recovered" if recovered else None
+
+    record["failures"] += 1
+    record["consecutive_failures"] += 1
+    record["last_failure"] = now.isoformat()
+    record["last_error"] = (error or "")[:200]
+    record["retry_after"] = (now + backoff(record["consecutive_failures"])).isoformat()
+
+    if FEED_DISABLE_AFTER and record["consecutive_failures"] >= FEED_DISABLE_AFTER and not record["disabled"]:
+        record["disabled"] = True
+        record["disabled_at"] = now.isoformat()
+        return "disabled"
+
+    return None
+
+
+def enable_feed(health, name_or_url):
+    """Re-enable a disabled feed and clear its backoff; returns True if found"""
+
+    for url, record in health.items():
+        if name_or_url in (url, record["name"]):
+            record.update(disabled=False, disabled_at=None, consecutive_failures=0, retry_after=None)
+            return True
+    return False
+
+
+def print_feed_health(health):
+    for url, record in sorted(health.items(), key=lambda entry: entry[1]["name"]):
+        if record["disabled"]:
+            state = "disabled"
+        elif record["consecutive_failures"]:
+            state = "backing off" if (record["retry_after"] or "") > datetime.now().isoformat() else "failing"
+        else:
+            state = "ok"
+        latency = f"{record['latency_s']}s" if record["latency_s"] is not None else "-"
+        last_success = (record["last_success"] or "never")[:10]
+        print(f"   {record['name']:<30} {state:<12} {record['successes']:>3} ok {record['failures']:>3} failed  "
+              f"latency {latency:<7} last success {last_success}")
+        if record["last_error"] and state != "ok":
+            print(f"      {record['last_error'][:100]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show RSS feed health or re-enable a disabled feed")
+    parser.add_argument("--enable", metavar="NAME_OR_URL", help="re-enable a disabled feed")
+    args = parser.parse_args()
+
+    health = load_feed_health()
+
+    if args.enable:
+        if not enable_feed(health, args.enable):
+            raise SystemExit(f"No feed named {args.enable} in {FEED_HEALTH_FILE}")
+        save_feed_health(health)
+        print(f"✓ Re-enabled {args.enable}")
+
+    print_feed_health(health)
@@ -0,0 +1,147 @@
+import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+# Streaming RSS/Atom parser: entries are read incrementally from the response
+# chunks, only the fields the monitor uses are kept, each entry is freed once
+# read, and parsing stops as soon as entries fall outside the date window.
+ENTRY_TAGS = {"item", "entry"}
+TITLE_TAGS = ("title",)
+SUMMARY_TAGS = ("summary", "description", "content", "encoded")   # first found wins
+DATE_TAGS = ("published", "pubDate", "date", "issued", "updated")
+# Consecutive out-of-window entries before giving up (tolerates a pinned old post)
+OLD_ENTRIES_BEFORE_STOP = 3
+CHUNK_SIZE = 16384
+
+
+class FeedParseError(Exception):
+    """The document is not well-formed XML"""
+
+
+class NotAFeedError(FeedParseError):
+    """Well-formed XML (or HTML) that is not an RSS or Atom feed"""
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1] if isinstance(tag, str) else ''
+
+
+def parse_date(text):
+    """Naive UTC datetime from an RFC 822 (RSS) or ISO 8601 (Atom, Dublin Core) date, or None"""
+
+    text = (text or '').strip()
+    if not text:
+        return None
+
+    try:
+        parsed = parsedate_to_datetime(text)
+    except (TypeError, ValueError, IndexError):
+        try:
+            parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _entry_fields(element):
+    """The fields the monitor uses from one <item>/<entry>"""
+
+    children = {}
+    link = ''
+
+    for child in element:
+        name = _local(child.tag)
+        if name == "link":
+            # RSS puts the URL in the text, Atom in href (prefer rel="alternate")
+            href = child.get("href")
+            if href and child.get("rel", "alternate") == "alternate":
+                link = link or href
+            elif child.text and child.text.strip():
+                link = link or child.text.strip()
+        elif name not in children:
+            # Atom text constructs may hold XHTML markup
+            children[name] = "".join(child.itertext()).strip()
+
+    if not link and children.get("guid", '').startswith('http'):
+        link = children["guid"]
+
+    return {
+        "title": next((children[tag] for tag in TITLE_TAGS if children.get(tag)), ''),
+        "link": link,
+        "summary": next((children[tag] for tag in SUMMARY_TAGS if children.get(tag)), ''),
+        "published": next((date for date in (parse_date(children.get(tag)) for tag in DATE_TAGS) if date), None)
+    }
+
+
+def iter_entries(chunks, max_entries=None, max_age_days=None, now=None):
+    """
+    Yield entries from an RSS 2.0, RSS 1.0 or Atom document as it streams in.
+
+    chunks is any iterable of bytes (e.g. response.iter_content()). Each
+    entry is a dict with title, link, summary and published (naive UTC
+    datetime or None). Stops after max_entries, or once
+    OLD_ENTRIES_BEFORE_STOP consecutive dated entries are older than
+    max_age_days. Raises FeedParseError for malformed XML and
+    NotAFeedError for a document that is not a feed.
+    """
+
+    parser = ET.XMLPullParser(events=("start", "end"))
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = now - timedelta(days=max_age_days) if max_age_days is not None else None
+    root_name = None
+    stack = []
+    count = 0
+    old_in_a_row = 0
+
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+
+            for event, element in parser.read_events():
+                if event == "start":
+                    root_name = root_name or _local(element.tag)
+                    stack.append(element)
+                    continue
+
+                stack.pop()
+                if _local(element.tag) not in ENTRY_TAGS or any(_local(e.tag) in ENTRY_TAGS for e in stack):
+                    continue
+
+                entry = _entry_fields(element)
+
+                # Free the entry as soon as it is read
+                element.clear()
+                if stack:
+                    stack[-1].remove(element)
+
+                count += 1
+                if cutoff and entry["published"] and entry["published"] < cutoff:
+                    old_in_a_row += 1
+                    if old_in_a_row >= OLD_ENTRIES_BEFORE_STOP:
+                        return
+                    continue
+                old_in_a_row = 0
+
+                yield entry
+
+                if max_entries and count >= max_entries:
+                    return
+
+        parser.close()
+    except ET.ParseError as e:
+        raise FeedParseError(str(e)) from e
+
+    # Well-formed, but an HTML error page or similar is not a feed
+    if not count and root_name not in ("rss", "feed", "RDF"):
+        raise NotAFeedError(f"not an RSS or Atom document (root <{root_name}>)")
+
+
+def response_chunks(response):
+    """Body chunks of a streamed requests response, or the whole body for a recorded one"""
+
+    if hasattr(response, "iter_content"):
+        return response.iter_content(CHUNK_SIZE)
+    return [response.content]
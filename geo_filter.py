@@ -0,0 +1,228 @@
+import csv
+import json
+import os
+import re
+
+# Filters planning applications to the OPDC (Old Oak / Park Royal) boundary
+# using local files, so out-of-area applications are dropped before any
+# detail pages are fetched.
+#
+#   data/opdc_boundary.geojson  - Polygon or MultiPolygon in WGS84 (lon, lat)
+#   data/postcodes.csv          - postcode,latitude,longitude (e.g. from the ONS Postcode Directory)
+BOUNDARY_FILE = os.environ.get("OPDC_BOUNDARY_FILE", "data/opdc_boundary.geojson")
+POSTCODE_FILE = os.environ.get("POSTCODE_LOOKUP_FILE", "data/postcodes.csv")
+
+# Latitude bands in the edge index
+GRID_BANDS = 64
+
+POSTCODE_PATTERN = re.compile(r"\b([A-Z]{1,2}[0-9][0-9A-Z]?)\s*([0-9][A-Z]{2})\b", re.IGNORECASE)
+
+
+def normalize_postcode(postcode):
+    """Upper-case a postcode with a single space before the inward code"""
+
+    match = POSTCODE_PATTERN.search(postcode or '')
+    if not match:
+        return None
+    return f"{match.group(1).upper()} {match.group(2).upper()}"
+
+
+class BoundaryIndex:
+    """
+    Point-in-polygon test backed by a grid index.
+
+    Polygon edges are bucketed into latitude bands, so each test only
+    ray-casts against the edges in the point's band.
+    """
+
+    def __init__(self, rings):
+        self.rings = rings
+        points = [point for ring in rings for point in ring]
+        self.min_lon = min(p[0] for p in points)
+        self.max_lon = max(p[0] for p in points)
+        self.min_lat = min(p[1] for p in points)
+        self.max_lat = max(p[1] for p in points)
+        self.band_height = (self.max_lat - self.min_lat) / GRID_BANDS or 1e-9
+        self.bands = [[] for _ in range(GRID_BANDS)]
+
+        for ring in rings:
+            for (x1, y1), (x2, y2) in zip(ring, ring[1:] + ring[:1]):
+                if y1 == y2:
+                    continue
+                for band in range(self._band(min(y1, y2)), self._band(max(y1, y2)) + 1):
+                    self.bands[band].append((x1, y1, x2, y2))
+
+    def _band(self, lat):
+        return max(0, min(GRID_BANDS - 1, int((lat - self.min_lat) / self.band_height)))
+
+    def contains(self, lon, lat):
+        if not (self.min_lon <= lon <= self.max_lon and self.min_lat <= lat <= self.max_lat):
+            return False
+
+        # Even-odd ray casting (handles holes and multipolygons)
+        inside = False
+        for x1, y1, x2, y2 in self.bands[self._band(lat)]:
+            if (y1 > lat) != (y2 > lat):
+                crossing = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+                if lon < crossing:
+                    inside = not inside
+
+        return inside
+
+
+def load_boundary(path=BOUNDARY_FILE):
+    """Load a GeoJSON Polygon/MultiPolygon (or a Feature/FeatureCollection of them) into a BoundaryIndex"""
+
+    with open(path) as f:
+        geojson = json.load(f)
+
+    geometries = []
+    if geojson.get('type') == 'FeatureCollection':
+        geometries = [feature['geometry'] for feature in geojson.get('features', [])]
+    elif geojson.get('type') == 'Feature':
+        geometries = [geojson['geometry']]
+    else:
+        geometries = [geojson]
+
+    rings = []
+    for geometry in geometries:
+        if geometry['type'] == 'Polygon':
+            polygons = [geometry['coordinates']]
+        elif geometry['type'] == 'MultiPolygon':
+            polygons = geometry['coordinates']
+        else:
+            continue
+        for polygon in polygons:
+            for ring in polygon:
+                rings.append([(float(point[0]), float(point[1])) for point in ring])
+
+    if not rings:
+        raise ValueError(f"No polygon found in {path}")
+
+    return BoundaryIndex(rings)
+
+
+def load_postcodes(path=POSTCODE_FILE):
+    """Load a postcode -> (lon, lat) lookup from CSV (postcode/pcd, latitude/lat, longitude/long/lon columns)"""
+
+    lookup = {}
+
+    with open(path, newline='') as f:
+        reader = csv.DictReader(f)
+        columns = {name.lower(): name for name in reader.fieldnames or []}
+        postcode_col = columns.get('postcode') or columns.get('pcds') or columns.get('pcd')
+        lat_col = columns.get('latitude') or columns.get('lat')
+        lon_col = columns.get('longitude') or columns.get('long') or columns.get('lon')
+
+        if not (postcode_col and lat_col and lon_col):
+            raise ValueError(f"{path} needs postcode, latitude and longitude columns")
+
+        for row in reader:
+            postcode = normalize_postcode(row[postcode_col])
+            if postcode is None:
+                continue
+            try:
+                lookup[postcode] = (float(row[lon_col]), float(row[lat_col]))
+            except (TypeError, ValueError):
+                continue
+
+    return lookup
+
+
+_area = None
+
+
+def load_area():
+    """
+    Load the boundary and postcode lookup once.
+
+    Returns None (and prints why) if either file is missing, in which case
+    callers should skip geo filtering.
+    """
+
+    global _area
+
+    if _area is not None:
+        return _area or None
+
+    if not (os.path.exists(BOUNDARY_FILE) and os.path.exists(POSTCODE_FILE)):
+        print(f"   ⚠️  Geo filter off: needs {BOUNDARY_FILE} and {POSTCODE_FILE}")
+        _area = {}
+        return None
+
+    boundary = load_boundary(BOUNDARY_FILE)
+    postcodes = load_postcodes(POSTCODE_FILE)
+
+    # Precompute which postcodes fall inside, so filtering is a set lookup
+    in_area = {pc for pc, (lon, lat) in postcodes.items() if boundary.contains(lon, lat)}
+
+    _area = {"boundary": boundary, "postcodes": postcodes, "in_area": in_area}
+
+    print(f"   🗺️  Geo filter: {len(in_area)} of {len(postcodes)} postcodes inside the OPDC boundary")
+
+    return _area
+
+
+def in_area_sectors():
+    """Postcode sectors (e.g. "NW10 6") that contain at least one in-area postcode"""
+
+    area = load_area()
+    if not area:
+        return []
+    return sorted({pc[:-2] for pc in area["in_area"]})
+
+
+def locate(application):
+    """Return (lon, lat) for an application from its coordinates, postcode or address, or None"""
+
+    area = load_area()
+
+    if application.get('longitude') is not None and application.get('latitude') is not None:
+        return float(application['longitude']), float(application['latitude'])
+
+    if not area:
+        return None
+
+    postcode = normalize_postcode(application.get('postcode') or application.get('address') or application.get('title'))
+    return area["postcodes"].get(postcode)
+
+
+def filter_applications(applications, keep_unknown=True):
+    """
+    Keep applications inside the OPDC boundary.
+
+    Applications that cannot be located are kept (and marked
+    geo_status="unknown") unless keep_unknown is False. With no geo data
+    available, applications are returned unchanged.
+    """
+
+    area = load_area()
+    if not area:
+        return applications
+
+    kept = []
+    outside = 0
+
+    for application in applications:
+        postcode = normalize_postcode(application.get('postcode') or application.get('address') or application.get('title'))
+
+        if postcode in area["postcodes"]:
+            inside = postcode in area["in_area"]
+        else:
+            point = locate(application)
+            if point is None:
+                application['geo_status'] = "unknown"
+                if keep_unknown:
+                    kept.append(application)
+                continue
+            inside = area["boundary"].contains(*point)
+
+        if inside:
+            application['geo_status'] = "inside"
+            kept.append(application)
+        else:
+            outside += 1
+
+    print(f"   🗺️  Geo filter kept {len(kept)}/{len(applications)} applications ({outside} outside the boundary)")
+
+    return kept
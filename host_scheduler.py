@@ -0,0 +1,221 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from instrumentation import increment
+
+# Per-host politeness for every scrape and feed fetch: each host gets its own
+# queue with a minimum interval between requests and a connection cap, and
+# robots.txt Crawl-delay is honoured. Different hosts never wait on each other.
+USER_AGENT = "OldOakContentAgent/1.0 (+https://oldoaktown.com)"
+HOST_MIN_INTERVAL = float(os.environ.get("HOST_MIN_INTERVAL", "1.0"))
+HOST_CONCURRENCY = int(os.environ.get("HOST_CONCURRENCY", "2"))
+
+# Ignore robots.txt crawl delays longer than this rather than stall the run
+MAX_CRAWL_DELAY = 30
+
+# Recorded HTTP responses for offline runs (see dry_run.py):
+#   record  - make real requests and save each response
+#   replay  - serve saved responses, fetching live on a miss
+#   offline - serve saved responses only; a miss returns status 599
+HTTP_FIXTURES_DIR = os.environ.get("HTTP_FIXTURES_DIR", "fixtures/http")
+HTTP_FIXTURES_MODE = os.environ.get("HTTP_FIXTURES_MODE", "")
+
+_hosts = {}
+_lock = threading.Lock()
+
+
+def _robots_delay(scheme, host):
+    """Crawl-delay (or request-rate) from the host's robots.txt, or None"""
+
+    parser = RobotFileParser()
+    try:
+        response = requests.get(f"{scheme}://{host}/robots.txt", timeout=10, headers={"User-Agent": USER_AGENT})
+        if response.status_code != 200:
+            return None
+        parser.parse(response.text.splitlines())
+    except Exception:
+        return None
+
+    delay = parser.crawl_delay(USER_AGENT)
+    rate = parser.request_rate(USER_AGENT)
+    if delay is None and rate is not None and rate.requests:
+        delay = rate.seconds / rate.requests
+
+    return float(delay) if delay is not None else None
+
+
+def _host(url):
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+
+    with _lock:
+        if host not in _hosts:
+            _hosts[host] = {
+                "slots": threading.BoundedSemaphore(HOST_CONCURRENCY),
+                "lock": threading.Lock(),
+                "interval": None,
+                "next_at": 0.0,
+                "requests": 0,
+                "waited_s": 0.0
+            }
+        state = _hosts[host]
+
+    # Look up robots.txt once per host, on first use
+    with state["lock"]:
+        if state["interval"] is None:
+            delay = _robots_delay(parsed.scheme or "https", host)
+            state["interval"] = max(HOST_MIN_INTERVAL, min(delay or 0, MAX_CRAWL_DELAY))
+            if delay and delay > HOST_MIN_INTERVAL:
+                print(f"   🤖 {host}: robots.txt crawl-delay {delay:g}s")
+
+    return host, state
+
+
+def set_fixtures_mode(mode, directory=None):
+    """Switch HTTP fixture recording/replay on ("record", "replay", "offline") or off ("")"""
+
+    global HTTP_FIXTURES_MODE, HTTP_FIXTURES_DIR
+
+    HTTP_FIXTURES_MODE = mode
+    if directory:
+        HTTP_FIXTURES_DIR = directory
+
+
+def _fixture_path(method, url, kwargs):
+    key = json.dumps([method.upper(), url, kwargs.get("data"), kwargs.get("params")], sort_keys=True, default=str)
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+    return os.path.join(HTTP_FIXTURES_DIR, f"{digest}.json.gz")
+
+
+def _load_fixture(path):
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            saved = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    content = saved["content"].encode('latin-1')
+    return SimpleNamespace(
+        status_code=saved["status_code"],
+        url=saved["url"],
+        headers=saved["headers"],
+        content=content,
+        text=content.decode(saved.get("encoding") or 'utf-8', errors='replace')
+    )
+
+
+def _save_fixture(path, response):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump({
+            "status_code": response.status_code,
+            "url": response.url,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            # latin-1 round-trips arbitrary bytes through JSON
+            "content": response.content.decode('latin-1')
+        }, f)
+
+
+def polite_request(method, url, session=None, **kwargs):
+    """
+    Make an HTTP request once the host's queue allows it.
+
+    Waits for one of the host's HOST_CONCURRENCY connection slots and for
+    its minimum interval since the previous request started. With
+    stream=True the slot is held until the response is closed, so callers
+    must close it. With HTTP_FIXTURES_MODE set, responses are recorded or
+    replayed instead.
+    """
+
+    if HTTP_FIXTURES_MODE in ("replay", "offline"):
+        fixture = _load_fixture(_fixture_path(method, url, kwargs))
+        if fixture is not None:
+            increment("http_fixture_total", result="hit")
+            return fixture
+        increment("http_fixture_total", result="miss")
+        if HTTP_FIXTURES_MODE == "offline":
+            return SimpleNamespace(status_code=599, url=url, headers={}, content=b'', text='')
+
+    response = _live_request(method, url, session, **kwargs)
+
+    if HTTP_FIXTURES_MODE == "record":
+        _save_fixture(_fixture_path(method, url, kwargs), response)
+
+    return response
+
+
+def _live_request(method, url, session=None, **kwargs):
+    host, state = _host(url)
+    kwargs.setdefault("timeout", 30)
+    headers = kwargs.pop("headers", None) or {}
+    headers.setdefault("User-Agent", USER_AGENT)
+
+    state["slots"].acquire()
+    try:
+        # Reserve the next start time for this host, then sleep outside the lock
+        with state["lock"]:
+            now = time.monotonic()
+            start_at = max(now, state["next_at"])
+            state["next_at"] = start_at + state["interval"]
+            state["requests"] += 1
+            state["waited_s"] += start_at - now
+
+        if start_at > now:
+            time.sleep(start_at - now)
+
+        increment("host_requests_total", host=host)
+        response = (session or requests).request(method, url, headers=headers, **kwargs)
+    except BaseException:
+        state["slots"].release()
+        raise
+
+    if kwargs.get("stream"):
+        # The body is still being downloaded: keep the slot until the caller closes the response
+        _release_on_close(response, state["slots"])
+    else:
+        state["slots"].release()
+
+    return response
+
+
+def _release_on_close(response, slots):
+    close = response.close
+    # One-shot: concurrent closes (caller and session teardown) release the slot once
+    release_once = threading.Lock()
+
+    def _close():
+        try:
+            close()
+        finally:
+            if release_once.acquire(blocking=False):
+                slots.release()
+
+    response.close = _close
+
+
+def polite_get(url, session=None, **kwargs):
+    return polite_request("GET", url, session=session, **kwargs)
+
+
+def host_stats():
+    """Requests made and seconds spent queueing, per host"""
+
+    with _lock:
+        return {
+            host: {
+                "requests": state["requests"],
+                "interval_s": state["interval"],
+                "waited_s": round(state["waited_s"], 2)
+            }
+            for host, state in _hosts.items()
+        }
@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# Run-wide metrics shared by content discovery, RSS monitor and planning scraper
+_lock = threading.Lock()
+_local = threading.local()
+_run = {}
+
+
+def start_run(name="content_discovery"):
+    """Start a fresh metrics run, discarding any previously recorded spans"""
+
+    global _run
+
+    with _lock:
+        _run = {
+            "run": name,
+            "started_at": datetime.now().isoformat(),
+            "_start": time.perf_counter(),
+            "spans": [],
+            "counters": {},
+            "gauges": {}
+        }
+
+    return _run
+
+
+def _current_run():
+    if not _run:
+        start_run()
+    return _run
+
+
+@contextmanager
+def span(name, stage=None, **attributes):
+    """
+    Time a stage or external call and record it on the current run.
+
+    Yields the span record so callers can add bytes, tokens and retries
+    while the call is in progress.
+    """
+
+    run = _current_run()
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+
+    parent = stack[-1] if stack else None
+
+    record = {
+        "name": name,
+        "stage": stage or (parent["stage"] if parent else name),
+        "parent": parent["name"] if parent else None,
+        "parent_stage": parent["stage"] if parent else None,
+        "started_at": datetime.now().isoformat(),
+        "wall_time_s": 0.0,
+        "bytes": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "cache_read_tokens": 0,
+        "cache_write_tokens": 0,
+        "retries": 0,
+        "status": "ok",
+        "attributes": dict(attributes)
+    }
+
+    stack.append(record)
+    start = time.perf_counter()
+
+    try:
+        yield record
+    except Exception as e:
+        record["status"] = "error"
+        record["error"] = str(e)[:200]
+        raise
+    finally:
+        record["wall_time_s"] = round(time.perf_counter() - start, 4)
+        stack.pop()
+        with _lock:
+            run["spans"].append(record)
+
+
+def current_span():
+    """Return the innermost open span on this thread, if any"""
+
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+@contextmanager
+def attach(record):
+    """Nest spans opened on a worker thread under a span from another thread"""
+
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+
+    if record is None:
+        yield
+        return
+
+    stack.append(record)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def record_usage(record, usage):
+    """Add token usage from an Anthropic or OpenAI-style usage payload to a span"""
+
+    if record is None or usage is None:
+        return
+
+    def _get(key):
+        if isinstance(usage, dict):
+            return usage.get(key) or 0
+        return getattr(usage, key, 0) or 0
+
+    record["input_tokens"] += _get("input_tokens") or _get("prompt_tokens")
+    record["output_tokens"] += _get("output_tokens") or _get("completion_tokens")
+    record["cache_read_tokens"] += _get("cache_read_input_tokens")
+    record["cache_write_tokens"] += _get("cache_creation_input_tokens")
+
+
+def increment(name, value=1, **labels):
+    """Increment a run counter, optionally split by labels"""
+
+    run = _current_run()
+    key = _metric_key(name, labels)
+
+    with _lock:
+        run["counters"][key] = run["counters"].get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    """Set a run gauge, optionally split by labels"""
+
+    run = _current_run()
+
+    with _lock:
+        run["gauges"][_metric_key(name, labels)] = value
+
+
+def _metric_key(name, labels):
+    if not labels:
+        return name
+    label_text = ",".join(f'{k}="{_escape_label(labels[k])}"' for k in sorted(labels))
+    return f"{name}{{{label_text}}}"
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def get_run_metrics():
+    """Return the current run's spans plus per-stage totals"""
+
+    run = _current_run()
+
+    with _lock:
+        spans = list(run["spans"])
+        counters = dict(run["counters"])
+        gauges = dict(run["gauges"])
+
+    stages = {}
+    for record in spans:
+        # Nested spans are already counted in their parent's wall time
+        stage = stages.setdefault(record["stage"], {
+            "calls": 0,
+            "wall_time_s": 0.0,
+            "bytes": 0,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "cache_read_tokens": 0,
+            "cache_write_tokens": 0,
+            "retries": 0,
+            "errors": 0
+        })
+        stage["calls"] += 1
+        if record["parent_stage"] != record["stage"]:
+            stage["wall_time_s"] = round(stage["wall_time_s"] + record["wall_time_s"], 4)
+        stage["bytes"] += record["bytes"]
+        stage["input_tokens"] += record["input_tokens"]
+        stage["output_tokens"] += record["output_tokens"]
+        stage["cache_read_tokens"] += record["cache_read_tokens"]
+        stage["cache_write_tokens"] += record["cache_write_tokens"]
+        stage["retries"] += record["retries"]
+        if record["status"] != "ok":
+            stage["errors"] += 1
+
+    for stage in stages.values():
+        stage["cache_hit_ratio"] = cache_hit_ratio(stage)
+
+    totals = {
+        "input_tokens": sum(s["input_tokens"] for s in spans),
+        "output_tokens": sum(s["output_tokens"] for s in spans),
+        "cache_read_tokens": sum(s["cache_read_tokens"] for s in spans),
+        "cache_write_tokens": sum(s["cache_write_tokens"] for s in spans),
+        "bytes": sum(s["bytes"] for s in spans),
+        "retries": sum(s["retries"] for s in spans),
+        "errors": sum(1 for s in spans if s["status"] != "ok")
+    }
+    totals["cache_hit_ratio"] = cache_hit_ratio(totals)
+
+    return {
+        "run": run["run"],
+        "started_at": run["started_at"],
+        "total_wall_time_s": round(time.perf_counter() - run["_start"], 4),
+        "totals": totals,
+        "stages": stages,
+        "counters": counters,
+        "gauges": gauges,
+        "spans": spans
+    }
+
+
+def cache_hit_ratio(totals):
+    """Share of prompt tokens served from the prompt cache"""
+
+    prompt_tokens = totals["input_tokens"] + totals["cache_read_tokens"] + totals["cache_write_tokens"]
+    if not prompt_tokens:
+        return None
+    return round(totals["cache_read_tokens"] / prompt_tokens, 3)
+
+
+def save_run_metrics(timestamp):
+    """Save run metrics as JSON next to the review for the given timestamp"""
+
+    os.makedirs("reviews", exist_ok=True)
+    metrics = get_run_metrics()
+    metrics_filename = f"reviews/review_{timestamp}_metrics.json"
+
+    with open(metrics_filename, 'w') as f:
+        json.dump(metrics, f, indent=2)
+
+    print(f"⏱️  Saved run metrics: {metrics_filename}")
+
+    return metrics_filename
+
+
+def print_run_summary():
+    """Print a short per-stage timing and token summary"""
+
+    metrics = get_run_metrics()
+
+    print(f"\n⏱️  Run timing ({metrics['total_wall_time_s']:.1f}s total):")
+    for stage, totals in metrics["stages"].items():
+        line = (f"   {stage}: {totals['calls']} calls, {totals['wall_time_s']:.1f}s, "
+                f"{totals['input_tokens']} in / {totals['output_tokens']} out tokens")
+        if totals["cache_hit_ratio"] is not None and (totals["cache_read_tokens"] or totals["cache_write_tokens"]):
+            line += f", cache hit {totals['cache_hit_ratio']:.0%}"
+        print(line)
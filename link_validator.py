@@ -0,0 +1,204 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from host_scheduler import USER_AGENT
+from instrumentation import attach, current_span, increment, span
+from urls import canonical_url, strip_tracking
+
+# Link resolution for curated items before the review is published: strip
+# tracking parameters, follow redirects to the final URL and flag links that
+# are dead or obviously made up. Every link is checked at once through one
+# pooled session, so a whole review takes about as long as its slowest link.
+LINK_CACHE_FILE = os.environ.get("LINK_CACHE_FILE", ".cache/links/links.json")
+# Good results are trusted for a week; failures are retried on the next run
+LINK_CACHE_TTL_HOURS = float(os.environ.get("LINK_CACHE_TTL_HOURS", "168"))
+LINK_FAILURE_TTL_HOURS = float(os.environ.get("LINK_FAILURE_TTL_HOURS", "12"))
+LINK_TIMEOUT = float(os.environ.get("LINK_TIMEOUT", "10"))
+LINK_WORKERS = int(os.environ.get("LINK_WORKERS", "16"))
+
+# Sites that refuse HEAD requests or bots still serve the page to readers
+BLOCKED_STATUSES = {401, 403, 405, 429, 999}
+PLACEHOLDER_HOSTS = {'example.com', 'example.org', 'example.net', 'localhost', 'url', 'link'}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _pooled_session():
+    """One keep-alive session shared by every check, sized for LINK_WORKERS threads"""
+
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=LINK_WORKERS, pool_maxsize=LINK_WORKERS)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+            _session.headers["User-Agent"] = USER_AGENT
+        return _session
+
+
+def _host(parsed):
+    host = parsed.netloc.lower().split(':')[0]
+    return host[4:] if host.startswith('www.') else host
+
+
+def is_placeholder(url):
+    """True for missing, relative or template URLs that cannot be a real article"""
+
+    parsed = urlparse((url or '').strip())
+    host = _host(parsed)
+
+    return (parsed.scheme not in ('http', 'https') or '.' not in host or host in PLACEHOLDER_HOSTS
+            or any(marker in url for marker in ('...', '[', ']', '{', '}', ' ')))
+
+
+def load_link_cache(path=LINK_CACHE_FILE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_link_cache(cache, path=LINK_CACHE_FILE):
+    """Atomically write the cache, without entries past their TTL"""
+
+    now = time.time()
+    cache = {key: entry for key, entry in cache.items() if _is_fresh(entry, now)}
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def _is_fresh(entry, now=None):
+    ttl = LINK_CACHE_TTL_HOURS if entry.get('status') in ('ok', 'redirected', 'blocked') else LINK_FAILURE_TTL_HOURS
+    return (now or time.time()) - entry.get('checked_at', 0) < ttl * 3600
+
+
+def is_soft_404(url, final_url):
+    """
+    True when a deep link lands on a site's home page or on another host -
+    how many sites answer a made-up article URL instead of returning 404
+    """
+
+    original, final = urlparse(url), urlparse(final_url)
+    if original.path.strip('/') == '':
+        return False
+    return final.path.strip('/') == '' or _host(final) != _host(original)
+
+
+def check_link(url, parent_span=None):
+    """
+    Resolve one URL: HEAD first, GET when the site refuses HEAD.
+
+    Returns {"status", "status_code", "final_url", "checked_at"} where status
+    is "ok", "redirected", "suspect" (redirected to a home page or another
+    host, see is_soft_404), "blocked" (the site refuses automated checks, the
+    link is kept), "dead" (4xx/5xx) or "unreachable" (DNS, TLS or timeout).
+    """
+
+    session = _pooled_session()
+
+    with attach(parent_span), span("link.check", stage="links", url=url) as check_span:
+        try:
+            response = session.head(url, allow_redirects=True, timeout=LINK_TIMEOUT)
+            if response.status_code in BLOCKED_STATUSES or response.status_code >= 500:
+                response = session.get(url, allow_redirects=True, timeout=LINK_TIMEOUT, stream=True)
+                response.close()
+        except requests.RequestException as e:
+            check_span["attributes"]["error"] = type(e).__name__
+            return {"status": "unreachable", "status_code": None, "final_url": url, "checked_at": time.time()}
+
+        code = response.status_code
+        final_url = strip_tracking(response.url or url)
+        check_span["attributes"]["status_code"] = code
+
+    if code in BLOCKED_STATUSES:
+        status = "blocked"
+    elif code >= 400:
+        status = "dead"
+    elif canonical_url(final_url) == canonical_url(url):
+        status = "ok"
+    elif is_soft_404(url, final_url):
+        status = "suspect"
+    else:
+        status = "redirected"
+
+    return {"status": status, "status_code": code, "final_url": final_url, "checked_at": time.time()}
+
+
+def validate_links(items, cache_path=LINK_CACHE_FILE):
+    """
+    Canonicalize and check the url of every item in place.
+
+    Each item gets 'link_status'; redirected links are replaced by their
+    final URL (the original is kept in 'original_url'), suspect ones are
+    left as they are for a person to check. Returns counts per status.
+    """
+
+    cache = load_link_cache(cache_path)
+    wanted = {}
+
+    for item in items:
+        url = strip_tracking(item.get('url') or '')
+        if is_placeholder(url):
+            continue
+        key = canonical_url(url)
+        entry = cache.get(key)
+        if entry is None or not _is_fresh(entry):
+            wanted.setdefault(key, url)
+
+    parent_span = current_span()
+    with ThreadPoolExecutor(max_workers=LINK_WORKERS) as executor:
+        for key, result in zip(wanted, executor.map(lambda url: check_link(url, parent_span), wanted.values())):
+            cache[key] = result
+
+    counts = {}
+    for item in items:
+        original = item.get('url') or ''
+        url = strip_tracking(original)
+
+        if is_placeholder(url):
+            status, final_url = "placeholder", original
+        else:
+            entry = cache[canonical_url(url)]
+            status = entry["status"]
+            final_url = entry["final_url"] if status in ("ok", "redirected") else url
+
+        if final_url != original:
+            item['original_url'] = original
+            item['url'] = final_url
+        item['link_status'] = status
+        counts[status] = counts.get(status, 0) + 1
+        increment("link_checks_total", status=status)
+
+    try:
+        save_link_cache(cache, cache_path)
+    except OSError as e:
+        print(f"   ⚠️  Link cache not saved: {str(e)[:80]}")
+
+    print(f"   🔗 Links: {len(wanted)} checked live, the rest cached or skipped - "
+          + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())))
+
+    return counts
+
+
+def is_flagged(item):
+    """True for items whose link should be fixed before publishing"""
+
+    return item.get('link_status') in ("dead", "suspect", "unreachable", "placeholder")
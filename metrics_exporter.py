@@ -0,0 +1,164 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from instrumentation import get_run_metrics
+
+# Optional Prometheus/OpenMetrics surface for discovery run metrics.
+# Enable with METRICS_TEXTFILE (node_exporter textfile collector path,
+# Prometheus text format) and/or METRICS_PORT (local /metrics endpoint,
+# OpenMetrics).
+METRIC_PREFIX = "oldoak_"
+LATENCY_BUCKETS = [0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300]
+
+_server = None
+
+
+def render_metrics(metrics=None, openmetrics=False):
+    """
+    Render run metrics in Prometheus text exposition format, or OpenMetrics.
+
+    The two differ only in counter family names (OpenMetrics drops the
+    _total suffix from # TYPE lines) and the trailing # EOF that OpenMetrics
+    requires and the Prometheus text parser rejects.
+    """
+
+    if metrics is None:
+        metrics = get_run_metrics()
+
+    lines = []
+
+    def _family(name, metric_type, help_text):
+        lines.append(f"# HELP {METRIC_PREFIX}{name} {help_text}")
+        lines.append(f"# TYPE {METRIC_PREFIX}{name} {metric_type}")
+
+    # Run-level gauges
+    _family("run_duration_seconds", "gauge", "Wall time of the discovery run so far")
+    lines.append(f"{METRIC_PREFIX}run_duration_seconds {metrics['total_wall_time_s']}")
+
+    _family("run_tokens", "gauge", "Tokens used by the run")
+    lines.append(f'{METRIC_PREFIX}run_tokens{{direction="input"}} {metrics["totals"]["input_tokens"]}')
+    lines.append(f'{METRIC_PREFIX}run_tokens{{direction="output"}} {metrics["totals"]["output_tokens"]}')
+    lines.append(f'{METRIC_PREFIX}run_tokens{{direction="cache_read"}} {metrics["totals"]["cache_read_tokens"]}')
+    lines.append(f'{METRIC_PREFIX}run_tokens{{direction="cache_write"}} {metrics["totals"]["cache_write_tokens"]}')
+
+    _family("prompt_cache_hit_ratio", "gauge", "Share of prompt tokens read from the prompt cache")
+    lines.append(f"{METRIC_PREFIX}prompt_cache_hit_ratio {metrics['totals']['cache_hit_ratio'] or 0}")
+
+    # Per-stage gauges
+    _family("stage_duration_seconds", "gauge", "Wall time spent in each stage")
+    for stage, totals in metrics["stages"].items():
+        lines.append(f'{METRIC_PREFIX}stage_duration_seconds{{stage="{stage}"}} {totals["wall_time_s"]}')
+
+    _family("stage_errors", "gauge", "Failed calls in each stage")
+    for stage, totals in metrics["stages"].items():
+        lines.append(f'{METRIC_PREFIX}stage_errors{{stage="{stage}"}} {totals["errors"]}')
+
+    # Latency histograms per span name
+    _family("call_duration_seconds", "histogram", "Latency of searches, fetches and curation calls")
+    by_name = {}
+    for record in metrics["spans"]:
+        by_name.setdefault(record["name"], []).append(record["wall_time_s"])
+
+    for name, durations in sorted(by_name.items()):
+        for bucket in LATENCY_BUCKETS:
+            count = sum(1 for d in durations if d <= bucket)
+            lines.append(f'{METRIC_PREFIX}call_duration_seconds_bucket{{name="{name}",le="{bucket}"}} {count}')
+        lines.append(f'{METRIC_PREFIX}call_duration_seconds_bucket{{name="{name}",le="+Inf"}} {len(durations)}')
+        lines.append(f'{METRIC_PREFIX}call_duration_seconds_sum{{name="{name}"}} {round(sum(durations), 4)}')
+        lines.append(f'{METRIC_PREFIX}call_duration_seconds_count{{name="{name}"}} {len(durations)}')
+
+    # Counters and gauges recorded by the pipeline (already in name{labels} form)
+    _emit_recorded(lines, metrics["counters"], "counter", openmetrics)
+    _emit_recorded(lines, metrics["gauges"], "gauge", openmetrics)
+
+    if openmetrics:
+        lines.append("# EOF")
+
+    return "\n".join(lines) + "\n"
+
+
+def _emit_recorded(lines, values, metric_type, openmetrics):
+    families = {}
+    for key, value in values.items():
+        name = key.split("{", 1)[0]
+        families.setdefault(name, []).append((key, value))
+
+    for name, samples in sorted(families.items()):
+        family = name[:-len("_total")] if openmetrics and metric_type == "counter" and name.endswith("_total") else name
+        lines.append(f"# TYPE {METRIC_PREFIX}{family} {metric_type}")
+        for key, value in sorted(samples):
+            lines.append(f"{METRIC_PREFIX}{key} {value}")
+
+
+def write_textfile(path):
+    """Atomically write metrics for the node_exporter textfile collector (Prometheus text format)"""
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(render_metrics())
+    os.replace(tmp_path, path)
+
+    print(f"📈 Wrote metrics: {path}")
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path.rstrip('/') not in ('/metrics', ''):
+            self.send_response(404)
+            self.end_headers()
+            return
+
+        body = render_metrics(openmetrics=True).encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """Serve live run metrics on http://host:port/metrics from a background thread"""
+
+    global _server
+
+    if _server is not None:
+        return _server
+
+    _server = HTTPServer((host, port), _MetricsHandler)
+    thread = threading.Thread(target=_server.serve_forever, daemon=True)
+    thread.start()
+
+    print(f"📈 Serving metrics on http://{host}:{port}/metrics")
+
+    return _server
+
+
+def start_from_env():
+    """Start the HTTP endpoint if METRICS_PORT is set"""
+
+    port = os.environ.get("METRICS_PORT")
+    if port:
+        try:
+            start_http_server(int(port))
+        except Exception as e:
+            print(f"⚠️  Metrics endpoint not started: {str(e)[:100]}")
+
+
+def export_from_env():
+    """Write the textfile if METRICS_TEXTFILE is set"""
+
+    path = os.environ.get("METRICS_TEXTFILE")
+    if path:
+        try:
+            write_textfile(path)
+        except Exception as e:
+            print(f"⚠️  Metrics textfile not written: {str(e)[:100]}")
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from budget import charge
+from instrumentation import attach, current_span, increment, record_usage, set_gauge, span
+from run_checkpoints import load_checkpoint, save_checkpoint
+
+# Two-tier model cascade: a small model triages every curation input and gives
+# it a rough 0-10 score, and only inputs at or above the escalation threshold
+# go on to full curation with the large model. Enabled with CURATION_CASCADE=1.
+CASCADE_MODEL = os.environ.get("CASCADE_MODEL", "claude-3-5-haiku-20241022")
+CASCADE_ESCALATE_SCORE = float(os.environ.get("CASCADE_ESCALATE_SCORE", "5"))
+# Input sources that are triaged; the rest always go to the large model.
+# Search answers hold several stories each, so they are escalated by default.
+CASCADE_SOURCES = [s.strip() for s in os.environ.get("CASCADE_SOURCES", "rss,planning").split(",") if s.strip()]
+# Inputs per triage call, characters of each input shown to the small model
+CASCADE_BATCH_SIZE = int(os.environ.get("CASCADE_BATCH_SIZE", "10"))
+CASCADE_INPUT_CHARS = 1200
+CASCADE_WORKERS = int(os.environ.get("CASCADE_WORKERS", "4"))
+
+TRIAGE_TOOL = {
+    "name": "record_triage",
+    "description": "Record a relevance score for every numbered input.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "index": {"type": "integer", "description": "Number of the input"},
+                        "score": {"type": "number", "minimum": 0, "maximum": 10},
+                        "reason": {"type": "string", "description": "A few words on why"}
+                    },
+                    "required": ["index", "score"]
+                }
+            }
+        },
+        "required": ["results"]
+    }
+}
+
+TRIAGE_INSTRUCTIONS = """You triage inputs for Old Oak Town, a hyperlocal news platform covering Old Oak Common, Park Royal, and the HS2 development area in West London.
+
+For each numbered input, give a rough score from 0 to 10 for how likely it is to contain a newsworthy story for local readers:
+- 0-2: not about the area, or not news (adverts, national stories, routine notices)
+- 3-4: loosely related, probably not worth a story
+- 5-7: a local story worth curating
+- 8-10: a major local story (big developments, HS2 milestones, decisions affecting residents)
+
+When unsure, score higher rather than lower. Record every input with the record_triage tool."""
+
+_lock = threading.Lock()
+_stats = {}
+
+
+def start_cascade():
+    """Reset escalation statistics for a new run"""
+
+    global _stats
+
+    with _lock:
+        _stats = {"triaged": 0, "escalated": 0, "dropped": 0, "passed_through": 0, "failed": 0, "calls": 0, "by_source": {}}
+
+    return _stats
+
+
+def _current_stats():
+    if not _stats:
+        start_cascade()
+    return _stats
+
+
+def input_source(result):
+    """"rss", "planning" or "search" for one curation input"""
+
+    source = result['results'].get('source') if isinstance(result.get('results'), dict) else None
+    return source if source in ("rss", "planning") else "search"
+
+
+def _count(source, outcome, value=1):
+    stats = _current_stats()
+    with _lock:
+        stats[outcome] += value
+        by_source = stats["by_source"].setdefault(source, {"triaged": 0, "escalated": 0, "dropped": 0, "passed_through": 0})
+        if outcome in by_source:
+            by_source[outcome] += value
+    increment("cascade_inputs_total", value, source=source, outcome=outcome)
+
+
+def build_triage_request(batch):
+    """Messages API arguments for triaging one batch of curation inputs"""
+
+    inputs = []
+    for number, result in enumerate(batch, 1):
+        content = result['results'].get('content', '') if isinstance(result['results'], dict) else str(result['results'])
+        inputs.append(f"[{number}] {result['query']}\n{content[:CASCADE_INPUT_CHARS]}\n")
+
+    return {
+        "model": CASCADE_MODEL,
+        "max_tokens": 100 + 60 * len(batch),
+        "tools": [TRIAGE_TOOL],
+        "tool_choice": {"type": "tool", "name": TRIAGE_TOOL["name"]},
+        "system": TRIAGE_INSTRUCTIONS,
+        "messages": [{
+            "role": "user",
+            "content": "Score these inputs:\n\n" + "\n".join(inputs)
+        }]
+    }
+
+
+def _triage_batch(client, batch, run_id, parent_span):
+    """Scores for one batch, in order; None where the small model gave no score"""
+
+    request = build_triage_request(batch)
+    stage = f"triage_{hashlib.sha256(json.dumps(request['messages'], sort_keys=True).encode('utf-8')).hexdigest()[:10]}"
+    checkpoint = load_checkpoint(run_id, stage)
+    if checkpoint is not None:
+        return checkpoint
+
+    with attach(parent_span), span("claude.triage", stage="cascade", model=CASCADE_MODEL, inputs=len(batch)) as call_span:
+        response = client.messages.create(**request)
+        record_usage(call_span, response.usage)
+        charge("triage", CASCADE_MODEL, response.usage, record=call_span)
+
+    with _lock:
+        _current_stats()["calls"] += 1
+
+    scores = [None] * len(batch)
+    for block in response.content:
+        if block.type == "tool_use" and block.name == TRIAGE_TOOL["name"] and isinstance(block.input, dict):
+            for entry in block.input.get("results", []):
+                try:
+                    index = int(entry.get("index")) - 1
+                    score = float(entry.get("score"))
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= index < len(batch):
+                    scores[index] = {"score": score, "reason": entry.get("reason", "")}
+
+    save_checkpoint(run_id, stage, scores)
+    return scores
+
+
+def triage_results(client, all_search_results, run_id=None, threshold=None):
+    """
+    Triage curation inputs with the small model and return those worth escalating.
+
+    Inputs from sources outside CASCADE_SOURCES pass straight through. Each
+    triaged input gets a 'triage_score'; those below the threshold are
+    dropped. If a triage call fails, or an input gets no score, the input is
+    escalated, so a triage problem never loses a story.
+    """
+
+    threshold = CASCADE_ESCALATE_SCORE if threshold is None else threshold
+    _current_stats()["threshold"] = threshold
+    to_triage = [r for r in all_search_results if input_source(r) in CASCADE_SOURCES]
+
+    for result in all_search_results:
+        # Drop scores from an earlier triage (e.g. archived runs being backfilled)
+        result.pop('triage_score', None)
+        result.pop('triage_reason', None)
+        if input_source(result) not in CASCADE_SOURCES:
+            _count(input_source(result), "passed_through")
+
+    if not to_triage:
+        return list(all_search_results)
+
+    batches = [to_triage[i:i + CASCADE_BATCH_SIZE] for i in range(0, len(to_triage), CASCADE_BATCH_SIZE)]
+    parent_span = current_span()
+
+    def _triage(batch):
+        try:
+            return _triage_batch(client, batch, run_id, parent_span)
+        except Exception as e:
+            print(f"   ⚠️  Triage call failed, escalating {len(batch)} inputs: {str(e)[:80]}")
+            with _lock:
+                _current_stats()["failed"] += len(batch)
+            return [None] * len(batch)
+
+    with ThreadPoolExecutor(max_workers=CASCADE_WORKERS) as executor:
+        for batch, scores in zip(batches, executor.map(_triage, batches)):
+            for result, triage in zip(batch, scores):
+                source = input_source(result)
+                _count(source, "triaged")
+                if triage is None:
+                    _count(source, "escalated")
+                    continue
+                result['triage_score'] = triage["score"]
+                result['triage_reason'] = triage["reason"]
+                _count(source, "escalated" if triage["score"] >= threshold else "dropped")
+
+    escalated = [r for r in all_search_results if r.get('triage_score') is None or r['triage_score'] >= threshold]
+
+    stats = _current_stats()
+    if stats["triaged"]:
+        set_gauge("cascade_escalation_rate", round(stats["escalated"] / stats["triaged"], 3))
+    print(f"   🪜 Triage ({CASCADE_MODEL}): {stats['escalated']}/{stats['triaged']} inputs escalated at "
+          f"{threshold:g}+, {stats['dropped']} dropped, {stats['passed_through']} sent straight to curation")
+
+    return escalated
+
+
+def cascade_summary():
+    stats = _current_stats()
+    return {
+        "model": CASCADE_MODEL,
+        "threshold": stats.get("threshold", CASCADE_ESCALATE_SCORE),
+        **{key: value for key, value in stats.items() if key not in ("by_source", "threshold")},
+        "escalation_rate": round(stats["escalated"] / stats["triaged"], 3) if stats["triaged"] else None,
+        "by_source": stats["by_source"]
+    }
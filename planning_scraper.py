@@ -1,117 +1,130 @@
-import requests
+import re
 from bs4 import BeautifulSoup
-import time
-from datetime import datetime, timedelta
 
-def scrape_ealing_planning():
-    """Scrape Ealing Council planning applications for Old Oak area"""
+from planning_sources import (
+    crawl_sources, fetch, idox_fetcher, make_application, register_source
+)
+from planning_store import record_changes
 
-    print("📋 Checking Ealing Council planning applications...")
+try:
+    from geo_filter import filter_applications, in_area_sectors
+    GEO_AVAILABLE = True
+except ImportError:
+    GEO_AVAILABLE = False
 
-    # Old Oak area postcodes
-    postcodes = ["W3", "W12", "NW10"]
+# Councils whose planning portals cover part of the Old Oak area, with the
+# postcode districts searched in each
+COUNCIL_PORTALS = {
+    "Ealing": ("https://pam.ealing.gov.uk/online-applications", ["W3", "W12", "NW10"]),
+    "Hammersmith & Fulham": ("https://public-access.lbhf.gov.uk/online-applications", ["W12", "NW10"]),
+    "Brent": ("https://pa.brent.gov.uk/online-applications", ["NW10"])
+}
 
-    all_applications = []
+OPDC_URL = "https://opdc.london.gov.uk/planning/planning-applications"
+# 21/0144/FUMOPDC (OPDC), 2024/01234/FUL (H&F), and council-prefixed P/2024/1234 (Brent)
+REFERENCE_PATTERN = re.compile(r"\b(?:[A-Z]{1,3}/\d{4}/\d{3,6}|\d{2,4}/\d{3,6}/[A-Z]{2,10})\b", re.IGNORECASE)
 
-    # Note: This is a simplified version - real implementation would need
-    # to handle the actual Ealing planning portal structure
-    base_url = "https://pam.ealing.gov.uk/online-applications"
 
-    for postcode in postcodes:
-        try:
-            print(f"   Searching postcode {postcode}...")
+def council_search_terms(districts):
+    """
+    Postcode search terms for a council - narrowed to the postcode sectors
+    that actually fall inside the OPDC boundary when local geo data is available
+    """
 
-            # In a real implementation, you'd construct proper search URL
-            # and parse the results. This is a template:
+    if GEO_AVAILABLE:
+        sectors = [sector for sector in in_area_sectors() if sector.split()[0] in districts]
+        if sectors:
+            return sectors
+    return districts
 
-            # Example search parameters
-            search_url = f"{base_url}/search.do?action=simple&searchType=Application"
 
-            # Would need to:
-            # 1. Submit search form with postcode
-            # 2. Parse results table
-            # 3. Extract application details
+def opdc_pages(session, term=None):
+    """OPDC planning register (a single page of application links)"""
 
-            # Placeholder for now
-            print(f"   ○ {postcode}: Would search planning portal here")
+    response = fetch(session, "GET", OPDC_URL, "OPDC Planning")
 
-        except Exception as e:
-            print(f"   ✗ {postcode}: Error - {str(e)[:50]}")
+    if response.status_code != 200:
+        print(f"   ✗ OPDC: Failed to fetch (status {response.status_code})")
+        return
 
-    return all_applications
+    soup = BeautifulSoup(response.content, 'html.parser')
 
+    # Find planning application links/entries
+    # Note: This is a template - actual selectors depend on site structure
+    app_links = soup.find_all('a', href=lambda x: x and 'application' in x.lower())
 
-def scrape_opdc_planning():
-    """Scrape OPDC planning register"""
+    applications = []
 
-    print("📋 Checking OPDC planning register...")
+    # Extract recent applications
+    for link in app_links[:10]:  # Limit to recent ones
+        title = link.get_text(strip=True)
 
-    all_applications = []
+        # Check if relevant
+        if any(keyword in title.lower() for keyword in ['old oak', 'park royal', 'business', 'retail']):
+            reference = REFERENCE_PATTERN.search(title)
+            applications.append(make_application(
+                reference=reference.group(0) if reference else None,
+                title=title,
+                source="OPDC Planning",
+                url=f"https://opdc.london.gov.uk{link.get('href', '')}"
+            ))
 
-    try:
-        # OPDC Planning Applications page
-        url = "https://opdc.london.gov.uk/planning/planning-applications"
+    yield applications
 
-        print(f"   Fetching {url}...")
 
-        response = requests.get(url, timeout=30)
+def register_council_sources():
+    """Register OPDC and every council portal with the planning source framework"""
 
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.content, 'html.parser')
+    register_source("OPDC Planning", opdc_pages)
 
-            # Find planning application links/entries
-            # Note: This is a template - actual selectors depend on site structure
+    for council, (base_url, districts) in COUNCIL_PORTALS.items():
+        name = f"{council} Planning"
+        register_source(name, idox_fetcher(name, base_url), council_search_terms(districts))
 
-            # Look for common patterns
-            app_links = soup.find_all('a', href=lambda x: x and 'application' in x.lower())
 
-            print(f"   Found {len(app_links)} potential applications")
+def scrape_council_planning(names=None):
+    """Crawl OPDC and all council portals in parallel, merged by application reference"""
 
-            # Extract recent applications
-            for link in app_links[:10]:  # Limit to recent ones
-                title = link.get_text(strip=True)
+    print("📋 Checking OPDC and council planning registers...")
 
-                # Check if relevant
-                if any(keyword in title.lower() for keyword in ['old oak', 'park royal', 'business', 'retail']):
-                    all_applications.append({
-                        "title": title,
-                        "url": f"https://opdc.london.gov.uk{link.get('href', '')}",
-                        "source": "OPDC Planning",
-                        "category": "planning_policy",
-                        "date": datetime.now().strftime('%Y-%m-%d'),
-                        "summary": f"Planning application: {title}",
-                        "score": 7
-                    })
+    register_council_sources()
+    all_applications = crawl_sources(names)
 
-            if all_applications:
-                print(f"   ✓ Found {len(all_applications)} relevant applications")
-            else:
-                print(f"   ○ No relevant applications found")
+    # Drop out-of-area applications before any detail pages are fetched
+    if GEO_AVAILABLE:
+        all_applications = filter_applications(all_applications)
 
-        else:
-            print(f"   ✗ Failed to fetch (status {response.status_code})")
+    return all_applications
 
-    except Exception as e:
-        print(f"   ✗ Error: {str(e)[:50]}")
 
-    return all_applications
+def scrape_ealing_planning():
+    """Scrape Ealing Council planning applications for Old Oak area"""
+
+    return scrape_council_planning(["Ealing Planning"])
+
 
+def scrape_opdc_planning():
+    """Scrape OPDC planning register"""
 
-def check_business_planning_applications():
+    return scrape_council_planning(["OPDC Planning"])
+
+
+def check_business_planning_applications(save_state=True):
     """
     Check for business-related planning applications
     Focus on change of use applications that indicate new businesses
+
+    save_state=False diffs against the planning store without updating it
+    (used by dry runs).
     """
 
     print("\n🏪 Checking for business-related planning applications...\n")
 
     business_applications = []
 
-    # Combine results from different sources
-    opdc_apps = scrape_opdc_planning()
-    ealing_apps = scrape_ealing_planning()
-
-    all_apps = opdc_apps + ealing_apps
+    # Combine results from every council, crawled in parallel, and keep only
+    # what changed since the last run (new, status changes, decisions)
+    all_apps = record_changes(scrape_council_planning(), save=save_state)
 
     # Filter for business-relevant applications
     business_keywords = [
@@ -0,0 +1,230 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urljoin
+
+import requests
+from bs4 import BeautifulSoup
+
+from host_scheduler import polite_request
+from instrumentation import attach, current_span, increment, span
+
+# Planning sources: name -> {"fetch_pages": fn(session, term), "search_terms": [...]}
+# fetch_pages is a generator yielding one list of application records per results page.
+_sources = {}
+
+PLANNING_WORKERS = int(os.environ.get("PLANNING_WORKERS", "8"))
+PLANNING_MAX_PAGES = int(os.environ.get("PLANNING_MAX_PAGES", "5"))
+PLANNING_DEADLINE = int(os.environ.get("PLANNING_DEADLINE", "300"))
+
+IDOX_META_PATTERN = re.compile(r"(Ref\. No|Received|Validated|Status|Decision Issued Date|Decision):\s*([^|]+)")
+
+
+def make_application(reference, title, source, url, date=None, address='', status='', summary=None,
+                     decision='', decision_date=None, documents=None, **extra):
+    """
+    Common planning application record shared by every source.
+
+    date is left as None when the source does not give one; the planning
+    store fills it with the date the application was first seen.
+    """
+
+    application = {
+        "reference": (reference or '').strip(),
+        "title": title,
+        "address": address,
+        "status": status,
+        "decision": decision,
+        "decision_date": decision_date,
+        "documents": documents or [],
+        "url": url,
+        "source": source,
+        "sources": [source],
+        "category": "planning_policy",
+        "date": date,
+        "summary": summary or f"Planning application: {title}" + (f" at {address}" if address else ''),
+        "score": 7
+    }
+    application.update(extra)
+
+    return application
+
+
+def normalize_reference(reference):
+    return re.sub(r"\s+", "", reference or '').upper()
+
+
+def register_source(name, fetch_pages, search_terms=None):
+    """Register a paginated planning source; search_terms=None means one unfiltered crawl"""
+
+    _sources[name] = {
+        "fetch_pages": fetch_pages,
+        "search_terms": search_terms
+    }
+
+
+def available_sources():
+    return list(_sources)
+
+
+def fetch(session, method, url, source, **kwargs):
+    """HTTP request queued through the per-host politeness scheduler"""
+
+    with span("planning.fetch", stage="planning", source=source, url=url) as fetch_span:
+        response = polite_request(method, url, session=session, **kwargs)
+        fetch_span["bytes"] = len(response.content)
+        fetch_span["attributes"]["status_code"] = response.status_code
+
+    return response
+
+
+def _crawl(name, term, parent_span=None):
+    source = _sources[name]
+    applications = []
+    session = requests.Session()
+
+    with attach(parent_span):
+        for page_number, page in enumerate(source["fetch_pages"](session, term), 1):
+            applications.extend(page)
+            if page_number >= PLANNING_MAX_PAGES:
+                break
+
+    return applications
+
+
+def merge_applications(applications):
+    """Merge records that share an application reference, keeping the most complete fields"""
+
+    merged = {}
+    unreferenced = []
+
+    for application in applications:
+        key = normalize_reference(application.get('reference'))
+        if not key:
+            unreferenced.append(application)
+            continue
+
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = application
+            continue
+
+        for field, value in application.items():
+            if field == 'sources':
+                existing['sources'] = sorted(set(existing['sources']) | set(value))
+            elif value and not existing.get(field):
+                existing[field] = value
+
+    return list(merged.values()) + unreferenced
+
+
+def crawl_sources(names=None, deadline=PLANNING_DEADLINE):
+    """
+    Crawl every (source, search term) pair in parallel and merge the results.
+
+    Total time is bounded by the slowest host rather than the sum of all
+    councils; host_scheduler keeps each portal to its own request budget.
+    """
+
+    names = [n for n in (names or available_sources()) if n in _sources]
+    tasks = [(name, term) for name in names for term in (_sources[name]["search_terms"] or [None])]
+
+    if not tasks:
+        return []
+
+    applications = []
+    counts = {name: 0 for name in names}
+    parent_span = current_span()
+
+    executor = ThreadPoolExecutor(max_workers=min(PLANNING_WORKERS, len(tasks)))
+    futures = {executor.submit(_crawl, name, term, parent_span): (name, term) for name, term in tasks}
+
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            name, term = futures[future]
+            label = f"{name} ({term})" if term else name
+            try:
+                found = future.result()
+                applications.extend(found)
+                counts[name] += len(found)
+            except Exception as e:
+                increment("planning_source_failures_total", source=name)
+                print(f"   ✗ {label}: Error - {str(e)[:50]}")
+    except TimeoutError:
+        print(f"   ⚠️  Planning crawl deadline ({deadline}s) reached, using results so far")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    for name, count in counts.items():
+        print(f"   {'✓' if count else '○'} {name}: {count} applications")
+
+    merged = merge_applications(applications)
+    if len(merged) < len(applications):
+        print(f"   🔗 Merged {len(applications) - len(merged)} duplicate applications by reference")
+
+    return merged
+
+
+def idox_fetcher(name, base_url):
+    """
+    Paginated fetcher for Idox Public Access portals (used by Ealing,
+    Hammersmith & Fulham and Brent): simple search, then follow 'next' links.
+    """
+
+    def fetch_pages(session, term):
+        response = fetch(session, "POST", f"{base_url}/search.do?action=simple&searchType=Application", name, data={
+            "searchType": "Application",
+            "searchCriteria.simpleSearchString": term,
+            "searchCriteria.simpleSearch": "true"
+        })
+
+        while response.status_code == 200:
+            soup = BeautifulSoup(response.content, 'html.parser')
+            yield parse_idox_results(soup, name, response.url)
+
+            next_link = soup.select_one('a.next')
+            if not next_link or not next_link.get('href'):
+                return
+            response = fetch(session, "GET", urljoin(response.url, next_link['href']), name)
+
+        print(f"   ✗ {name} ({term}): Failed to fetch (status {response.status_code})")
+
+    return fetch_pages
+
+
+def parse_idox_results(soup, source, page_url):
+    """Parse one Idox search results page into application records"""
+
+    applications = []
+
+    for result in soup.select('li.searchresult'):
+        link = result.find('a')
+        if not link:
+            continue
+
+        meta = dict((key, value.strip()) for key, value in IDOX_META_PATTERN.findall(result.get_text(' ', strip=True)))
+        address = result.select_one('p.address')
+
+        applications.append(make_application(
+            reference=meta.get('Ref. No'),
+            title=link.get_text(strip=True),
+            source=source,
+            url=urljoin(page_url, link.get('href', '')),
+            date=_parse_idox_date(meta.get('Validated') or meta.get('Received')),
+            address=address.get_text(strip=True) if address else '',
+            status=meta.get('Status', ''),
+            decision=meta.get('Decision', ''),
+            decision_date=_parse_idox_date(meta.get('Decision Issued Date'))
+        ))
+
+    return applications
+
+
+def _parse_idox_date(text):
+    for date_format in ('%a %d %b %Y', '%d %b %Y', '%d/%m/%Y'):
+        try:
+            return datetime.strptime((text or '').strip(), date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return None
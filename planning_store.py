@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from planning_sources import normalize_reference
+from urls import canonical_url
+
+# Persistent planning application store, committed back to the repo by the
+# weekly workflow so each run only curates what changed since the last one.
+STATE_DIR = os.environ.get("PLANNING_STATE_DIR", "state")
+STORE_FILE = os.path.join(STATE_DIR, "planning_applications.json")
+
+# Applications not seen for this long are dropped from the store
+STORE_RETENTION_DAYS = 365
+
+# Outcomes that mean a decision was made ("Grant Permission", "Refused", ...);
+# pending statuses such as "Awaiting decision" never count
+DECISION_WORDS = ('decided', 'approve', 'grant', 'permitted', 'refuse', 'withdrawn')
+PENDING_WORDS = ('awaiting', 'pending')
+
+# Curation score for each kind of change (replaces the old flat 7)
+CHANGE_SCORES = {"new": 7, "decision": 8, "status": 6, "documents": 5}
+
+
+def store_key(application):
+    """
+    Normalized reference, or "url:" plus the canonical URL for applications
+    a source lists without a reference; None if there is neither.
+    """
+
+    reference = normalize_reference(application.get('reference'))
+    if reference:
+        return reference
+    return _url_key(application)
+
+
+def _url_key(application):
+    url = application.get('url')
+    return f"url:{canonical_url(url)}" if url else None
+
+
+def _previous_record(application, store):
+    """(key, stored record or None), moving a URL-keyed record to the reference once one is known"""
+
+    key = store_key(application)
+    if not key:
+        return None, None
+
+    url_key = _url_key(application)
+    if key not in store and url_key and url_key != key and url_key in store:
+        store[key] = store.pop(url_key)
+
+    return key, store.get(key)
+
+
+def load_store(path=STORE_FILE):
+    """Load stored applications keyed by store_key"""
+
+    try:
+        with open(path) as f:
+            return json.load(f).get('applications', {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"   ⚠️  Could not read planning store {path}: {str(e)[:80]}")
+        return {}
+
+
+def save_store(applications, path=STORE_FILE):
+    """Atomically write the store"""
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "updated_at": datetime.now().isoformat(),
+            "applications": dict(sorted(applications.items()))
+        }, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def is_decided(application):
+    """True once the application has a decision date or an outcome status"""
+
+    if application.get('decision_date'):
+        return True
+    text = f"{application.get('status') or ''} {application.get('decision') or ''}".lower()
+    return not any(word in text for word in PENDING_WORDS) and any(word in text for word in DECISION_WORDS)
+
+
+def _stored_record(application, today, previous=None):
+    previous = previous or {}
+    status = application.get('status') or previous.get('status', '')
+    history = list(previous.get('history', []))
+    if status and (not history or history[-1]['status'] != status):
+        history.append({"date": today, "status": status})
+
+    return {
+        "reference": application.get('reference'),
+        "title": application.get('title') or previous.get('title'),
+        "address": application.get('address') or previous.get('address', ''),
+        "url": application.get('url') or previous.get('url'),
+        "sources": sorted(set(previous.get('sources', [])) | set(application.get('sources', []))),
+        "status": status,
+        "decision": application.get('decision') or previous.get('decision', ''),
+        "decision_date": application.get('decision_date') or previous.get('decision_date'),
+        "documents": sorted(set(previous.get('documents', [])) | set(application.get('documents', []))),
+        "date": application.get('date') or previous.get('date') or today,
+        "first_seen": previous.get('first_seen', today),
+        "last_seen": today,
+        "history": history
+    }
+
+
+def diff_applications(applications, store):
+    """
+    Compare freshly crawled applications with the store.
+
+    Returns a list of changed applications, each marked with 'change'
+    ("new", "status", "decision" or "documents") and 'previous_status'.
+    Unchanged applications are left out.
+    """
+
+    changes = []
+
+    for application in applications:
+        key, previous = _previous_record(application, store)
+
+        if previous is None:
+            change = "decision" if key and is_decided(application) else "new"
+        elif application.get('status') and application['status'] != previous.get('status'):
+            change = "decision" if is_decided(application) and not is_decided(previous) else "status"
+        elif application.get('decision_date') and not previous.get('decision_date'):
+            change = "decision"
+        elif set(application.get('documents', [])) - set(previous.get('documents', [])):
+            change = "documents"
+        else:
+            continue
+
+        application['change'] = change
+        application['previous_status'] = (previous or {}).get('status')
+        changes.append(application)
+
+    return changes
+
+
+def _describe_change(application):
+    if application['change'] == "new":
+        return f"New planning application: {application['title']}"
+    if application['change'] == "decision":
+        decision = application.get('decision') or application.get('status')
+        return f"Planning decision ({decision}): {application['title']}"
+    if application['change'] == "status":
+        return f"Status changed from {application['previous_status']} to {application['status']}: {application['title']}"
+    return f"New documents published: {application['title']}"
+
+
+def record_changes(applications, path=STORE_FILE, save=True):
+    """
+    Diff applications against the store, update the store and return only
+    the changed applications, ready for curation.
+
+    Applications without a reference are tracked by canonical URL;
+    those with neither are passed through as new every time. With
+    save=False the store file is left untouched (dry runs).
+    """
+
+    store = load_store(path)
+    today = datetime.now().strftime('%Y-%m-%d')
+
+    changes = diff_applications(applications, store)
+
+    for application in applications:
+        key, _ = _previous_record(application, store)
+        if key:
+            store[key] = _stored_record(application, today, store.get(key))
+            # Undated applications keep the date they were first seen, not today's
+            application['date'] = store[key]['date']
+        elif not application.get('date'):
+            application['date'] = today
+
+    for application in changes:
+        application['score'] = CHANGE_SCORES[application['change']]
+        application['summary'] = _describe_change(application) + (
+            f" at {application['address']}" if application.get('address') else ''
+        )
+
+    # Forget applications that have not appeared for a year
+    cutoff = (datetime.now() - timedelta(days=STORE_RETENTION_DAYS)).strftime('%Y-%m-%d')
+    store = {key: record for key, record in store.items() if record['last_seen'] >= cutoff}
+
+    if save:
+        save_store(store, path)
+
+    counts = {change: sum(1 for a in changes if a['change'] == change) for change in CHANGE_SCORES}
+    print(f"   🗂️  Planning changes: {counts['new']} new, {counts['status']} status, "
+          f"{counts['decision']} decisions, {counts['documents']} documents "
+          f"({len(applications) - len(changes)} unchanged, {len(store)} tracked)")
+
+    return changes
+
+
+def self_check():
+    """
+    Run record_changes against a temporary store: a pending "Awaiting
+    decision" status is a status change, a granted one is a decision.
+    Raises AssertionError on any mismatch.
+    """
+
+    application = {"reference": "24/0001/FUL", "title": "Change of use to cafe", "url": "https://example.org/24-0001"}
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "store.json")
+
+        def _change(status, **fields):
+            changes = record_changes([{**application, "status": status, **fields}], path)
+            return changes[0]['change'] if changes else None
+
+        assert _change("Awaiting decision") == "new"
+        assert _change("Registered") == "status"
+        assert _change("Awaiting decision") == "status"
+        assert _change("Pending consideration") == "status"
+        assert _change("Grant Permission") == "decision"
+        assert _change("Grant Permission") is None
+
+    assert not is_decided({"status": "Awaiting decision", "decision": ""})
+    assert is_decided({"status": "Awaiting decision", "decision_date": "2024-05-01"})
+    assert is_decided({"status": "Decided", "decision": "Refused"})
+
+    print("✅ Planning store self-check passed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the planning change detection offline")
+    parser.add_argument("--self-check", action="store_true", help="diff sample applications against a temporary store")
+    args = parser.parse_args()
+
+    if args.self_check:
+        self_check()
+    else:
+        parser.print_help()
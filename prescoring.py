@@ -0,0 +1,237 @@
+import glob
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+# Local pre-scoring: a fast keyword-weight model over title and summary that
+# drops low-value RSS and planning items before they cost an LLM round trip.
+PRESCORE_THRESHOLD = float(os.environ.get("PRESCORE_THRESHOLD", "3.0"))
+
+# Term weights (negative weights push national/irrelevant stories down)
+KEYWORD_WEIGHTS = {
+    "old oak common": 3.0,
+    "old oak": 2.5,
+    "oldoak": 2.5,
+    "park royal": 2.5,
+    "parkroyal": 2.5,
+    "opdc": 2.0,
+    "willesden junction": 2.0,
+    "acton wells": 2.0,
+    "wormwood scrubs": 1.5,
+    "north acton": 1.0,
+    "harlesden": 1.0,
+    "east acton": 0.5,
+    "nw10": 1.5,
+    "w12": 0.5,
+    "w3 ": 0.5,
+    "hs2": 1.0,
+    "elizabeth line": 0.5,
+    "planning": 0.5,
+    "application": 0.5,
+    "consultation": 0.5,
+    "opening": 0.5,
+    "business": 0.3,
+    "residents": 0.5,
+    "community": 0.3,
+    "birmingham": -1.0,
+    "euston": -0.5,
+    "manchester": -1.0,
+    "nationwide": -1.0
+}
+
+# Title mentions count for more than summary mentions
+TITLE_WEIGHT = 1.5
+SUMMARY_WEIGHT = 1.0
+
+
+def prescore_items(items):
+    """Score items locally (0-10) from keyword weights and freshness; sets item['prescore']"""
+
+    if not items:
+        return np.zeros(0)
+
+    terms = list(KEYWORD_WEIGHTS)
+    weights = np.array([KEYWORD_WEIGHTS[t] for t in terms])
+
+    titles = np.array([(item.get('title') or '').lower() for item in items])
+    summaries = np.array([(item.get('summary') or '').lower() for item in items])
+
+    # Term presence matrices (items x terms), one column per keyword
+    title_hits = np.stack([np.char.find(titles, term) >= 0 for term in terms], axis=1)
+    summary_hits = np.stack([np.char.find(summaries, term) >= 0 for term in terms], axis=1)
+    # A term in the title also counts once in the summary's place, not twice
+    summary_hits &= ~title_hits
+
+    scores = title_hits @ weights * TITLE_WEIGHT + summary_hits @ weights * SUMMARY_WEIGHT
+
+    # Freshness boost, same bands as categorize_rss_items
+    days_old = np.array([_days_old(item) for item in items], dtype=float)
+    scores += np.where(days_old <= 7, 2.0, np.where(days_old <= 14, 1.0, 0.0))
+
+    scores = np.clip(scores, 0, 10).round(2)
+
+    for item, score in zip(items, scores):
+        item['prescore'] = float(score)
+
+    return scores
+
+
+def _days_old(item):
+    if item.get('days_old') is not None:
+        return item['days_old']
+    try:
+        return (datetime.now() - datetime.strptime(item.get('date') or '', '%Y-%m-%d')).days
+    except ValueError:
+        return 30
+
+
+def filter_items(items, threshold=None):
+    """Pre-score items and split them into (kept, dropped) at the threshold"""
+
+    if threshold is None:
+        threshold = PRESCORE_THRESHOLD
+
+    scores = prescore_items(items)
+    kept = [item for item, score in zip(items, scores) if score >= threshold]
+    dropped = [item for item, score in zip(items, scores) if score < threshold]
+
+    return kept, dropped
+
+
+def load_curated_history(review_dir="reviews", pattern="review_*.json"):
+    """Load every curated item from past review JSON files matching pattern"""
+
+    curated = []
+
+    for filename in sorted(glob.glob(os.path.join(review_dir, pattern))):
+        if filename.endswith("_metrics.json"):
+            continue
+        try:
+            with open(filename) as f:
+                review = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+
+        content = review.get('curated_content') or review.get('content') or {}
+        for items in content.get('categories', {}).values():
+            curated.extend(item for item in items if isinstance(item, dict) and item.get('title'))
+
+    return curated
+
+
+def _item_key(item):
+    return (item.get('url') or '').strip().rstrip('/').lower(), ' '.join((item.get('title') or '').lower().split())
+
+
+def _parse_input(result):
+    """The item behind an archived RSS or planning curation input (see format_rss_for_curation)"""
+
+    fields = {}
+    for line in result['results'].get('content', '').splitlines():
+        key, _, value = line.partition(': ')
+        if key in ('Title', 'Date', 'Summary', 'URL') and key.lower() not in fields:
+            fields[key.lower()] = value.strip()
+
+    return {"title": fields.get('title', ''), "date": fields.get('date', ''),
+            "summary": fields.get('summary', ''), "url": fields.get('url', '')}
+
+
+def load_archived_candidates(review_dir="reviews", start_date=None, end_date=None):
+    """
+    RSS and planning inputs of archived runs, labelled from the same run's review.
+
+    Each item gets 'curated' (it was picked in reviews/review_<timestamp>.json)
+    and 'days_old' relative to the run date, so freshness is scored as it was
+    on the day. Runs without a matching review are skipped.
+    """
+
+    from raw_archive import list_manifests, load_run
+
+    candidates = []
+
+    for manifest in list_manifests(start_date, end_date):
+        review = f"review_{manifest['timestamp']}.json"
+        if not os.path.exists(os.path.join(review_dir, review)):
+            continue
+        picks = load_curated_history(review_dir, review)
+        pick_urls = {_item_key(item)[0] for item in picks if item.get('url')}
+        pick_titles = {_item_key(item)[1] for item in picks}
+        run_date = datetime.strptime(manifest['date'], '%Y-%m-%d')
+
+        for result in load_run(manifest):
+            if not isinstance(result.get('results'), dict) or result['results'].get('source') not in ('rss', 'planning'):
+                continue
+            item = _parse_input(result)
+            url, title = _item_key(item)
+            item['curated'] = (bool(url) and url in pick_urls) or title in pick_titles
+            try:
+                item['days_old'] = (run_date - datetime.strptime(item['date'], '%Y-%m-%d')).days
+            except ValueError:
+                pass
+            candidates.append(item)
+
+    return candidates
+
+
+def evaluate_prescoring(candidates=None, threshold=None, review_dir="reviews"):
+    """
+    Report precision and recall of the pre-score filter against past curation.
+
+    By default the candidates are the archived RSS and planning inputs of
+    past runs, positive when that run's review curated them. Archived inputs
+    had already passed that run's threshold, so thresholds below it find no
+    extra negatives. Candidates without a 'curated' label are positive when
+    they appear in any past review. With no archive, the curated history
+    itself is scored, which gives recall only.
+    """
+
+    if threshold is None:
+        threshold = PRESCORE_THRESHOLD
+
+    if candidates is None:
+        candidates = load_archived_candidates(review_dir) or load_curated_history(review_dir)
+
+    history = load_curated_history(review_dir)
+    history_urls = {_item_key(item)[0] for item in history if item.get('url')}
+    history_titles = {_item_key(item)[1] for item in history}
+
+    labels = np.array([
+        item['curated'] if 'curated' in item else _item_key(item)[0] in history_urls or _item_key(item)[1] in history_titles
+        for item in candidates
+    ], dtype=bool)
+    predicted = prescore_items(candidates) >= threshold if candidates else np.zeros(0, dtype=bool)
+
+    true_positives = int((predicted & labels).sum())
+    predicted_positives = int(predicted.sum())
+    actual_positives = int(labels.sum())
+    has_negatives = bool((~labels).any())
+
+    return {
+        "threshold": threshold,
+        "candidates": len(candidates),
+        "positives": actual_positives,
+        "kept": predicted_positives,
+        "precision": round(true_positives / predicted_positives, 3) if predicted_positives and has_negatives else None,
+        "recall": round(true_positives / actual_positives, 3) if actual_positives else None
+    }
+
+
+if __name__ == "__main__":
+    # Evaluate the pre-score threshold against past curated reviews
+    print("="*60)
+    print("LOCAL PRE-SCORING EVALUATION")
+    print("="*60 + "\n")
+
+    archived = load_archived_candidates()
+    if archived:
+        print(f"  {len(archived)} archived RSS/planning inputs, {sum(item['curated'] for item in archived)} curated\n")
+    else:
+        print("  No archived runs with reviews, scoring the curated history (recall only)\n")
+
+    for threshold in (1.0, 2.0, 3.0, 4.0, 5.0):
+        report = evaluate_prescoring(archived or None, threshold=threshold)
+        precision = "n/a" if report["precision"] is None else f"{report['precision']:.2f}"
+        recall = "n/a" if report["recall"] is None else f"{report['recall']:.2f}"
+        print(f"  threshold {threshold:.1f}: kept {report['kept']}/{report['candidates']}, precision {precision}, recall {recall}")
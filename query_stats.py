@@ -0,0 +1,178 @@
+import json
+import os
+from datetime import datetime
+
+from urls import canonical_url
+
+# Per-query yield history, committed with the planning store so it persists
+# across runs. The adaptive scheduler uses it to run high-yield queries first,
+# run low-yield queries less often and retire queries that never produce stories.
+STATE_DIR = os.environ.get("QUERY_STATE_DIR", "state")
+QUERY_STATS_FILE = os.path.join(STATE_DIR, "query_stats.json")
+
+# "adaptive" (default) or "all" to run every query every time
+QUERY_SCHEDULING = os.environ.get("QUERY_SCHEDULING", "adaptive")
+# Runs kept per query, and runs needed before a query is judged
+QUERY_HISTORY_RUNS = 12
+QUERY_MIN_RUNS = int(os.environ.get("QUERY_MIN_RUNS", "3"))
+# Below this many curated stories per run a query only runs every LOW_YIELD_INTERVAL_DAYS
+LOW_YIELD = float(os.environ.get("QUERY_LOW_YIELD", "0.5"))
+LOW_YIELD_INTERVAL_DAYS = int(os.environ.get("QUERY_LOW_YIELD_INTERVAL_DAYS", "14"))
+# No stories in this many consecutive runs retires a query; retired queries are
+# still probed every RETIRED_PROBE_DAYS (0 = never) in case the source comes back
+RETIRE_AFTER_RUNS = int(os.environ.get("QUERY_RETIRE_AFTER_RUNS", "6"))
+RETIRED_PROBE_DAYS = int(os.environ.get("QUERY_RETIRED_PROBE_DAYS", "56"))
+
+
+def load_query_stats(path=QUERY_STATS_FILE):
+    """Load per-query history keyed by query text"""
+
+    try:
+        with open(path) as f:
+            return json.load(f).get('queries', {})
+    except FileNotFoundError:
+        return {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"   ⚠️  Could not read query stats {path}: {str(e)[:80]}")
+        return {}
+
+
+def save_query_stats(stats, path=QUERY_STATS_FILE):
+    """Atomically write the query history"""
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "updated_at": datetime.now().isoformat(),
+            "queries": dict(sorted(stats.items()))
+        }, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def query_yield(record):
+    """Average curated stories per run over the kept history, or None before QUERY_MIN_RUNS runs"""
+
+    runs = [run for run in record.get('runs', []) if not run.get('error')]
+    if len(runs) < QUERY_MIN_RUNS:
+        return None
+    return sum(run['curated'] for run in runs) / len(runs)
+
+
+def _days_since(date):
+    try:
+        return (datetime.now() - datetime.strptime(date, '%Y-%m-%d')).days
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_dead(record):
+    runs = [run for run in record.get('runs', []) if not run.get('error')]
+    return len(runs) >= RETIRE_AFTER_RUNS and not any(run['curated'] for run in runs[-RETIRE_AFTER_RUNS:])
+
+
+def schedule_queries(queries, stats=None):
+    """
+    Split queries into (to_run, skipped) using their yield history.
+
+    to_run is ordered by yield, highest first, with queries that do not have
+    enough history yet kept in their configured order between proven and
+    low-yield ones. Low-yield queries run every LOW_YIELD_INTERVAL_DAYS and
+    retired ones every RETIRED_PROBE_DAYS. Each skipped entry is
+    (query, reason).
+    """
+
+    if QUERY_SCHEDULING == "all":
+        return list(queries), []
+
+    stats = load_query_stats() if stats is None else stats
+    to_run, skipped = [], []
+
+    for position, query in enumerate(queries):
+        record = stats.get(query['query'], {})
+        yield_ = query_yield(record)
+        since = _days_since(record.get('last_run'))
+
+        if _is_dead(record):
+            if not RETIRED_PROBE_DAYS or (since is not None and since < RETIRED_PROBE_DAYS):
+                skipped.append((query, f"retired, no stories in {RETIRE_AFTER_RUNS} runs"))
+                continue
+        elif yield_ is not None and yield_ < LOW_YIELD and since is not None and since < LOW_YIELD_INTERVAL_DAYS:
+            skipped.append((query, f"low yield ({yield_:.1f} stories/run), runs every {LOW_YIELD_INTERVAL_DAYS} days"))
+            continue
+
+        # Proven queries by yield, then untested ones, then low-yield probes
+        rank = (0, -yield_) if yield_ is not None and yield_ >= LOW_YIELD else (1, 0) if yield_ is None else (2, -yield_)
+        to_run.append((rank, position, query))
+
+    return [query for _, _, query in sorted(to_run, key=lambda entry: entry[:2])], skipped
+
+
+def attribute_items(curated_items, search_results):
+    """Count curated items per query by matching item URLs against each search's citations"""
+
+    owners = {}
+    for result in search_results:
+        if not isinstance(result.get('results'), dict):
+            continue
+        for url in result['results'].get('citations', []):
+            if isinstance(url, str):
+                owners.setdefault(canonical_url(url), []).append(result['query'])
+
+    attributed = {}
+    for item in curated_items:
+        for query in owners.get(canonical_url(item.get('url') or ''), []):
+            attributed.setdefault(query, []).append(item.get('score', 0))
+
+    return attributed
+
+
+def record_query_yields(search_results, curated_items, curated_queries=None, path=QUERY_STATS_FILE, save=True):
+    """
+    Add this run's latency, citations, curated stories and scores to each query's history
+
+    curated_queries, when given, limits recording to the queries whose
+    results reached curation: results cut off by an early stop, the budget
+    or triage say nothing about the query's yield.
+    """
+
+    stats = load_query_stats(path)
+    today = datetime.now().strftime('%Y-%m-%d')
+    attributed = attribute_items(curated_items, search_results)
+
+    if curated_queries is not None:
+        skipped = sum(1 for result in search_results if result['query'] not in curated_queries)
+        search_results = [result for result in search_results if result['query'] in curated_queries]
+        if skipped:
+            print(f"   ⏭️  Yields not recorded for {skipped} queries whose results were not curated")
+
+    for result in search_results:
+        query = result['query']
+        results = result['results'] if isinstance(result.get('results'), dict) else {}
+        scores = attributed.get(query, [])
+        record = stats.setdefault(query, {"category": result.get('category'), "runs": []})
+        was_dead = _is_dead(record)
+
+        record['runs'] = (record['runs'] + [{
+            "date": today,
+            "latency_s": result.get('latency_s'),
+            "citations": len(results.get('citations', [])),
+            "curated": len(scores),
+            "average_score": round(sum(scores) / len(scores), 2) if scores else None,
+            "error": bool(result.get('error'))
+        }])[-QUERY_HISTORY_RUNS:]
+        record['last_run'] = today
+        record['yield'] = query_yield(record)
+
+        if _is_dead(record) and not was_dead:
+            print(f"   🪦 Retiring query (no stories in {RETIRE_AFTER_RUNS} runs): {query[:60]}")
+        elif was_dead and scores:
+            print(f"   🌱 Retired query produced {len(scores)} stories again: {query[:60]}")
+
+    if save:
+        save_query_stats(stats, path)
+
+    return stats
@@ -0,0 +1,106 @@
+import glob
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+
+# Archive of the raw source payloads each run curated (search answers, RSS and
+# planning items), so history can be re-curated with a new prompt or model
+# without paying for the searches again.
+#
+#   archive/objects/<ab>/<sha256>.json.gz  - one gzip-compressed payload, named by content hash
+#   archive/manifests/<timestamp>.json     - the payload hashes for one run, in order
+ARCHIVE_DIR = os.environ.get("RAW_ARCHIVE_DIR", "archive")
+
+# Added to results during a run (ranking, triage, source selection, enrichment,
+# curation, timing), not part of the raw input: left out so identical inputs
+# always hash the same and a backfill recomputes them instead of curating stale
+# copies
+DERIVED_KEYS = ("semantic_score", "triage_score", "prescore", "latency_s", "sources", "curated")
+DERIVED_RESULT_KEYS = ("articles",)
+
+
+def _payload_bytes(payload):
+    return json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def _object_path(digest):
+    return os.path.join(ARCHIVE_DIR, "objects", digest[:2], f"{digest}.json.gz")
+
+
+def store_object(payload):
+    """Store a payload under its content hash (once) and return the hash"""
+
+    data = _payload_bytes(payload)
+    digest = hashlib.sha256(data).hexdigest()
+    path = _object_path(digest)
+
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        # mtime=0 keeps the compressed bytes identical for identical payloads
+        with open(tmp_path, 'wb') as f, gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+            gz.write(data)
+        os.replace(tmp_path, path)
+
+    return digest
+
+
+def load_object(digest):
+    with gzip.open(_object_path(digest), 'rb') as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def raw_payload(result):
+    """A copy of one curation input without the keys added by scoring and enrichment"""
+
+    payload = {key: value for key, value in result.items() if key not in DERIVED_KEYS}
+    if isinstance(payload.get('results'), dict):
+        payload['results'] = {key: value for key, value in payload['results'].items() if key not in DERIVED_RESULT_KEYS}
+    return payload
+
+
+def archive_results(all_search_results, timestamp):
+    """Archive the raw form of every result of a run (see raw_payload); returns the manifest path"""
+
+    hashes = [store_object(raw_payload(result)) for result in all_search_results]
+
+    manifest_path = os.path.join(ARCHIVE_DIR, "manifests", f"{timestamp}.json")
+    os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+
+    with open(manifest_path, 'w') as f:
+        json.dump({
+            "timestamp": timestamp,
+            "date": timestamp[:10],
+            "archived_at": datetime.now().isoformat(),
+            "objects": hashes
+        }, f, indent=2)
+
+    new_objects = len(set(hashes))
+    print(f"🗄️  Archived {len(hashes)} raw results ({new_objects} distinct): {manifest_path}")
+
+    return manifest_path
+
+
+def list_manifests(start_date=None, end_date=None):
+    """Manifests for runs dated between start_date and end_date (YYYY-MM-DD, inclusive), oldest first"""
+
+    manifests = []
+
+    for path in sorted(glob.glob(os.path.join(ARCHIVE_DIR, "manifests", "*.json"))):
+        with open(path) as f:
+            manifest = json.load(f)
+        if start_date and manifest["date"] < start_date:
+            continue
+        if end_date and manifest["date"] > end_date:
+            continue
+        manifests.append(manifest)
+
+    return manifests
+
+
+def load_run(manifest):
+    """The raw results of an archived run, in their original order"""
+
+    return [load_object(digest) for digest in manifest["objects"]]
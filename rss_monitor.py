@@ -1,112 +1,280 @@
-import feedparser
+import os
 import time
+
+import feedparser
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from urllib.parse import urlparse
 
-def fetch_rss_feeds():
-    """Fetch content from RSS feeds relevant to Old Oak/Park Royal"""
-
-    # RSS feeds to monitor
-    rss_feeds = [
-        {
-            "url": "https://www.ealing.gov.uk/news/rss",
-            "name": "Ealing Council",
-            "category": "planning_policy"
-        },
-        {
-            "url": "https://www.ealingtimes.co.uk/news/rss/",
-            "name": "Ealing Times",
-            "category": "development_news"
-        },
-        {
-            "url": "https://www.getwestlondon.co.uk/news/?service=rss",
-            "name": "Get West London",
-            "category": "development_news"
-        },
-        {
-            "url": "https://www.hammersmithandfulham.gov.uk/news/rss",
-            "name": "Hammersmith & Fulham Council",
-            "category": "planning_policy"
-        },
-        # HS2 and transport feeds (may not exist, will handle gracefully)
-        {
-            "url": "https://www.hs2.org.uk/feeds/news/",
-            "name": "HS2 Official",
-            "category": "development_news"
-        },
-        {
-            "url": "https://www.networkrail.co.uk/feed/",
-            "name": "Network Rail",
-            "category": "development_news"
-        }
-    ]
+from feed_health import load_feed_health, save_feed_health, should_fetch, record_fetch
+from feed_stream import iter_entries, response_chunks, FeedParseError, NotAFeedError
+from host_scheduler import polite_get
+from instrumentation import attach, current_span, span, increment
+
+RSS_WORKERS = 8
+
+# "stream" reads entries incrementally and stops at the date window (feed_stream.py);
+# "feedparser" parses the whole document. Malformed XML falls back to feedparser.
+RSS_PARSER = os.environ.get("RSS_PARSER", "stream")
+RSS_MAX_ENTRIES = 20        # entries checked per feed, newest first
+RSS_MAX_AGE_DAYS = 30       # only include items from the last month
+
+# RSS feeds to monitor
+RSS_FEEDS = [
+    {
+        "url": "https://www.ealing.gov.uk/news/rss",
+        "name": "Ealing Council",
+        "category": "planning_policy"
+    },
+    {
+        "url": "https://www.ealingtimes.co.uk/news/rss/",
+        "name": "Ealing Times",
+        "category": "development_news"
+    },
+    {
+        "url": "https://www.getwestlondon.co.uk/news/?service=rss",
+        "name": "Get West London",
+        "category": "development_news"
+    },
+    {
+        "url": "https://www.hammersmithandfulham.gov.uk/news/rss",
+        "name": "Hammersmith & Fulham Council",
+        "category": "planning_policy"
+    },
+    # HS2 and transport feeds (may not exist; feed_health backs off and disables them if so)
+    {
+        "url": "https://www.hs2.org.uk/feeds/news/",
+        "name": "HS2 Official",
+        "category": "development_news"
+    },
+    {
+        "url": "https://www.networkrail.co.uk/feed/",
+        "name": "Network Rail",
+        "category": "development_news"
+    }
+]
+
+def _read_with_feedparser(feed_url, fetch_span):
+    """(status_code, entries, error) with the whole document parsed by feedparser"""
+
+    response = polite_get(feed_url)
+    fetch_span["bytes"] = len(response.content)
+    if response.status_code != 200:
+        return response.status_code, [], f"HTTP {response.status_code}"
+
+    feed = feedparser.parse(response.content)
+    if feed.bozo:
+        return response.status_code, [], f"bozo: {str(feed.get('bozo_exception', ''))[:100]}"
+
+    entries = []
+    for entry in feed.entries[:RSS_MAX_ENTRIES]:
+        published = entry.get('published_parsed', entry.get('updated_parsed'))
+        entries.append({
+            "title": entry.get('title', ''),
+            "link": entry.get('link', ''),
+            "summary": entry.get('summary', entry.get('description', '')),
+            "published": datetime(*published[:6]) if published else None
+        })
 
-    all_items = []
+    return response.status_code, entries, None
 
-    print("📡 Fetching RSS feeds...")
 
-    for feed_config in rss_feeds:
-        feed_url = feed_config["url"]
-        feed_name = feed_config["name"]
-        category = feed_config["category"]
-
-        try:
-            print(f"   Checking {feed_name}...")
-            feed = feedparser.parse(feed_url)
-
-            if feed.bozo:
-                print(f"   ⚠️  {feed_name}: Feed error or doesn't exist")
-                continue
-
-            relevant_items = []
-
-            # Check each entry for Old Oak/Park Royal relevance
-            for entry in feed.entries[:20]:  # Check last 20 entries
-                title = entry.get('title', '').lower()
-                summary = entry.get('summary', entry.get('description', '')).lower()
-                content = title + ' ' + summary
-
-                # Check if relevant to Old Oak/Park Royal area
-                keywords = [
-                    'old oak', 'oldoak', 'park royal', 'parkroyal',
-                    'opdc', 'hs2', 'nw10', 'w3 ', 'w12', 'w10'
-                ]
-
-                if any(keyword in content for keyword in keywords):
-                    # Check if recent (last 30 days)
-                    published = entry.get('published_parsed', entry.get('updated_parsed'))
-                    if published:
-                        pub_date = datetime(*published[:6])
-                        days_old = (datetime.now() - pub_date).days
-
-                        if days_old <= 30:  # Only include items from last month
-                            relevant_items.append({
-                                "title": entry.get('title', 'No title'),
-                                "url": entry.get('link', ''),
-                                "source": feed_name,
-                                "date": pub_date.strftime('%Y-%m-%d'),
-                                "summary": entry.get('summary', entry.get('description', ''))[:300],
-                                "category": category,
-                                "days_old": days_old
-                            })
-
-            if relevant_items:
-                print(f"   ✓ {feed_name}: Found {len(relevant_items)} relevant items")
-                all_items.extend(relevant_items)
+def _read_streamed(feed_url, fetch_span):
+    """(status_code, entries, error) reading entries as the body streams in"""
+
+    response = polite_get(feed_url, stream=True)
+    if response.status_code != 200:
+        getattr(response, "close", lambda: None)()
+        return response.status_code, [], f"HTTP {response.status_code}"
+
+    def _counted(chunks):
+        for chunk in chunks:
+            fetch_span["bytes"] += len(chunk)
+            yield chunk
+
+    try:
+        entries = list(iter_entries(_counted(response_chunks(response)), RSS_MAX_ENTRIES, RSS_MAX_AGE_DAYS))
+    except NotAFeedError as e:
+        return response.status_code, [], str(e)
+    except FeedParseError as e:
+        # Stricter than feedparser (e.g. undefined HTML entities); let feedparser try.
+        # Close first: the streamed response holds one of the host's slots
+        getattr(response, "close", lambda: None)()
+        increment("rss_stream_fallbacks_total")
+        fetch_span["attributes"]["fallback"] = str(e)[:100]
+        return _read_with_feedparser(feed_url, fetch_span)
+    finally:
+        # Stopping early leaves the rest of the body unread
+        getattr(response, "close", lambda: None)()
+
+    return response.status_code, entries, None
+
+
+def _fetch_feed(feed_config, parent_span=None):
+    """Fetch one feed; returns (relevant_items, status message, error or None, latency in seconds)"""
+
+    feed_url = feed_config["url"]
+    feed_name = feed_config["name"]
+    category = feed_config["category"]
+
+    started = time.perf_counter()
+
+    try:
+        with attach(parent_span), span("rss.fetch", stage="rss", feed=feed_name, url=feed_url, parser=RSS_PARSER) as fetch_span:
+            if RSS_PARSER == "stream":
+                status_code, entries, error = _read_streamed(feed_url, fetch_span)
             else:
-                print(f"   ○ {feed_name}: No relevant items")
+                status_code, entries, error = _read_with_feedparser(feed_url, fetch_span)
+            fetch_span["attributes"]["status_code"] = status_code
+            fetch_span["attributes"]["entries"] = len(entries)
+        latency = time.perf_counter() - started
+
+        if error:
+            increment("rss_feed_bozo_total", feed=feed_name)
+            return [], f"   ⚠️  {feed_name}: Feed error or doesn't exist", error, latency
+
+        relevant_items = []
+
+        # Check each entry for Old Oak/Park Royal relevance
+        for entry in entries:
+            title = entry['title'].lower()
+            summary = entry['summary'].lower()
+            content = title + ' ' + summary
+
+            # Check if relevant to Old Oak/Park Royal area
+            keywords = [
+                'old oak', 'oldoak', 'park royal', 'parkroyal',
+                'opdc', 'hs2', 'nw10', 'w3 ', 'w12', 'w10'
+            ]
+
+            if any(keyword in content for keyword in keywords):
+                # Check if recent (last 30 days)
+                pub_date = entry['published']
+                if pub_date:
+                    days_old = (datetime.now() - pub_date).days
+
+                    if days_old <= RSS_MAX_AGE_DAYS:  # Only include items from last month
+                        relevant_items.append({
+                            "title": entry['title'] or 'No title',
+                            "url": entry['link'],
+                            "source": feed_name,
+                            "date": pub_date.strftime('%Y-%m-%d'),
+                            "summary": entry['summary'][:300],
+                            "category": category,
+                            "days_old": days_old
+                        })
+
+        if relevant_items:
+            return relevant_items, f"   ✓ {feed_name}: Found {len(relevant_items)} relevant items", None, latency
+        return [], f"   ○ {feed_name}: No relevant items", None, latency
+
+    except Exception as e:
+        return [], f"   ✗ {feed_name}: Error - {str(e)[:50]}", str(e), time.perf_counter() - started
+
+
+def fetch_rss_feeds(save_state=True):
+    """
+    Fetch content from RSS feeds relevant to Old Oak/Park Royal
+
+    Feeds that are disabled or backing off after failures (see
+    feed_health.py) are skipped. With save_state=False the health file is
+    left untouched (dry runs).
+    """
+
+    all_items = []
 
-        except Exception as e:
-            print(f"   ✗ {feed_name}: Error - {str(e)[:50]}")
+    print("📡 Fetching RSS feeds...")
 
-        # Small delay between feeds
-        time.sleep(1)
+    health = load_feed_health()
+    rss_feeds = []
+    for feed_config in RSS_FEEDS:
+        fetch, reason = should_fetch(feed_config, health)
+        if fetch:
+            rss_feeds.append(feed_config)
+        else:
+            increment("rss_feeds_skipped_total", feed=feed_config["name"])
+            print(f"   ⏭️  {feed_config['name']}: {reason}")
+
+    # Feeds are fetched in parallel; host_scheduler spaces out requests to
+    # the same host, so feeds on different hosts never wait on each other
+    parent_span = current_span()
+    with ThreadPoolExecutor(max_workers=RSS_WORKERS) as executor:
+        results = executor.map(lambda feed_config: _fetch_feed(feed_config, parent_span), rss_feeds)
+
+        for feed_config, (relevant_items, message, error, latency) in zip(rss_feeds, results):
+            print(message)
+            all_items.extend(relevant_items)
+
+            change = record_fetch(feed_config, health, error is None, latency, error)
+            if change == "disabled":
+                increment("rss_feeds_disabled_total", feed=feed_config["name"])
+                print(f"   🚫 {feed_config['name']}: disabled after {health[feed_config['url']]['consecutive_failures']} "
+                      f"consecutive failures (re-enable with: python feed_health.py --enable \"{feed_config['name']}\")")
+            elif change == "recovered":
+                print(f"   💚 {feed_config['name']}: recovered")
+
+    if save_state:
+        save_feed_health(health)
 
     print(f"\n📊 RSS Summary: Found {len(all_items)} relevant items total\n")
 
     return all_items
 
 
+# Category keywords, in tie-break priority order (planning beats community beats business)
+CATEGORY_KEYWORDS = {
+    "planning_policy": ['planning', 'application', 'consultation', 'proposal', 'development'],
+    "community_stories": ['community', 'residents', 'event', 'forum', 'group', 'meeting'],
+    "business_spotlights": ['shop', 'business', 'restaurant', 'cafe', 'opening', 'retail', 'store']
+}
+
+
+def categorize_rss_items_batch(items):
+    """
+    Categorize many items at once from a term-document matrix.
+
+    Returns a list of (category, confidence) per item. The category with the
+    most keyword hits wins, ties go to the earlier category in
+    CATEGORY_KEYWORDS, and items with no hits keep their feed's category
+    with confidence 0. Confidence is the winning category's share of hits.
+    """
+
+    if not items:
+        return []
+
+    categories = list(CATEGORY_KEYWORDS)
+    terms = [term for category in categories for term in CATEGORY_KEYWORDS[category]]
+
+    # Term-category membership matrix (terms x categories)
+    membership = np.zeros((len(terms), len(categories)))
+    row = 0
+    for column, category in enumerate(categories):
+        for _ in CATEGORY_KEYWORDS[category]:
+            membership[row, column] = 1
+            row += 1
+
+    texts = np.array([(item.get('title', '') + ' ' + item.get('summary', '')).lower() for item in items])
+
+    # Term-document matrix of keyword occurrence counts (items x terms)
+    term_counts = np.stack([np.char.count(texts, term) for term in terms], axis=1)
+
+    scores = term_counts @ membership
+    totals = scores.sum(axis=1)
+    # argmax returns the first maximum, which applies the priority order on ties
+    best = scores.argmax(axis=1)
+    confidence = np.divide(scores.max(axis=1), totals, out=np.zeros(len(items)), where=totals > 0)
+
+    results = []
+    for item, index, total, conf in zip(items, best, totals, confidence):
+        if total > 0:
+            results.append((categories[index], round(float(conf), 3)))
+        else:
+            results.append((item.get('category', 'development_news'), 0.0))
+
+    return results
+
+
 def categorize_rss_items(items):
     """Organize RSS items by category and score them"""
 
@@ -117,28 +285,15 @@ def categorize_rss_items(items):
         "planning_policy": []
     }
 
-    for item in items:
+    # Auto-categorize all items at once based on keyword hits
+    batch_categories = categorize_rss_items_batch(items)
+
+    for item, (category, confidence) in zip(items, batch_categories):
         title_lower = item['title'].lower()
         summary_lower = item['summary'].lower()
         content = title_lower + ' ' + summary_lower
 
-        # Auto-categorize based on keywords if needed
-        category = item.get('category', 'development_news')
-
-        # Recategorize business items
-        business_keywords = ['shop', 'business', 'restaurant', 'cafe', 'opening', 'retail', 'store']
-        if any(kw in content for kw in business_keywords):
-            category = 'business_spotlights'
-
-        # Recategorize community items
-        community_keywords = ['community', 'residents', 'event', 'forum', 'group', 'meeting']
-        if any(kw in content for kw in community_keywords):
-            category = 'community_stories'
-
-        # Recategorize planning items
-        planning_keywords = ['planning', 'application', 'consultation', 'proposal', 'development']
-        if any(kw in content for kw in planning_keywords):
-            category = 'planning_policy'
+        item['category_confidence'] = confidence
 
         # Score based on relevance and freshness
         score = 5  # Base score
@@ -0,0 +1,99 @@
+import json
+import os
+from datetime import datetime
+
+from budget import spend_snapshot
+
+# Each discovery run checkpoints its stage outputs to runs/<run-id>/<stage>.json
+# as they complete, so a crashed or cancelled run can be resumed without
+# repeating paid searches or curation calls. runs/<run-id>/run.json holds
+# run-level state: the spend so far and which one-off side effects are done.
+RUNS_DIR = os.environ.get("RUNS_DIR", "runs")
+RUN_STATE_STAGE = "run"
+
+
+def new_run_id():
+    return datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+
+def run_dir(run_id):
+    return os.path.join(RUNS_DIR, run_id)
+
+
+def checkpoint_path(run_id, stage):
+    return os.path.join(run_dir(run_id), f"{stage}.json")
+
+
+def save_checkpoint(run_id, stage, data):
+    """Atomically write a stage's output, and the spend that produced it to the run state"""
+
+    if not run_id:
+        return
+
+    _write(run_id, stage, data)
+    if stage != RUN_STATE_STAGE:
+        update_run_state(run_id, spend=spend_snapshot())
+
+
+def _write(run_id, stage, data):
+    path = checkpoint_path(run_id, stage)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "stage": stage,
+            "saved_at": datetime.now().isoformat(),
+            "data": data
+        }, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(run_id, stage):
+    """A stage's saved output, or None if the stage has not completed"""
+
+    if not run_id:
+        return None
+
+    try:
+        with open(checkpoint_path(run_id, stage)) as f:
+            return json.load(f)["data"]
+    except FileNotFoundError:
+        return None
+    except (OSError, json.JSONDecodeError, KeyError) as e:
+        print(f"   ⚠️  Ignoring unreadable checkpoint {stage}: {str(e)[:80]}")
+        return None
+
+
+def load_run_state(run_id):
+    """Run-level state of an earlier attempt (spend, flags), or {}"""
+
+    return load_checkpoint(run_id, RUN_STATE_STAGE) or {}
+
+
+def update_run_state(run_id, **fields):
+    """Merge fields into the run-level state"""
+
+    if not run_id:
+        return
+
+    state = load_run_state(run_id)
+    state.update(fields)
+    _write(run_id, RUN_STATE_STAGE, state)
+
+
+def completed_stages(run_id):
+    """Names of the stages checkpointed for a run"""
+
+    try:
+        return sorted(name[:-len(".json")] for name in os.listdir(run_dir(run_id))
+                      if name.endswith(".json") and name != f"{RUN_STATE_STAGE}.json")
+    except FileNotFoundError:
+        return []
+
+
+def list_runs():
+    try:
+        return sorted(os.listdir(RUNS_DIR))
+    except FileNotFoundError:
+        return []
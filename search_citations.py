@@ -0,0 +1,196 @@
+import re
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from urls import canonical_url
+
+# Normalized candidate records from Claude web search responses: every
+# web_search_tool_result hit and every text citation, with URL, title and page
+# age, so search stories can be scored and deduplicated locally.
+SNIPPETS_PER_CANDIDATE = 3
+SOURCES_PER_RESULT = 10
+
+PAGE_AGE_FORMATS = ("%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d %b %Y", "%Y-%m-%d")
+RELATIVE_AGE = re.compile(r"(\d+)\s+(minute|hour|day|week|month|year)s?\s+ago", re.I)
+RELATIVE_DAYS = {"minute": 0, "hour": 0, "day": 1, "week": 7, "month": 30, "year": 365}
+
+
+def _field(obj, name):
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+
+def parse_page_age(page_age, now=None):
+    """YYYY-MM-DD from a web search page_age ("April 30, 2025", "3 days ago", ISO), or None"""
+
+    if not page_age:
+        return None
+
+    text = str(page_age).strip()
+    now = now or datetime.now()
+
+    relative = RELATIVE_AGE.search(text)
+    if relative:
+        days = int(relative.group(1)) * RELATIVE_DAYS[relative.group(2).lower()]
+        return (now - timedelta(days=days)).strftime('%Y-%m-%d')
+
+    try:
+        return datetime.fromisoformat(text.replace('Z', '+00:00')).strftime('%Y-%m-%d')
+    except ValueError:
+        pass
+
+    for fmt in PAGE_AGE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+
+    return None
+
+
+def _publisher(url):
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def extract_candidates(blocks):
+    """
+    Candidate records from the content blocks of a web search response.
+
+    Hits from web_search_tool_result blocks give URL, title and page age;
+    citations on text blocks add the cited passage and mark the hit as cited
+    (used in the answer, not just retrieved). Records are unique by
+    canonical URL, cited ones first.
+    """
+
+    candidates = {}
+
+    def _candidate(url, title):
+        key = canonical_url(url)
+        if key not in candidates:
+            candidates[key] = {
+                "url": url,
+                "title": title or '',
+                "source": _publisher(url),
+                "date": None,
+                "page_age": None,
+                "snippets": [],
+                "cited": False
+            }
+        elif title and not candidates[key]["title"]:
+            candidates[key]["title"] = title
+        return candidates[key]
+
+    for block in blocks or []:
+        block_type = _field(block, "type")
+
+        if block_type == "web_search_tool_result":
+            hits = _field(block, "content")
+            # An error result is a single object, not a list
+            if not isinstance(hits, list):
+                continue
+            for hit in hits:
+                url = _field(hit, "url")
+                if _field(hit, "type") != "web_search_result" or not url:
+                    continue
+                candidate = _candidate(url, _field(hit, "title"))
+                page_age = _field(hit, "page_age")
+                if page_age and not candidate["page_age"]:
+                    candidate["page_age"] = page_age
+                    candidate["date"] = parse_page_age(page_age)
+
+        elif block_type == "text":
+            for citation in _field(block, "citations") or []:
+                url = _field(citation, "url")
+                if not url:
+                    continue
+                candidate = _candidate(url, _field(citation, "title"))
+                candidate["cited"] = True
+                cited_text = (_field(citation, "cited_text") or '').strip()
+                if cited_text and cited_text not in candidate["snippets"] and len(candidate["snippets"]) < SNIPPETS_PER_CANDIDATE:
+                    candidate["snippets"].append(cited_text)
+
+    ordered = sorted(candidates.values(), key=lambda c: not c["cited"])
+    for candidate in ordered:
+        candidate["summary"] = " ".join(candidate["snippets"])
+
+    return ordered
+
+
+def is_complete(candidate):
+    """True when the record has everything a story needs without asking an LLM"""
+
+    return bool(candidate.get("url") and candidate.get("title") and candidate.get("date"))
+
+
+def collect_candidates(all_search_results):
+    """
+    Candidates from every search result, deduplicated across queries by canonical URL.
+
+    Each record lists the queries that found it and the search category,
+    ready for local pre-scoring.
+    """
+
+    merged = {}
+
+    for result in all_search_results:
+        if not isinstance(result.get('results'), dict):
+            continue
+        for candidate in result['results'].get('candidates', []):
+            key = canonical_url(candidate["url"])
+            if key not in merged:
+                merged[key] = {**candidate, "category": result.get('category'), "queries": []}
+            else:
+                merged[key]["cited"] = merged[key]["cited"] or candidate["cited"]
+                merged[key]["date"] = merged[key]["date"] or candidate["date"]
+                merged[key]["title"] = merged[key]["title"] or candidate["title"]
+            if result['query'] not in merged[key]["queries"]:
+                merged[key]["queries"].append(result['query'])
+
+    return list(merged.values())
+
+
+def select_sources(all_search_results, candidates, threshold):
+    """
+    Attach each search result's prompt sources ('sources') from pre-scored candidates.
+
+    Candidates scored below threshold are left out before curation sees
+    them; complete ones (title, URL and date) are listed first. Returns
+    (kept, dropped) merged candidates.
+    """
+
+    kept = {canonical_url(c["url"]): c for c in candidates if c.get("prescore", 0) >= threshold}
+    dropped = [c for c in candidates if canonical_url(c["url"]) not in kept]
+
+    for result in all_search_results:
+        if not isinstance(result.get('results'), dict) or not result['results'].get('candidates'):
+            continue
+        sources = [kept[key] for key in (canonical_url(c["url"]) for c in result['results']['candidates']) if key in kept]
+        result['sources'] = sorted(sources, key=lambda c: (not is_complete(c), not c["cited"]))
+
+    return list(kept.values()), dropped
+
+
+def drop_cited_duplicates(items, candidates):
+    """Split feed items into (kept, duplicates): duplicates are already cited by a search answer"""
+
+    cited = {canonical_url(c["url"]) for c in candidates if c.get("cited")}
+    kept, duplicates = [], []
+
+    for item in items:
+        url = item.get('url')
+        (duplicates if url and canonical_url(url) in cited else kept).append(item)
+
+    return kept, duplicates
+
+
+def format_sources(candidates, limit=SOURCES_PER_RESULT):
+    """Source lines for the curation prompt, so exact titles and URLs need no rediscovery"""
+
+    lines = []
+    for candidate in candidates[:limit]:
+        date = f" ({candidate['date']})" if candidate.get('date') else ''
+        lines.append(f"- {candidate['title'] or candidate['source']}{date}: {candidate['url']}")
+
+    return "\n".join(lines)
@@ -0,0 +1,226 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from instrumentation import attach, current_span, increment
+from urls import canonical_url
+
+# Registered search providers: name -> {"search": fn(query, focus), "stats": {...}}
+_providers = {}
+_lock = threading.Lock()
+
+# A provider that fails this many times in a row is skipped for the cooldown period
+MAX_CONSECUTIVE_FAILURES = 3
+FAILURE_COOLDOWN_SECONDS = 300
+
+SEARCH_MODES = ("fallback", "race", "merge")
+
+
+def register_provider(name, search_fn):
+    """Register a search function taking (query, focus) and returning a results dict"""
+
+    with _lock:
+        _providers[name] = {
+            "search": search_fn,
+            "stats": {
+                "calls": 0,
+                "successes": 0,
+                "failures": 0,
+                "consecutive_failures": 0,
+                "latencies": [],
+                "last_error": None,
+                "last_failure_at": None
+            }
+        }
+
+
+def unregister_provider(name):
+    with _lock:
+        _providers.pop(name, None)
+
+
+def available_providers():
+    return list(_providers)
+
+
+def is_healthy(name):
+    """A provider is healthy unless it has just failed repeatedly"""
+
+    stats = _providers[name]["stats"]
+    if stats["consecutive_failures"] < MAX_CONSECUTIVE_FAILURES:
+        return True
+    return time.time() - (stats["last_failure_at"] or 0) > FAILURE_COOLDOWN_SECONDS
+
+
+def provider_stats():
+    """Return per-provider health and latency statistics"""
+
+    summary = {}
+
+    with _lock:
+        for name, provider in _providers.items():
+            stats = provider["stats"]
+            latencies = sorted(stats["latencies"])
+            summary[name] = {
+                "calls": stats["calls"],
+                "successes": stats["successes"],
+                "failures": stats["failures"],
+                "healthy": is_healthy(name),
+                "last_error": stats["last_error"],
+                "latency_p50_s": _percentile(latencies, 0.5),
+                "latency_p95_s": _percentile(latencies, 0.95)
+            }
+
+    return summary
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return round(values[index], 3)
+
+
+def _is_good_result(results):
+    return isinstance(results, dict) and bool(results.get('content', '').strip())
+
+
+def _call_provider(name, query, focus, parent_span=None):
+    provider = _providers[name]
+    stats = provider["stats"]
+    start = time.perf_counter()
+
+    try:
+        with attach(parent_span):
+            results = provider["search"](query, focus)
+        if not _is_good_result(results):
+            raise Exception("empty result")
+    except Exception as e:
+        with _lock:
+            stats["calls"] += 1
+            stats["failures"] += 1
+            stats["consecutive_failures"] += 1
+            stats["last_error"] = str(e)[:200]
+            stats["last_failure_at"] = time.time()
+            stats["latencies"].append(time.perf_counter() - start)
+        increment("search_provider_failures_total", provider=name)
+        raise
+
+    with _lock:
+        stats["calls"] += 1
+        stats["successes"] += 1
+        stats["consecutive_failures"] = 0
+        stats["latencies"].append(time.perf_counter() - start)
+
+    return results
+
+
+def search(query, focus, providers=None, mode="fallback", deadline=90):
+    """
+    Search across registered providers.
+
+    fallback: try providers in order until one returns content
+    race:     query all providers at once and take the first good answer
+    merge:    query all providers at once and merge every answer within the deadline
+
+    Returns (results, source) where source names the provider(s) used.
+    """
+
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    names = [n for n in (providers or available_providers()) if n in _providers]
+    healthy = [n for n in names if is_healthy(n)]
+    # If everything is cooling down, still try rather than return nothing
+    names = healthy or names
+
+    if not names:
+        raise Exception("No search providers registered")
+
+    if mode == "fallback" or len(names) == 1:
+        return _search_fallback(query, focus, names)
+
+    return _search_concurrent(query, focus, names, mode, deadline)
+
+
+def _search_fallback(query, focus, names):
+    errors = []
+    parent_span = current_span()
+
+    for index, name in enumerate(names):
+        try:
+            results = _call_provider(name, query, focus)
+            source = name if index == 0 else f"{name} (fallback)"
+            return results, source
+        except Exception as e:
+            print(f"   ⚠️  {name} failed: {str(e)[:100]}")
+            errors.append(f"{name}: {str(e)[:100]}")
+            if parent_span is not None and index < len(names) - 1:
+                parent_span["retries"] += 1
+                print(f"   🔄 Falling back to {names[index + 1]}...")
+
+    raise Exception("All search providers failed - " + "; ".join(errors))
+
+
+def _search_concurrent(query, focus, names, mode, deadline):
+    parent_span = current_span()
+    executor = ThreadPoolExecutor(max_workers=len(names))
+    futures = {executor.submit(_call_provider, name, query, focus, parent_span): name for name in names}
+    answers = []
+    errors = []
+
+    try:
+        pending = set(futures)
+        end_time = time.perf_counter() + deadline
+
+        while pending:
+            remaining = end_time - time.perf_counter()
+            if remaining <= 0:
+                break
+
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = futures[future]
+                try:
+                    answers.append((name, future.result()))
+                except Exception as e:
+                    errors.append(f"{name}: {str(e)[:100]}")
+
+            if mode == "race" and answers:
+                break
+    finally:
+        # Do not let a slow provider hold up the run
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    if not answers:
+        raise Exception("All search providers failed - " + ("; ".join(errors) or "deadline exceeded"))
+
+    if mode == "race":
+        name, results = answers[0]
+        return results, f"{name} (race)"
+
+    return merge_results(answers), " + ".join(name for name, _ in answers)
+
+
+def merge_results(answers):
+    """Merge (provider, results) answers into one results dict"""
+
+    content = []
+    citations = []
+    candidates = {}
+
+    for name, results in answers:
+        content.append(f"[{name}]\n{results.get('content', '')}")
+        for citation in results.get('citations', []):
+            if citation not in citations:
+                citations.append(citation)
+        for candidate in results.get('candidates', []):
+            candidates.setdefault(canonical_url(candidate["url"]), candidate)
+
+    return {
+        "content": "\n\n".join(content),
+        "citations": citations,
+        "candidates": list(candidates.values()),
+        "source": "+".join(results.get('source', name) for name, results in answers)
+    }
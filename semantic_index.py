@@ -0,0 +1,234 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+from prescoring import load_curated_history
+
+# Local semantic relevance: hashed word and character n-gram vectors, compared
+# by cosine similarity against exemplars of stories we want (and don't want).
+EMBEDDING_DIM = 2 ** 12
+CHAR_NGRAMS = (3, 4, 5)
+EMBED_CHUNK = 256
+SEED_MIN_SCORE = 7
+SEMANTIC_MIN_SCORE = float(os.environ.get("SEMANTIC_MIN_SCORE", "0"))
+
+# Above this many exemplars, queries go through LSH buckets instead of a full scan
+BRUTE_FORCE_LIMIT = 2000
+LSH_TABLES = 8
+LSH_BITS = 12
+
+# Places and topics in the Old Oak / Park Royal area that literal keywords miss
+SEED_PHRASES = [
+    "Old Oak Common HS2 and Elizabeth Line station construction",
+    "Park Royal industrial estate businesses and jobs",
+    "Willesden Junction station redevelopment",
+    "Acton Wells junction rail works",
+    "Wormwood Scrubs park and nature reserve",
+    "North Acton and East Acton new homes and towers",
+    "Harlesden and Kensal Green regeneration",
+    "OPDC Old Oak and Park Royal Development Corporation planning decision",
+    "Ealing, Hammersmith & Fulham and Brent council planning applications in NW10, W3 and W12",
+    "Grand Union Canal towpath in Old Oak and Park Royal",
+    "Scrubs Lane and Old Oak Lane road closures",
+    "Local residents forum and community events in Old Oak"
+]
+
+# National stories that share keywords but are not local news
+NEGATIVE_PHRASES = [
+    "HS2 Birmingham Curzon Street station",
+    "HS2 phase two northern leg cancelled Manchester",
+    "HS2 national budget overrun parliament inquiry",
+    "Euston station HS2 terminus funding",
+    "Network Rail national timetable changes"
+]
+NEGATIVE_WEIGHT = 0.5
+
+
+def _chunk_features(texts):
+    """
+    Hashed (row, column) feature pairs for a chunk of texts: words, word
+    bigrams and character n-grams, all hashed with vectorized NumPy ops.
+    """
+
+    word_lists = [re.findall(r"[a-z0-9]+", (text or '').lower()) for text in texts]
+    rows, cols = [], []
+
+    # Words: hash each distinct word once, then look hashes up by id
+    word_ids = {}
+    ids = np.array([word_ids.setdefault(w, len(word_ids)) for words in word_lists for w in words], dtype=np.int64)
+    word_rows = np.repeat(np.arange(len(texts)), [len(words) for words in word_lists])
+
+    if len(ids):
+        vocabulary_hashes = np.array([zlib.crc32(w.encode('utf-8')) for w in word_ids], dtype=np.uint64)
+        word_hashes = vocabulary_hashes[ids]
+        rows.append(word_rows)
+        cols.append(word_hashes % np.uint64(EMBEDDING_DIM))
+
+        # Bigrams of adjacent words within the same text
+        same_text = word_rows[:-1] == word_rows[1:]
+        bigram_hashes = word_hashes[:-1] * np.uint64(1000003) + word_hashes[1:]
+        rows.append(word_rows[:-1][same_text])
+        cols.append((bigram_hashes[same_text] ^ (bigram_hashes[same_text] >> np.uint64(31))) % np.uint64(EMBEDDING_DIM))
+
+    # Character n-grams over the normalized texts joined with a separator
+    normalized = [f" {' '.join(words)} " for words in word_lists]
+    data = np.frombuffer("\n".join(normalized).encode('utf-8'), dtype=np.uint8).astype(np.uint64)
+    # Row of each byte, with -1 on the separators between texts
+    lengths = np.array([len(t.encode('utf-8')) + 1 for t in normalized])
+    row_of = np.repeat(np.arange(len(texts)), lengths)
+    row_of[np.cumsum(lengths)[:-1] - 1] = -1
+    row_of = row_of[:len(data)]
+
+    for n in CHAR_NGRAMS:
+        if len(data) < n:
+            continue
+        count = len(data) - n + 1
+        hashes = np.full(count, n, dtype=np.uint64)
+        for offset in range(n):
+            hashes = hashes * np.uint64(1000003) + data[offset:count + offset]
+        valid = (row_of[:count] >= 0) & (row_of[:count] == row_of[n - 1:])
+        rows.append(row_of[:count][valid])
+        cols.append((hashes[valid] ^ (hashes[valid] >> np.uint64(29))) % np.uint64(EMBEDDING_DIM))
+
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    return np.concatenate(rows).astype(np.int64), np.concatenate(cols).astype(np.int64)
+
+
+def embed_texts(texts):
+    """Embed texts as L2-normalized hashed word/bigram/char n-gram vectors (rows)"""
+
+    vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+
+    for start in range(0, len(texts), EMBED_CHUNK):
+        chunk = texts[start:start + EMBED_CHUNK]
+        rows, cols = _chunk_features(chunk)
+        counts = np.bincount(rows * EMBEDDING_DIM + cols, minlength=len(chunk) * EMBEDDING_DIM)
+        vectors[start:start + len(chunk)] = counts.reshape(len(chunk), EMBEDDING_DIM)
+
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+
+    return vectors
+
+
+def item_text(item):
+    """Text used to embed an RSS, planning or search item"""
+
+    if isinstance(item.get('results'), dict):
+        return f"{item.get('query', '')} {item['results'].get('content', '')[:2000]}"
+    return f"{item.get('title', '')} {item.get('summary', '')}"
+
+
+class SemanticIndex:
+    """Exemplar vectors with an LSH (random hyperplane) index for approximate nearest neighbours"""
+
+    def __init__(self, seed=0):
+        rng = np.random.default_rng(seed)
+        self.planes = rng.standard_normal((LSH_TABLES, LSH_BITS, EMBEDDING_DIM)).astype(np.float32)
+        self.vectors = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.labels = []
+        self.buckets = [{} for _ in range(LSH_TABLES)]
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _signatures(self, vectors):
+        # (tables, n) integer bucket keys from the sign of each hyperplane projection
+        bits = np.einsum('tbd,nd->tnb', self.planes, vectors) > 0
+        return bits.dot(1 << np.arange(LSH_BITS))
+
+    def add(self, texts, labels):
+        vectors = embed_texts(texts)
+        start = len(self.labels)
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.labels.extend(labels)
+
+        for table, keys in enumerate(self._signatures(vectors)):
+            for offset, key in enumerate(keys):
+                self.buckets[table].setdefault(int(key), []).append(start + offset)
+
+    def max_similarity(self, vectors):
+        """Highest cosine similarity of each query vector to any exemplar"""
+
+        if not len(self):
+            return np.zeros(len(vectors))
+
+        if len(self) <= BRUTE_FORCE_LIMIT:
+            return (vectors @ self.vectors.T).max(axis=1)
+
+        similarities = np.zeros(len(vectors))
+        signatures = self._signatures(vectors)
+
+        for row in range(len(vectors)):
+            candidates = set()
+            for table in range(LSH_TABLES):
+                candidates.update(self.buckets[table].get(int(signatures[table, row]), []))
+            if candidates:
+                candidate_rows = np.fromiter(candidates, dtype=int)
+                similarities[row] = (self.vectors[candidate_rows] @ vectors[row]).max()
+
+        return similarities
+
+
+def build_relevance_index(review_dir="reviews"):
+    """Build positive and negative exemplar indexes from seed phrases and past high-scoring stories"""
+
+    history = [item for item in load_curated_history(review_dir) if (item.get('score') or 0) >= SEED_MIN_SCORE]
+
+    positive = SemanticIndex(seed=1)
+    positive.add(SEED_PHRASES, ["seed"] * len(SEED_PHRASES))
+    if history:
+        positive.add([item_text(item) for item in history], [item.get('title', '') for item in history])
+
+    negative = SemanticIndex(seed=2)
+    negative.add(NEGATIVE_PHRASES, ["negative"] * len(NEGATIVE_PHRASES))
+
+    return positive, negative
+
+
+_default_index = None
+
+
+def rank_items(items, index=None):
+    """
+    Score items by semantic similarity to local exemplars and return them best first.
+
+    Sets item['semantic_score'] (positive similarity minus a penalty for
+    resembling national non-local stories).
+    """
+
+    global _default_index
+
+    if not items:
+        return []
+
+    if index is None:
+        if _default_index is None:
+            _default_index = build_relevance_index()
+        index = _default_index
+
+    positive, negative = index
+    vectors = embed_texts([item_text(item) for item in items])
+    scores = positive.max_similarity(vectors) - NEGATIVE_WEIGHT * negative.max_similarity(vectors)
+
+    for item, score in zip(items, scores):
+        item['semantic_score'] = round(float(score), 3)
+
+    return sorted(items, key=lambda x: x['semantic_score'], reverse=True)
+
+
+def filter_relevant(items, min_score=None, index=None):
+    """Rank items semantically and split them into (kept, dropped) at min_score"""
+
+    if min_score is None:
+        min_score = SEMANTIC_MIN_SCORE
+
+    ranked = rank_items(items, index)
+    kept = [item for item in ranked if item['semantic_score'] >= min_score]
+    dropped = [item for item in ranked if item['semantic_score'] < min_score]
+
+    return kept, dropped
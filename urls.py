@@ -0,0 +1,34 @@
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# URL normalization shared by the article cache, search citation dedup and link checks
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'ref', 'cmpid', 'at_medium', 'at_campaign'}
+
+
+def canonical_url(url):
+    """Normalize a URL for caching and dedup: lower-case host, no fragment, no tracking parameters, no trailing slash"""
+
+    parsed = urlparse((url or '').strip())
+    query = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+             if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS]
+    netloc = parsed.netloc.lower()
+    if netloc.endswith(':80') and parsed.scheme == 'http' or netloc.endswith(':443') and parsed.scheme == 'https':
+        netloc = netloc.rsplit(':', 1)[0]
+
+    return urlunparse((
+        parsed.scheme.lower() or 'https',
+        netloc,
+        parsed.path.rstrip('/') or '/',
+        '',
+        urlencode(sorted(query)),
+        ''
+    ))
+
+
+def strip_tracking(url):
+    """Remove tracking parameters and the fragment, leaving the rest of the URL as published"""
+
+    parsed = urlparse((url or '').strip())
+    query = [(key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+             if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS]
+
+    return urlunparse(parsed._replace(query=urlencode(query), fragment=''))